@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+
+The async read endpoints under /api/async/ only free the worker while
+they wait when served here, e.g. with
+    uvicorn app.asgi:application --port 8000
 """
 
 import os
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,10 +46,16 @@ INSTALLED_APPS = [
     'user',
     'strategy',
     'dashboard',
+    'candles',
+    'jobs',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    #first, so its total covers every other middleware
+    'core.timing.ServerTimingMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.traffic.TrafficCaptureMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +65,52 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 ]
+#share of requests timed by ServerTimingMiddleware, from 0 (none) to 1
+#(all); a percent or less keeps the overhead negligible in production
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get(
+    'SERVER_TIMING_SAMPLE_RATE',
+    1.0 if DEBUG else 0.01,
+))
+
+#directory shared by the worker processes for their metric values, leave
+#unset to keep them in-process; clear it before starting the server
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+#bearer token /metrics asks for, without it only DEBUG servers and staff
+#sessions are served
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+#file sampled /api/ requests are appended to for replay_traffic, leave
+#unset to capture nothing
+TRAFFIC_CAPTURE_PATH = os.environ.get('TRAFFIC_CAPTURE_PATH') or None
+#share of /api/ requests captured, from 0 (none) to 1 (all)
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.environ.get(
+    'TRAFFIC_CAPTURE_SAMPLE_RATE', 0.1,
+))
+#bodies larger than this many bytes are captured by size only
+TRAFFIC_CAPTURE_MAX_BODY = int(os.environ.get(
+    'TRAFFIC_CAPTURE_MAX_BODY', 64 * 1024,
+))
+
+#the timings of sampled requests are logged as one JSON line each
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            #quiet while the test suite runs
+            'level': os.environ.get(
+                'SERVER_TIMING_LOG_LEVEL',
+                'WARNING' if 'test' in sys.argv[1:2] else 'INFO',
+            ),
+            'propagate': False,
+        },
+    },
+}
+
 #remember: no ending /
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ORIGIN_WHITELIST = (
@@ -89,13 +142,34 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+#DB_POOL=1 hands closed connections back to a process wide pool instead
+#of closing them, see core/db/backends/pooled_postgresql
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.db.backends.pooled_postgresql' if DB_POOL
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        #seconds to keep a connection open between requests, 0 closes it
+        #after every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+        ),
+        'POOL': {
+            'CLASS': os.environ.get(
+                'DB_POOL_CLASS', 'core.db.pool.ConnectionPool'
+            ),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'PING': os.environ.get('DB_POOL_PING', '0') == '1',
+        },
     }
 }
 
@@ -118,6 +192,55 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+#PASSWORD_HASHER_PROFILE picks the hasher new passwords are hashed with,
+#the others stay listed so existing hashes still verify and are upgraded
+#on the next login. The test runner uses the fast profile, it is far too
+#weak for real passwords.
+PASSWORD_HASHER_PROFILES = {
+    'argon2': [
+        'core.hashers.Argon2PasswordHasher',
+        'core.hashers.BCryptSHA256PasswordHasher',
+        'core.hashers.PBKDF2PasswordHasher',
+    ],
+    'bcrypt': [
+        'core.hashers.BCryptSHA256PasswordHasher',
+        'core.hashers.Argon2PasswordHasher',
+        'core.hashers.PBKDF2PasswordHasher',
+    ],
+    'pbkdf2': [
+        'core.hashers.PBKDF2PasswordHasher',
+        'core.hashers.Argon2PasswordHasher',
+        'core.hashers.BCryptSHA256PasswordHasher',
+    ],
+    'fast': [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+        'core.hashers.PBKDF2PasswordHasher',
+    ],
+}
+PASSWORD_HASHER_PROFILE = os.environ.get(
+    'PASSWORD_HASHER_PROFILE',
+    'fast' if 'test' in sys.argv[1:2] else 'argon2',
+)
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+
+#hashing costs, changing one rehashes passwords as users log in
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+#KiB
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+#log2 of the bcrypt work factor
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+#unset follows Django's default, which rises with every release, a lower
+#value would rehash every stored password down on its next login
+PASSWORD_PBKDF2_ITERATIONS = (
+    int(os.environ['PASSWORD_PBKDF2_ITERATIONS'])
+    if os.environ.get('PASSWORD_PBKDF2_ITERATIONS') else None
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -146,6 +269,83 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 #Path to the user model
 AUTH_USER_MODEL = 'core.User'
 
+#quote assets whose trading pairs save_coins_to_db imports, e.g. USDT,ETH
+COIN_QUOTE_ASSETS = [
+    quote.strip()
+    for quote in os.environ.get('COIN_QUOTE_ASSETS', 'USDT,ETH').split(',')
+    if quote.strip()
+]
+
+#where save_coins_to_db reads the listing from: 'binance', an http(s)
+#URL or snapshot:<path> to seed offline from a saved snapshot
+EXCHANGE_INFO_SOURCE = os.environ.get('EXCHANGE_INFO_SOURCE', 'binance')
+
+#root directory of the columnar candle files, see candles/store.py
+CANDLE_STORE_ROOT = os.environ.get(
+    'CANDLE_STORE_ROOT',
+    str(BASE_DIR / 'data' / 'candles'),
+)
+
+#where sync_candles fetches klines from: 'binance' or replay:<path> of a
+#JSONL recording made with sync_candles --record
+KLINE_SOURCE = os.environ.get('KLINE_SOURCE', 'binance')
+#days sync_candles backfills for symbols without stored candles
+CANDLE_BACKFILL_DAYS = int(os.environ.get('CANDLE_BACKFILL_DAYS', 30))
+CANDLE_SYNC_WORKERS = int(os.environ.get('CANDLE_SYNC_WORKERS', 4))
+
+#computed indicator series kept in-process, keyed by candle window
+INDICATOR_CACHE_MAXSIZE = int(os.environ.get('INDICATOR_CACHE_MAXSIZE', 512))
+
+#threads a backtest reads and tests its symbols on, NumPy and the
+#memory-mapped reads release the GIL
+BACKTEST_THREADS = int(os.environ.get('BACKTEST_THREADS', os.cpu_count() or 1))
+
+#processes a backtest sweep fans out to, 0 runs it in the web process
+SWEEP_WORKERS = int(os.environ.get('SWEEP_WORKERS', os.cpu_count() or 1))
+#most backtests a single sweep request may run
+SWEEP_MAX_RUNS = int(os.environ.get('SWEEP_MAX_RUNS', 500))
+
+#seconds an idle run_jobs worker waits before polling the queue again
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+#seconds before the first retry of a failed job, doubled every attempt
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+#seconds a claimed job stays leased to its worker without a heartbeat,
+#after that it counts as an attempt and is queued again
+JOB_LEASE = int(os.environ.get('JOB_LEASE', 300))
+
+#Django cache alias that shares the coin/base catalog cache between
+#processes, leave unset to only cache in-process
+CATALOG_CACHE_ALIAS = os.environ.get('CATALOG_CACHE_ALIAS') or None
+CATALOG_CACHE_MAXSIZE = int(os.environ.get('CATALOG_CACHE_MAXSIZE', 256))
+#without the shared cache, seconds between checks of the coin/base tables
+#for changes made by other processes
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 60))
+
+#token -> user lookups cached by user.authentication.CachedTokenAuthentication,
+#TOKEN_AUTH_CACHE_ALIAS shares them between processes through a Django cache
+TOKEN_AUTH_CACHE_ALIAS = os.environ.get('TOKEN_AUTH_CACHE_ALIAS') or None
+TOKEN_AUTH_CACHE_MAXSIZE = int(os.environ.get('TOKEN_AUTH_CACHE_MAXSIZE', 1024))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60))
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'user.authentication.CachedTokenAuthentication',
+    ],
+    #keyset pagination for every list endpoint, ?page_size= is capped
+    #by CursorPagination.max_page_size
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    #orjson backed JSON, the stdlib encoder is used when it's missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
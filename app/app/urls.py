@@ -23,8 +23,12 @@ from django.contrib import admin
 #include is used when getting endpoints from diffrent app
 from django.urls import path, include
 
+from core.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    #Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
     #download the schema file
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
     #swagger documentation url
@@ -36,4 +40,8 @@ urlpatterns = [
     path('api/strategy/', include('strategy.urls')),
     path('api/dashboard/', include('dashboard.urls')),
     path('api/grid/', include('grid.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    #async read endpoints, served without blocking a worker under ASGI
+    path('api/async/strategy/', include('strategy.async_urls')),
+    path('api/async/dashboard/', include('dashboard.async_urls')),
 ]
\ No newline at end of file
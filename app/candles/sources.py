@@ -0,0 +1,167 @@
+"""
+Sources for historical klines used by the sync_candles command.
+"""
+import json
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from candles.store import empty_candles, to_candles
+
+#Binance returns at most this many klines per request
+MAX_PAGE_SIZE = 1000
+
+
+def parse_kline(kline):
+    """Return (open_time, open, high, low, close, volume) of a raw kline."""
+    return (
+        int(kline[0]),
+        float(kline[1]),
+        float(kline[2]),
+        float(kline[3]),
+        float(kline[4]),
+        float(kline[5]),
+    )
+
+
+class KlineSource:
+    """Base class for providers of Binance style klines."""
+
+    def fetch(self, symbol, interval, start, end, limit=MAX_PAGE_SIZE):
+        """
+        Return up to limit raw klines with start <= open time <= end,
+        oldest first. Times are in milliseconds.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the source."""
+
+
+class BinanceKlineSource(KlineSource):
+    """Fetch klines from the live API through python-binance."""
+
+    def __init__(self):
+        #requests sessions are not thread safe, keep one client per thread
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            #imported here so offline sources work without the client
+            from binance.client import Client
+            client = self._local.client = Client()
+        return client
+
+    def fetch(self, symbol, interval, start, end, limit=MAX_PAGE_SIZE):
+        return self.client.get_klines(
+            symbol=symbol,
+            interval=interval,
+            startTime=start,
+            endTime=end,
+            limit=min(limit, MAX_PAGE_SIZE),
+        )
+
+    def __str__(self):
+        return 'binance'
+
+
+class ReplaySource(KlineSource):
+    """
+    Serve klines recorded to a JSONL file, one page per line:
+
+        {"symbol": "BTCUSDT", "interval": "1m", "klines": [[...], ...]}
+
+    The file is read lazily once; pages may overlap or come in any order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._series = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._series is None:
+                pages = defaultdict(list)
+                with open(self.path, encoding='utf-8') as recording:
+                    for line in recording:
+                        if line.strip():
+                            page = json.loads(line)
+                            pages[page['symbol'], page['interval']].extend(
+                                page['klines']
+                            )
+                series = {}
+                for key, klines in pages.items():
+                    #keep the last recording of every open time
+                    by_time = {int(kline[0]): kline for kline in klines}
+                    series[key] = [by_time[t] for t in sorted(by_time)]
+                self._series = series
+        return self._series
+
+    def fetch(self, symbol, interval, start, end, limit=MAX_PAGE_SIZE):
+        klines = self._load().get((symbol, interval), [])
+        times = [kline[0] for kline in klines]
+        low = int(np.searchsorted(times, start, side='left'))
+        high = int(np.searchsorted(times, end, side='right'))
+        return klines[low:min(high, low + limit)]
+
+    def __str__(self):
+        return f'replay:{self.path}'
+
+
+class RecordingSource(KlineSource):
+    """Pass fetches through to source and append every page to path."""
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def fetch(self, symbol, interval, start, end, limit=MAX_PAGE_SIZE):
+        klines = self.source.fetch(symbol, interval, start, end, limit)
+        if klines:
+            line = json.dumps(
+                {'symbol': symbol, 'interval': interval, 'klines': klines},
+                separators=(',', ':'),
+            )
+            with self._lock:
+                self._file.write(line + '\n')
+                self._file.flush()
+        return klines
+
+    def close(self):
+        self._file.close()
+        self.source.close()
+
+    def __str__(self):
+        return f'{self.source} (recording to {self.path})'
+
+
+def get_kline_source(spec):
+    """
+    Return the kline source described by spec.
+
+    'binance' is the live API and 'replay:<path>' (or just an existing
+    path) a recorded JSONL file.
+    """
+    if spec == 'binance':
+        return BinanceKlineSource()
+    if spec.startswith('replay:'):
+        return ReplaySource(spec[len('replay:'):])
+    if os.path.exists(spec):
+        return ReplaySource(spec)
+    raise ValueError(f'Unknown kline source: {spec}')
+
+
+def klines_to_candles(klines):
+    """Return Candles for raw klines."""
+    if not klines:
+        return empty_candles()
+    return to_candles([parse_kline(kline) for kline in klines])
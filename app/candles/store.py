@@ -0,0 +1,283 @@
+"""
+Columnar on-disk store for OHLCV candles.
+
+Candles are kept per interval and symbol, partitioned by month:
+
+    <CANDLE_STORE_ROOT>/<interval>/<SYMBOL>/<YYYY-MM>/<column>.bin
+
+Every column is a raw little endian array (int64 open times in ms, float64
+prices and volume) that only ever grows at the end. Reads memory-map the
+files and slice them with searchsorted, so a range inside one month is
+returned without copying; ranges spanning months are concatenated.
+"""
+import fcntl
+import os
+import re
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+COLUMNS = (
+    ('open_time', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+#Binance kline intervals and their length in milliseconds
+INTERVALS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '2h': 7_200_000,
+    '4h': 14_400_000,
+    '6h': 21_600_000,
+    '8h': 28_800_000,
+    '12h': 43_200_000,
+    '1d': 86_400_000,
+}
+
+Candles = namedtuple('Candles', COLUMN_NAMES)
+
+_SYMBOL_RE = re.compile(r'^[A-Z0-9]+$')
+_MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+
+def empty_candles():
+    """Return Candles with no rows."""
+    return Candles(*(np.empty(0, dtype) for _, dtype in COLUMNS))
+
+
+def to_candles(rows):
+    """
+    Return Candles for rows.
+
+    rows can already be Candles, an (n, 6) array or a sequence of
+    (open_time, open, high, low, close, volume) rows.
+    """
+    if isinstance(rows, Candles):
+        return Candles(*(
+            np.ascontiguousarray(column, dtype)
+            for column, (_, dtype) in zip(rows, COLUMNS)
+        ))
+    array = np.asarray(rows, dtype=np.float64)
+    if array.size == 0:
+        return empty_candles()
+    if array.ndim != 2 or array.shape[1] != len(COLUMNS):
+        raise ValueError(f'Expected rows of {len(COLUMNS)} values')
+    return Candles(*(
+        np.ascontiguousarray(array[:, i], dtype)
+        for i, (_, dtype) in enumerate(COLUMNS)
+    ))
+
+
+def concat_candles(parts):
+    """Concatenate Candles column by column."""
+    parts = [part for part in parts if part.open_time.size]
+    if not parts:
+        return empty_candles()
+    if len(parts) == 1:
+        return parts[0]
+    return Candles(*(np.concatenate(columns) for columns in zip(*parts)))
+
+
+def _month_bounds(month):
+    """Return the first and past the last millisecond of a YYYY-MM month."""
+    start = np.datetime64(month, 'M')
+    return tuple(
+        int(bound.astype('datetime64[ms]').astype(np.int64))
+        for bound in (start, start + np.timedelta64(1, 'M'))
+    )
+
+
+class CandleStore:
+    """
+    Append-only candle storage keyed by symbol (a Coin or its name) and
+    interval.
+
+    Appends hold a lock per symbol and interval, also across processes,
+    and write the open_time column last: readers only trust as many rows
+    as open_time holds, so a half written append is never seen and is
+    cut off by the next append.
+    """
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.CANDLE_STORE_ROOT)
+
+    @staticmethod
+    def symbol_name(symbol):
+        """Return the symbol name of a Coin or string."""
+        name = getattr(symbol, 'name', symbol)
+        if not isinstance(name, str) or not _SYMBOL_RE.match(name):
+            raise ValueError(f'Invalid symbol: {name!r}')
+        return name
+
+    @staticmethod
+    def check_interval(interval):
+        if interval not in INTERVALS:
+            raise ValueError(f'Unknown interval: {interval!r}')
+        return interval
+
+    def symbol_path(self, symbol, interval):
+        return os.path.join(
+            self.root,
+            self.check_interval(interval),
+            self.symbol_name(symbol),
+        )
+
+    def partitions(self, symbol, interval):
+        """Return the stored YYYY-MM partitions in order."""
+        path = self.symbol_path(symbol, interval)
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if _MONTH_RE.match(name))
+
+    def symbols(self, interval):
+        """Return the symbols with data for interval."""
+        path = os.path.join(self.root, self.check_interval(interval))
+        try:
+            return sorted(os.listdir(path))
+        except FileNotFoundError:
+            return []
+
+    @contextmanager
+    def _lock(self, symbol, interval):
+        path = self.symbol_path(symbol, interval)
+        with self._locks_guard:
+            lock = self._locks.setdefault(path, threading.Lock())
+        os.makedirs(path, exist_ok=True)
+        with lock, open(os.path.join(path, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _column_path(partition_path, name):
+        return os.path.join(partition_path, f'{name}.bin')
+
+    def _rows(self, partition_path):
+        """Return the number of committed rows in a partition."""
+        try:
+            size = os.path.getsize(
+                self._column_path(partition_path, 'open_time')
+            )
+        except FileNotFoundError:
+            return 0
+        return size // COLUMNS[0][1].itemsize
+
+    def _read_partition(self, partition_path):
+        """Memory-map a partition's columns."""
+        rows = self._rows(partition_path)
+        if not rows:
+            return empty_candles()
+        return Candles(*(
+            np.memmap(
+                self._column_path(partition_path, name),
+                dtype=dtype,
+                mode='r',
+                shape=(rows,),
+            )
+            for name, dtype in COLUMNS
+        ))
+
+    def last_open_time(self, symbol, interval):
+        """Return the newest stored open time in ms, or None."""
+        partitions = self.partitions(symbol, interval)
+        path = self.symbol_path(symbol, interval)
+        for month in reversed(partitions):
+            candles = self._read_partition(os.path.join(path, month))
+            if candles.open_time.size:
+                return int(candles.open_time[-1])
+        return None
+
+    def append(self, symbol, interval, rows):
+        """
+        Append candles newer than the stored ones, return the rows written.
+
+        Rows must be sorted by open time. Rows at or before the newest
+        stored candle are skipped, so overlapping pages can be appended
+        again safely.
+        """
+        candles = to_candles(rows)
+        open_time = candles.open_time
+        if open_time.size > 1 and np.any(np.diff(open_time) <= 0):
+            raise ValueError('Candles must be sorted by open time')
+
+        with self._lock(symbol, interval) as path:
+            last = self.last_open_time(symbol, interval)
+            if last is not None:
+                start = int(np.searchsorted(open_time, last, side='right'))
+                candles = Candles(*(column[start:] for column in candles))
+                open_time = candles.open_time
+            if not open_time.size:
+                return 0
+
+            months = open_time.astype('datetime64[ms]').astype('datetime64[M]')
+            #indexes where a new month starts
+            bounds = np.flatnonzero(months[1:] != months[:-1]) + 1
+            for part in np.split(np.arange(open_time.size), bounds):
+                month = str(months[part[0]])
+                self._write_partition(
+                    os.path.join(path, month),
+                    Candles(*(column[part[0]:part[-1] + 1]
+                              for column in candles)),
+                )
+            return int(open_time.size)
+
+    def _write_partition(self, partition_path, candles):
+        os.makedirs(partition_path, exist_ok=True)
+        rows = self._rows(partition_path)
+        #open_time goes last, it is the commit marker
+        for name, dtype in COLUMNS[1:] + COLUMNS[:1]:
+            column_path = self._column_path(partition_path, name)
+            with open(column_path, 'ab') as column_file:
+                #drop the tail of an append that was interrupted
+                column_file.truncate(rows * dtype.itemsize)
+                column_file.write(
+                    np.ascontiguousarray(
+                        getattr(candles, name), dtype,
+                    ).tobytes()
+                )
+                column_file.flush()
+
+    def iter_read(self, symbol, interval, start=None, end=None):
+        """
+        Yield zero-copy Candles per month for start <= open_time < end.
+
+        start and end are millisecond timestamps, None is unbounded.
+        """
+        path = self.symbol_path(symbol, interval)
+        for month in self.partitions(symbol, interval):
+            month_start, month_end = _month_bounds(month)
+            if end is not None and month_start >= end:
+                break
+            if start is not None and month_end <= start:
+                continue
+            candles = self._read_partition(os.path.join(path, month))
+            low = 0 if start is None else int(
+                np.searchsorted(candles.open_time, start, side='left')
+            )
+            high = candles.open_time.size if end is None else int(
+                np.searchsorted(candles.open_time, end, side='left')
+            )
+            if high > low:
+                yield Candles(*(column[low:high] for column in candles))
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Return the candles with start <= open_time < end."""
+        return concat_candles(self.iter_read(symbol, interval, start, end))
@@ -0,0 +1,68 @@
+"""
+Tests for the kline sources.
+"""
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from candles.sources import (
+    RecordingSource,
+    ReplaySource,
+    get_kline_source,
+    klines_to_candles,
+)
+
+
+def kline(open_time, close='1'):
+    """Return a raw Binance kline."""
+    return [open_time, '1', '2', '0.5', close, '10', open_time + 59_999]
+
+
+class ReplaySourceTests(SimpleTestCase):
+    """Test replaying recorded pages."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'klines.jsonl')
+        pages = [
+            [kline(t) for t in (0, 60_000, 120_000)],
+            #overlapping page, the later recording wins
+            [kline(t, close='2') for t in (120_000, 180_000)],
+        ]
+        with open(self.path, 'w') as recording:
+            for page in pages:
+                recording.write(json.dumps({
+                    'symbol': 'BTCUSDT', 'interval': '1m', 'klines': page,
+                }) + '\n')
+
+    def test_fetch_range_and_limit(self):
+        """Test pages are cut by time range and limit."""
+        source = get_kline_source(f'replay:{self.path}')
+
+        page = source.fetch('BTCUSDT', '1m', 60_000, 180_000, limit=2)
+
+        self.assertEqual([k[0] for k in page], [60_000, 120_000])
+        self.assertEqual(page[1][4], '2')
+        self.assertEqual(source.fetch('ETHUSDT', '1m', 0, 180_000), [])
+
+    def test_recording_replays_the_same_pages(self):
+        """Test a recording of fetched pages replays them."""
+        recorded = self.path + '.rec'
+        source = RecordingSource(ReplaySource(self.path), recorded)
+        fetched = source.fetch('BTCUSDT', '1m', 0, 180_000)
+        source.close()
+
+        self.assertEqual(
+            ReplaySource(recorded).fetch('BTCUSDT', '1m', 0, 180_000),
+            fetched,
+        )
+
+    def test_klines_to_candles(self):
+        """Test raw klines become typed columns."""
+        candles = klines_to_candles([kline(0, close='1.5')])
+
+        self.assertEqual(candles.open_time.tolist(), [0])
+        self.assertEqual(candles.close.tolist(), [1.5])
@@ -0,0 +1,127 @@
+"""
+Tests for the columnar candle store.
+"""
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from candles.store import COLUMN_NAMES, CandleStore, to_candles
+from core.models import Coin
+
+MINUTE = 60_000
+#2024-01-31T23:58:00Z, two minutes before February
+JAN_END = 1706745480000
+
+
+def make_rows(start, count, step=MINUTE):
+    """Return count candle rows starting at start."""
+    times = start + np.arange(count, dtype=np.int64) * step
+    prices = np.arange(count, dtype=np.float64) + 100
+    return np.column_stack(
+        [times, prices, prices + 1, prices - 1, prices, prices * 10]
+    )
+
+
+class CandleStoreTests(SimpleTestCase):
+    """Test appending and reading candles."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = CandleStore(root=tmp.name)
+
+    def test_append_partitions_by_month(self):
+        """Test candles are split into monthly partitions."""
+        written = self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 5))
+
+        self.assertEqual(written, 5)
+        self.assertEqual(
+            self.store.partitions('BTCUSDT', '1m'),
+            ['2024-01', '2024-02'],
+        )
+        candles = self.store.read('BTCUSDT', '1m')
+        self.assertEqual(
+            candles.open_time.tolist(),
+            [JAN_END + i * MINUTE for i in range(5)],
+        )
+        self.assertEqual(candles.close.tolist(), [100, 101, 102, 103, 104])
+
+    def test_append_skips_stored_candles(self):
+        """Test overlapping appends only add the newer candles."""
+        self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 3))
+
+        written = self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 6))
+
+        self.assertEqual(written, 3)
+        self.assertEqual(self.store.read('BTCUSDT', '1m').open_time.size, 6)
+        self.assertEqual(
+            self.store.last_open_time('BTCUSDT', '1m'),
+            JAN_END + 5 * MINUTE,
+        )
+
+    def test_range_read_is_zero_copy(self):
+        """Test a range inside one month is a view of the mapped file."""
+        self.store.append(
+            'BTCUSDT', '1m', make_rows(JAN_END + 2 * MINUTE, 10),
+        )
+        start = JAN_END + 4 * MINUTE
+
+        candles = self.store.read('BTCUSDT', '1m', start, start + 3 * MINUTE)
+
+        self.assertEqual(
+            candles.open_time.tolist(),
+            [start + i * MINUTE for i in range(3)],
+        )
+        self.assertIsInstance(candles.close.base, np.memmap)
+
+    def test_range_read_across_months(self):
+        """Test ranges spanning partitions are concatenated."""
+        self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 5))
+
+        candles = self.store.read(
+            'BTCUSDT', '1m', JAN_END + MINUTE, JAN_END + 4 * MINUTE,
+        )
+
+        self.assertEqual(candles.open.tolist(), [101, 102, 103])
+
+    def test_keyed_by_coin(self):
+        """Test a Coin can be used as the symbol."""
+        self.store.append(Coin(name='ETHUSDT'), '1h', make_rows(JAN_END, 2))
+
+        self.assertEqual(self.store.symbols('1h'), ['ETHUSDT'])
+        self.assertEqual(self.store.read('ETHUSDT', '1h').open_time.size, 2)
+        self.assertEqual(self.store.read('BTCUSDT', '1h').open_time.size, 0)
+
+    def test_interrupted_append_is_ignored(self):
+        """Test rows not committed to open_time are not read and replaced."""
+        self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 1))
+        partition = os.path.join(
+            self.store.symbol_path('BTCUSDT', '1m'), '2024-01',
+        )
+        with open(os.path.join(partition, 'close.bin'), 'ab') as column:
+            column.write(np.float64(999).tobytes())
+
+        self.assertEqual(self.store.read('BTCUSDT', '1m').close.tolist(), [100])
+        self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 2))
+        self.assertEqual(
+            self.store.read('BTCUSDT', '1m').close.tolist(),
+            [100, 101],
+        )
+
+    def test_invalid_input_is_rejected(self):
+        """Test unsorted rows, bad symbols and intervals raise."""
+        with self.assertRaises(ValueError):
+            self.store.append('BTCUSDT', '1m', make_rows(JAN_END, 3)[::-1])
+        with self.assertRaises(ValueError):
+            self.store.append('../etc', '1m', make_rows(JAN_END, 1))
+        with self.assertRaises(ValueError):
+            self.store.read('BTCUSDT', '7m')
+
+    def test_to_candles_columns(self):
+        """Test rows are converted to typed columns."""
+        candles = to_candles(make_rows(JAN_END, 2))
+
+        self.assertEqual(candles._fields, COLUMN_NAMES)
+        self.assertEqual(candles.open_time.dtype, np.int64)
@@ -58,4 +58,5 @@ admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Strategy)
 admin.site.register(models.Tag)
 admin.site.register(models.Indicator)
-admin.site.register(models.Dashboard)
\ No newline at end of file
+admin.site.register(models.Dashboard)
+admin.site.register(models.Job)
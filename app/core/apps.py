@@ -6,3 +6,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        #register the signal receivers
+        from core import signals  # noqa: F401
+        from django.db.backends.signals import connection_created
+
+        from core.timing import install_query_timer
+        #count and time the queries of requests ServerTimingMiddleware samples
+        connection_created.connect(install_query_timer)
@@ -0,0 +1,184 @@
+"""
+Async read-only views served through Django's async ORM.
+
+DRF views are synchronous, so these are plain Django views with an async
+get(). Under ASGI a worker keeps serving other connections while one
+waits on the database or on a slow client. The responses match the DRF
+endpoints they mirror: the same serializers and a cursor page of
+{next, previous, results}.
+"""
+import base64
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views import View
+from rest_framework import exceptions
+
+from core.layout import etag_matches, version_etag
+from core.pagination import CursorPagination
+from core.queryplan import plan_queryset
+from core.renderers import FastJSONRenderer
+from user.authentication import CachedTokenAuthentication
+
+
+def _error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+class AsyncReadView(View):
+    """
+    Base class for the async read views.
+
+    Set login_required to answer anonymous requests with 401, the token
+    is checked like CachedTokenAuthentication does and a session login
+    works as well.
+    """
+    http_method_names = ['get', 'head', 'options']
+    queryset = None
+    serializer_class = None
+    login_required = False
+
+    async def get_user(self, request):
+        """Return the authenticated user or None."""
+        header = request.headers.get('Authorization', '').split()
+        if len(header) == 2 and header[0].lower() == 'token':
+            auth = CachedTokenAuthentication()
+            try:
+                user, _ = await sync_to_async(auth.authenticate_credentials)(
+                    header[1]
+                )
+            except exceptions.AuthenticationFailed:
+                return None
+            return user
+        user = await request.auser()
+        return user if user.is_authenticated else None
+
+    def get_queryset(self, user):
+        """Return the rows visible to user."""
+        return self.queryset.all()
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    async def get(self, request, *args, **kwargs):
+        user = await self.get_user(request)
+        if self.login_required and user is None:
+            return _error('Authentication credentials were not provided.', 401)
+        request.user = user
+        serializer_class = self.get_serializer_class()
+        queryset = plan_queryset(
+            self.get_queryset(user),
+            serializer_class,
+            only_rendered=True,
+        )
+        return await self.respond(request, queryset, serializer_class, **kwargs)
+
+    def render(self, data, **kwargs):
+        """Return a JSON response encoded the way DRF encodes it."""
+        return HttpResponse(
+            FastJSONRenderer().render(data),
+            content_type='application/json',
+            **kwargs,
+        )
+
+
+class AsyncListView(AsyncReadView):
+    """
+    Keyset paginated list, ordered by a single unique field.
+
+    ?cursor= takes the opaque value from the previous page's next link and
+    ?page_size= is capped like CursorPagination.max_page_size.
+    """
+    ordering = '-id'
+
+    def _page_size(self, request):
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+        try:
+            requested = int(request.GET.get('page_size', page_size))
+        except ValueError:
+            requested = page_size
+        return max(1, min(requested, CursorPagination.max_page_size))
+
+    @staticmethod
+    def _decode_cursor(cursor, field):
+        """Return the position in cursor as a value of field."""
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        #an object or list would reach filter() and fail there with a 500
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise ValueError('Cursor position must be a scalar')
+        try:
+            return field.to_python(value)
+        except ValidationError as exc:
+            raise ValueError(exc.messages[0])
+
+    @staticmethod
+    def _encode_cursor(value):
+        return base64.urlsafe_b64encode(
+            json.dumps(value).encode('utf-8')
+        ).decode('ascii')
+
+    async def respond(self, request, queryset, serializer_class, **kwargs):
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        queryset = queryset.order_by(self.ordering)
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                position = self._decode_cursor(
+                    cursor, queryset.model._meta.get_field(field),
+                )
+            except ValueError:
+                return _error('Invalid cursor', 404)
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            queryset = queryset.filter(**{lookup: position})
+
+        page_size = self._page_size(request)
+        #one extra row tells whether there is a next page
+        rows = [obj async for obj in queryset[:page_size + 1]]
+        next_url = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            query = request.GET.copy()
+            query['cursor'] = self._encode_cursor(getattr(rows[-1], field))
+            next_url = request.build_absolute_uri(
+                f'{request.path}?{query.urlencode()}'
+            )
+
+        data = serializer_class(
+            rows, many=True, context={'request': request},
+        ).data
+        return self.render({
+            'next': next_url,
+            'previous': None,
+            'results': data,
+        })
+
+
+class AsyncDetailView(AsyncReadView):
+    """Single object by pk, with version ETags for versioned models."""
+
+    async def respond(self, request, queryset, serializer_class, pk=None):
+        try:
+            obj = await queryset.aget(pk=pk)
+        except (ObjectDoesNotExist, ValueError):
+            return _error('No %s matches the given query.'
+                          % queryset.model._meta.object_name, 404)
+
+        etag = None
+        if hasattr(obj, 'version'):
+            etag = version_etag(obj.pk, obj.version)
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match and etag_matches(if_none_match, etag):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+        data = serializer_class(obj, context={'request': request}).data
+        response = self.render(data)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
@@ -0,0 +1,51 @@
+"""
+Helpers shared by the bench_* management commands.
+"""
+import math
+import time
+
+
+class Rollback(Exception):
+    """Raised inside transaction.atomic() to discard what a benchmark wrote."""
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(durations):
+    """Summarize durations in seconds as milliseconds."""
+    count = len(durations)
+    total = sum(durations)
+    return {
+        'count': count,
+        'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'max_ms': round(max(durations, default=0.0) * 1000, 3),
+    }
+
+
+def measure(func, repeat=1):
+    """Call func repeat times and return the duration of each call."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def format_summary(name, summary):
+    """Return a one line report for a summary."""
+    return (
+        f"{name:<40} n={summary['count']:<6} "
+        f"mean={summary['mean_ms']:.3f}ms "
+        f"p50={summary['p50_ms']:.3f}ms "
+        f"p99={summary['p99_ms']:.3f}ms"
+    )
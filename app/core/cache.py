@@ -0,0 +1,224 @@
+"""
+Caches for read-mostly data.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.models import Base, Coin
+
+
+class LRUCache:
+    """Thread safe in-process LRU mapping with an optional time to live."""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it as recently used."""
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry."""
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def catalog_fingerprint():
+    """Return the count and highest id of the coins and bases."""
+    return tuple(
+        tuple(model.objects.aggregate(Count('id'), Max('id')).values())
+        for model in (Coin, Base)
+    )
+
+
+#rendered response body plus the headers needed to serve it again
+CatalogEntry = namedtuple('CatalogEntry', ['body', 'content_type', 'etag'])
+
+
+class CatalogCache:
+    """
+    Versioned cache of rendered catalog responses.
+
+    Entries are keyed by the catalog version, so invalidate() only has to
+    bump the version. When CATALOG_CACHE_ALIAS names a Django cache the
+    version and entries are shared between processes, which lets a
+    management command invalidate the cache of running web workers.
+
+    Without a shared cache, other processes (save_coins_to_db, the
+    run_jobs worker) can't reach this one's version. Every
+    CATALOG_CACHE_TTL seconds it compares catalog_fingerprint() with the
+    one its version was made from and starts a new version on change.
+    """
+    version_key = 'catalog:version'
+
+    def __init__(self, maxsize=None, alias=None, fingerprint=None):
+        self.local = LRUCache(
+            maxsize or getattr(settings, 'CATALOG_CACHE_MAXSIZE', 256)
+        )
+        self.alias = alias
+        self.fingerprint = fingerprint or catalog_fingerprint
+        self._version = self._new_version()
+        #fingerprint the local version was made from and when it was read
+        self._fingerprint = None
+        self._checked = 0.0
+
+    @staticmethod
+    def _new_version():
+        """Return a fresh (version, last modified timestamp) pair."""
+        now = time.time()
+        return (str(time.time_ns()), now)
+
+    @property
+    def shared(self):
+        """Return the shared Django cache, if one is configured."""
+        alias = self.alias or getattr(settings, 'CATALOG_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def get_version(self):
+        """Return the current (version, last modified timestamp)."""
+        shared = self.shared
+        if shared is None:
+            self._check_fingerprint()
+            return self._version
+        version = shared.get(self.version_key)
+        if version is None:
+            shared.add(self.version_key, self._version, None)
+            version = shared.get(self.version_key, self._version)
+        return tuple(version)
+
+    def _check_fingerprint(self):
+        """Start a new local version if the catalog changed elsewhere."""
+        ttl = getattr(settings, 'CATALOG_CACHE_TTL', 60)
+        now = time.monotonic()
+        if now < self._checked + ttl:
+            return
+        self._checked = now
+        fingerprint = self.fingerprint()
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            self._version = self._new_version()
+            self.local.clear()
+        self._fingerprint = fingerprint
+
+    def invalidate(self):
+        """Start a new catalog version and drop the local entries."""
+        self._version = self._new_version()
+        self._fingerprint = None
+        self._checked = 0.0
+        self.local.clear()
+        shared = self.shared
+        if shared is not None:
+            shared.set(self.version_key, self._version, None)
+
+    def get(self, key, version):
+        """Return the cached entry for key at version, or None."""
+        full_key = f'catalog:{version}:{key}'
+        entry = self.local.get(full_key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(full_key)
+            if entry is not None:
+                entry = CatalogEntry(*entry)
+                self.local.set(full_key, entry)
+        return entry
+
+    def set(self, key, version, entry):
+        """Store entry for key at version."""
+        full_key = f'catalog:{version}:{key}'
+        self.local.set(full_key, entry)
+        if self.shared is not None:
+            self.shared.set(full_key, tuple(entry))
+
+
+catalog_cache = CatalogCache()
+
+
+class CachedCatalogMixin:
+    """
+    Serve list and retrieve from the rendered bytes in catalog_cache.
+
+    Only JSON responses are cached; the browsable API is rendered as
+    usual. Responses carry ETag and Last-Modified so clients can
+    revalidate with a 304.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _render(self, request, response):
+        """Render a DRF response the same way finalize_response would."""
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        return response
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if getattr(request.accepted_renderer, 'format', None) != 'json':
+            return handler(request, *args, **kwargs)
+
+        key = f'{request.accepted_media_type}:{request.get_full_path()}'
+        version, modified = catalog_cache.get_version()
+        entry = catalog_cache.get(key, version)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = self._render(request, response).content
+            entry = CatalogEntry(
+                body,
+                response['Content-Type'],
+                quote_etag(hashlib.sha1(body).hexdigest()),
+            )
+            catalog_cache.set(key, version, entry)
+
+        response = HttpResponse(entry.body, content_type=entry.content_type)
+        response['ETag'] = entry.etag
+        response['Last-Modified'] = http_date(modified)
+        return get_conditional_response(
+            request,
+            etag=entry.etag,
+            last_modified=int(modified),
+            response=response,
+        )
@@ -0,0 +1,81 @@
+"""
+PostgreSQL backend that borrows connections from a process wide pool.
+
+Django closes connections at the end of a request (or after CONN_MAX_AGE);
+with this backend closing hands the connection back to the pool instead,
+so requests skip the TCP/auth handshake. Configure it with a POOL entry
+in the database settings, e.g.
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 30, 'PING': False,
+             'CLASS': 'core.db.pool.ConnectionPool'}
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from django.utils.module_loading import import_string
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, connect):
+    """Return the pool for alias, creating it with connect on first use."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            options = settings_dict.get('POOL') or {}
+            pool_class = import_string(
+                options.get('CLASS', 'core.db.pool.ConnectionPool')
+            )
+            pool = pool_class(
+                connect,
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 30),
+                ping=options.get('PING', False),
+            )
+            _pools[alias] = pool
+        return pool
+
+
+def get_pools():
+    """Return the pools created in this process, keyed by alias."""
+    with _pools_lock:
+        return dict(_pools)
+
+
+class PooledDatabase:
+    """Proxy of the driver module whose connect() borrows from the pool."""
+
+    def __init__(self, database, wrapper):
+        self._database = database
+        self._wrapper = wrapper
+
+    def connect(self, **conn_params):
+        wrapper = self._wrapper
+        pool = get_pool(
+            wrapper.alias,
+            wrapper.settings_dict,
+            lambda: self._database.connect(**conn_params),
+        )
+        return pool.acquire()
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Django's PostgreSQL wrapper with pooled connections."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        #get_new_connection() connects through self.Database, so the
+        #backend's own connection setup also runs for reused connections
+        self.Database = PooledDatabase(base.Database, self)
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                pool = get_pools().get(self.alias)
+                if pool is None:
+                    return self.connection.close()
+                return pool.release(self.connection)
@@ -0,0 +1,122 @@
+"""
+A small database connection pool used by the pooled PostgreSQL backend.
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread safe pool of DB-API connections.
+
+    connect() opens a new connection. Idle connections are reused last in,
+    first out and are health checked before being handed out; broken ones
+    are closed and replaced. Any object with acquire(), release() and
+    stats() can be used instead, e.g. a stand-in in tests.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=30, ping=False):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping = ping
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {'created': 0, 'reused': 0, 'discarded': 0, 'waits': 0}
+
+    def acquire(self):
+        """Return an idle connection or open a new one."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    connection = self._idle.pop()
+                    if self._healthy(connection):
+                        self._stats['reused'] += 1
+                        return connection
+                    self._discard(connection)
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise PoolTimeout(
+                        f'No connection available after {self.timeout}s'
+                    )
+
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return connection
+
+    def release(self, connection):
+        """Return a connection, resetting any open transaction."""
+        with self._cond:
+            if self._reset(connection):
+                self._idle.append(connection)
+            else:
+                self._discard(connection)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                **self._stats,
+            }
+
+    def _healthy(self, connection):
+        if getattr(connection, 'closed', False):
+            return False
+        if not self.ping:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, connection):
+        """Roll back unfinished work, return False if unusable."""
+        if getattr(connection, 'closed', False):
+            return False
+        try:
+            #psycopg2 reports 0 (idle) when no transaction is open
+            info = getattr(connection, 'info', None)
+            if info is None or getattr(info, 'transaction_status', 0) != 0:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        self._size -= 1
+        self._stats['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
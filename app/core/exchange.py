@@ -0,0 +1,169 @@
+"""
+Sources for the exchange listing used to seed the coin catalog.
+"""
+import gzip
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+#only these keys are kept per symbol in a snapshot
+SNAPSHOT_FIELDS = ('symbol', 'status', 'baseAsset', 'quoteAsset')
+
+
+class ExchangeInfoSource:
+    """Base class for providers of Binance style exchange info."""
+
+    def get_exchange_info(self):
+        """Return a dict with a 'symbols' list."""
+        raise NotImplementedError
+
+
+class BinanceSource(ExchangeInfoSource):
+    """Fetch the live listing through python-binance."""
+
+    def get_exchange_info(self):
+        #imported here so offline sources work without the client
+        from binance.client import Client
+        return Client().get_exchange_info()
+
+    def __str__(self):
+        return 'binance'
+
+
+class SnapshotSource(ExchangeInfoSource):
+    """Read a JSON snapshot from disk, gzip compressed if it ends in .gz."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_exchange_info(self):
+        opener = gzip.open if str(self.path).endswith('.gz') else open
+        with opener(self.path, 'rt', encoding='utf-8') as snapshot:
+            return json.load(snapshot)
+
+    def __str__(self):
+        return f'snapshot:{self.path}'
+
+
+class HTTPSource(ExchangeInfoSource):
+    """Fetch the listing from a URL, e.g. a local ExchangeInfoServer."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def get_exchange_info(self):
+        request = Request(self.url, headers={'Accept-Encoding': 'gzip'})
+        with urlopen(request, timeout=self.timeout) as response:
+            body = response.read()
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+        return json.loads(body)
+
+    def __str__(self):
+        return self.url
+
+
+def get_source(spec):
+    """
+    Return the source described by spec.
+
+    'binance' is the live API, 'http://...' or 'https://...' a URL and
+    'snapshot:<path>' (or just an existing path) a snapshot file.
+    """
+    if spec == 'binance':
+        return BinanceSource()
+    if spec.startswith(('http://', 'https://')):
+        return HTTPSource(spec)
+    if spec.startswith('snapshot:'):
+        return SnapshotSource(spec[len('snapshot:'):])
+    if os.path.exists(spec):
+        return SnapshotSource(spec)
+    raise ValueError(f'Unknown exchange info source: {spec}')
+
+
+def compact_exchange_info(exchange_info):
+    """Strip exchange info down to the fields the catalog needs."""
+    return {
+        'serverTime': exchange_info.get('serverTime'),
+        'symbols': [
+            {key: s[key] for key in SNAPSHOT_FIELDS if key in s}
+            for s in exchange_info['symbols']
+        ],
+    }
+
+
+def write_snapshot(exchange_info, path):
+    """Atomically write a compact, gzip compressed snapshot to path."""
+    data = json.dumps(
+        compact_exchange_info(exchange_info),
+        separators=(',', ':'),
+    ).encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(gzip.compress(data) if str(path).endswith('.gz') else data)
+    os.replace(tmp_path, path)
+
+
+class ExchangeInfoServer(ThreadingHTTPServer):
+    """
+    Local HTTP stand-in for the exchange info endpoint.
+
+    Serves exchange_info at /api/v3/exchangeInfo from a background
+    thread, use port 0 to pick a free port.
+    """
+    path = '/api/v3/exchangeInfo'
+
+    def __init__(self, exchange_info, host='127.0.0.1', port=0):
+        self.body = json.dumps(exchange_info).encode('utf-8')
+        super().__init__((host, port), _ExchangeInfoHandler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{self.path}'
+
+    def start(self):
+        """Serve requests from a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _ExchangeInfoHandler(BaseHTTPRequestHandler):
+    """Request handler for ExchangeInfoServer."""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != self.server.path:
+            self.send_error(404)
+            return
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        #keep test and command output quiet
+        pass
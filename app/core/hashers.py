@@ -0,0 +1,61 @@
+"""
+Password hashers whose cost is read from settings.
+
+The algorithm names match Django's own hashers, so hashes made by either
+verify with both. Django rehashes a password on login when must_update()
+reports that the stored cost differs from the configured one, so changing
+a cost setting upgrades users as they log in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with PASSWORD_ARGON2_* costs."""
+
+    @property
+    def time_cost(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_TIME_COST',
+            hashers.Argon2PasswordHasher.time_cost,
+        )
+
+    @property
+    def memory_cost(self):
+        """Memory in KiB."""
+        return getattr(
+            settings, 'PASSWORD_ARGON2_MEMORY_COST',
+            hashers.Argon2PasswordHasher.memory_cost,
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_PARALLELISM',
+            hashers.Argon2PasswordHasher.parallelism,
+        )
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt with PASSWORD_BCRYPT_ROUNDS rounds (log2)."""
+
+    @property
+    def rounds(self):
+        return getattr(
+            settings, 'PASSWORD_BCRYPT_ROUNDS',
+            hashers.BCryptSHA256PasswordHasher.rounds,
+        )
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations.
+
+    Without the setting, or with it None, Django's default is used.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or (
+            hashers.PBKDF2PasswordHasher.iterations
+        )
@@ -0,0 +1,355 @@
+"""
+JSON layout fields, versioned ETags and in-place patching of dashboard
+and grid layouts.
+"""
+import json
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core.parsers import FastJSONParser
+
+
+class LayoutField(serializers.JSONField):
+    """
+    JSON field that also accepts a JSON encoded string.
+
+    Layouts used to be TextFields holding JSON text, so clients that still
+    send the encoded string get it stored as the decoded value.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                pass
+        return super().to_internal_value(data)
+
+
+class JSONPatchParser(FastJSONParser):
+    """Parser for RFC 6902 JSON Patch documents."""
+    media_type = 'application/json-patch+json'
+
+
+class MergePatchParser(FastJSONParser):
+    """Parser for RFC 7396 JSON Merge Patch documents."""
+    media_type = 'application/merge-patch+json'
+
+
+class JSONPatchError(ValueError):
+    """Raised when a JSON Patch operation can't be applied."""
+
+
+class JSONPatchTestFailed(JSONPatchError):
+    """Raised when a JSON Patch 'test' operation does not match."""
+
+
+class PatchConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The patch test operation failed.'
+    default_code = 'conflict'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource was changed by another request.'
+    default_code = 'precondition_failed'
+
+
+def version_etag(pk, version):
+    """Return the ETag for a versioned row."""
+    return quote_etag(f'{pk}-{version}')
+
+
+def etag_matches(header, etag):
+    """Return True if an If-Match/If-None-Match header matches etag."""
+    etags = {
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(header)
+    }
+    return '*' in etags or etag in etags
+
+
+class VersionedETagMixin:
+    """
+    ETags from the model version for a VersionedModel viewset.
+
+    Retrieve sends an ETag and answers a matching If-None-Match with 304
+    after reading just the version column. Writes lock the row and fail
+    with 412 if If-Match doesn't name the current version, so concurrent
+    editors can't silently overwrite each other.
+    """
+
+    def _lookup_kwargs(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def get_object(self):
+        """Return the object, locked and If-Match checked for writes."""
+        queryset = self.filter_queryset(self.get_queryset())
+        write = self.request.method not in SAFE_METHODS
+        if write:
+            queryset = queryset.select_for_update()
+        obj = get_object_or_404(queryset, **self._lookup_kwargs())
+        self.check_object_permissions(self.request, obj)
+
+        if_match = self.request.META.get('HTTP_IF_MATCH')
+        if write and if_match is not None:
+            if not etag_matches(if_match, version_etag(obj.pk, obj.version)):
+                raise PreconditionFailed()
+        return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            #compare against the version column before loading the layouts
+            row = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**self._lookup_kwargs())
+                .values_list('pk', 'version')
+                .first()
+            )
+            etag = version_etag(*row) if row is not None else None
+            if etag is not None and etag_matches(if_none_match, etag):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': etag},
+                )
+
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        response['ETag'] = version_etag(instance.pk, instance.version)
+        return response
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+        response['ETag'] = version_etag(
+            response.data['id'],
+            response.data['version'],
+        )
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+
+def _parse_pointer(pointer):
+    """Split a JSON Pointer into its unescaped reference tokens."""
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JSONPatchError(f'Invalid JSON pointer: {pointer!r}')
+    return [
+        token.replace('~1', '/').replace('~0', '~')
+        for token in pointer[1:].split('/')
+    ]
+
+
+def _resolve(document, tokens):
+    """Return the container holding tokens[-1] and the final key."""
+    container = document
+    for token in tokens[:-1]:
+        container = _child(container, token)
+    key = tokens[-1]
+    if isinstance(container, list):
+        if key == '-':
+            return container, key
+        key = _index(key)
+    elif not isinstance(container, dict):
+        raise JSONPatchError(f'Cannot reference {key!r} in a scalar')
+    return container, key
+
+
+def _index(token):
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise JSONPatchError(f'Invalid array index: {token!r}')
+    return int(token)
+
+
+def _child(container, token):
+    try:
+        if isinstance(container, list):
+            return container[_index(token)]
+        if isinstance(container, dict):
+            return container[token]
+    except (IndexError, KeyError):
+        pass
+    raise JSONPatchError(f'Path segment {token!r} does not exist')
+
+
+def _get(document, tokens):
+    value = document
+    for token in tokens:
+        value = _child(value, token)
+    return value
+
+
+def _add(document, tokens, value):
+    container, key = _resolve(document, tokens)
+    if isinstance(container, list):
+        if key == '-':
+            container.append(value)
+        elif key > len(container):
+            raise JSONPatchError(f'Array index {key} out of range')
+        else:
+            container.insert(key, value)
+    else:
+        container[key] = value
+
+
+def _remove(document, tokens):
+    container, key = _resolve(document, tokens)
+    try:
+        return container.pop(key)
+    except (IndexError, KeyError, TypeError):
+        raise JSONPatchError(f'Path {"/".join(tokens)!r} does not exist')
+
+
+def apply_json_patch(document, operations):
+    """
+    Apply RFC 6902 operations to document in place.
+
+    The document root itself can't be replaced, every path must point
+    inside it. Returns the set of top-level keys that were touched.
+    """
+    if not isinstance(operations, list):
+        raise JSONPatchError('A JSON Patch must be a list of operations')
+    touched = set()
+    for operation in operations:
+        try:
+            op = operation['op']
+            tokens = _parse_pointer(operation['path'])
+        except (KeyError, TypeError):
+            raise JSONPatchError('Operations need an op and a path')
+        if not tokens:
+            raise JSONPatchError('Patching the document root is not supported')
+        touched.add(tokens[0])
+
+        if op == 'add':
+            _add(document, tokens, operation.get('value'))
+        elif op == 'remove':
+            _remove(document, tokens)
+        elif op == 'replace':
+            _remove(document, tokens)
+            _add(document, tokens, operation.get('value'))
+        elif op in ('move', 'copy'):
+            source = _parse_pointer(operation.get('from', ''))
+            if not source:
+                raise JSONPatchError(f'{op} needs a from path')
+            if op == 'move':
+                touched.add(source[0])
+                value = _remove(document, source)
+            else:
+                value = json.loads(json.dumps(_get(document, source)))
+            _add(document, tokens, value)
+        elif op == 'test':
+            if _get(document, tokens) != operation.get('value'):
+                raise JSONPatchTestFailed(
+                    f'Test failed for {operation["path"]!r}'
+                )
+        else:
+            raise JSONPatchError(f'Unknown operation: {op!r}')
+    return touched
+
+
+def apply_merge_patch(target, patch):
+    """Return target with an RFC 7396 merge patch applied."""
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
+
+
+class LayoutPatchMixin(VersionedETagMixin):
+    """
+    Add PATCH {detail}/layout/ for applying small deltas to layout fields.
+
+    The body is either a JSON Patch (a list of operations, paths start
+    with the field name, e.g. /gridConfig/0/x) or a merge patch (an object
+    keyed by field name). Only the touched fields are written back.
+    """
+    layout_fields = ()
+
+    @action(
+        detail=True,
+        methods=['patch'],
+        url_path='layout',
+        url_name='layout',
+        parser_classes=[JSONPatchParser, MergePatchParser, FastJSONParser],
+    )
+    def layout(self, request, *args, **kwargs):
+        """Apply a JSON Patch or merge patch to the layout fields."""
+        with transaction.atomic():
+            #get_object locks the row, so concurrent patches apply one
+            #after another, and checks If-Match
+            instance = self.get_object()
+
+            document = {
+                field: getattr(instance, field) for field in self.layout_fields
+            }
+            touched = self._apply_patch(request, document)
+
+            unknown = touched - set(self.layout_fields)
+            missing = [
+                field for field in touched
+                if document.get(field) is None
+            ]
+            if unknown or missing:
+                raise ValidationError({
+                    'patch': f'Only {", ".join(self.layout_fields)} can be '
+                             f'patched and they can not be removed.',
+                })
+
+            for field in touched:
+                setattr(instance, field, document[field])
+            instance.save(update_fields=sorted(touched))
+
+        return Response(
+            {
+                'id': instance.pk,
+                'version': instance.version,
+                'updated': sorted(touched),
+            },
+            headers={'ETag': version_etag(instance.pk, instance.version)},
+        )
+
+    def _apply_patch(self, request, document):
+        """Apply the request body to document, return the touched fields."""
+        patch = request.data
+        media_type = request.content_type.split(';')[0].strip()
+        use_json_patch = (
+            media_type == JSONPatchParser.media_type
+            or (media_type != MergePatchParser.media_type
+                and isinstance(patch, list))
+        )
+        if use_json_patch:
+            try:
+                return apply_json_patch(document, patch)
+            except JSONPatchTestFailed as exc:
+                raise PatchConflict(str(exc))
+            except JSONPatchError as exc:
+                raise ValidationError({'patch': str(exc)})
+
+        if not isinstance(patch, dict):
+            raise ValidationError({'patch': 'A merge patch must be an object.'})
+        for field, value in patch.items():
+            if field in document and value is not None:
+                document[field] = apply_merge_patch(document[field], value)
+            else:
+                document[field] = None
+        return set(patch)
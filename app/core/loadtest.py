@@ -0,0 +1,127 @@
+"""
+Minimal asyncio HTTP/1.1 load generator for the bench_* commands.
+
+Every client keeps its connection alive and sends its requests one after
+another, so concurrency is the number of open connections, which is what
+separates a thread per request WSGI worker from an ASGI one.
+"""
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+
+
+class LoadError(Exception):
+    """Raised for malformed responses."""
+
+
+async def _read_response(reader):
+    """Read one response and return (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise LoadError('Connection closed by server')
+    parts = status_line.decode('latin-1').split()
+    if len(parts) < 2:
+        raise LoadError(f'Bad status line: {status_line!r}')
+    status = int(parts[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif status not in (204, 304):
+        await reader.read()
+        return status, False
+    connection = headers.get('connection', '').lower()
+    if parts[0] == 'HTTP/1.0':
+        return status, connection == 'keep-alive'
+    return status, connection != 'close'
+
+
+async def _client(url, headers, count, durations, statuses, timeout):
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    request = ''.join(
+        [f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n']
+        + [f'{name}: {value}\r\n' for name, value in headers.items()]
+        + ['\r\n']
+    ).encode('latin-1')
+
+    writer = None
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        parts.hostname, port,
+                        ssl=parts.scheme == 'https' or None,
+                    ),
+                    timeout,
+                )
+                sock = writer.get_extra_info('socket')
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                _read_response(reader), timeout,
+            )
+            durations.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_load_async(url, requests, concurrency, headers=None,
+                         timeout=30):
+    """Send requests GETs to url over concurrency connections."""
+    headers = {'Connection': 'keep-alive', **(headers or {})}
+    durations = []
+    statuses = {}
+    per_client, extra = divmod(requests, concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            _client(
+                url, headers, per_client + (i < extra),
+                durations, statuses, timeout,
+            )
+            for i in range(concurrency)
+        ),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        'durations': durations,
+        'statuses': statuses,
+        'errors': [r for r in results if isinstance(r, Exception)],
+        'elapsed': elapsed,
+        'rps': len(durations) / elapsed if elapsed else 0.0,
+    }
+
+
+def run_load(url, requests, concurrency, headers=None, timeout=30):
+    """Blocking wrapper around run_load_async."""
+    return asyncio.run(
+        run_load_async(url, requests, concurrency, headers, timeout)
+    )
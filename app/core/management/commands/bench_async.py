@@ -0,0 +1,71 @@
+"""
+Django command to compare concurrent connection throughput of running
+WSGI and ASGI deployments.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import format_summary, summarize
+from core.loadtest import run_load
+
+
+class Command(BaseCommand):
+    """
+    Load test URLs served by already running servers, e.g.
+
+        gunicorn app.wsgi -w 2 -b :8000
+        gunicorn app.asgi:application -k uvicorn.workers.UvicornWorker \\
+            -w 2 -b :8001
+        manage.py bench_async \\
+            wsgi=http://127.0.0.1:8000/api/strategy/coins/ \\
+            asgi=http://127.0.0.1:8001/api/async/strategy/coins/
+    """
+    help = 'Compare throughput of endpoints at several concurrency levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='+',
+            help='label=url pairs to load test',
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            action='append',
+            help='Open connections, repeat for several (default: 1 10 100)',
+        )
+        parser.add_argument('--token', help='Auth token for private endpoints')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        targets = []
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep or not url.startswith(('http://', 'https://')):
+                raise CommandError(f'Expected label=url, got {target!r}')
+            targets.append((label, url))
+
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        for concurrency in options['concurrency'] or [1, 10, 100]:
+            for label, url in targets:
+                result = run_load(
+                    url,
+                    options['requests'],
+                    concurrency,
+                    headers=headers,
+                    timeout=options['timeout'],
+                )
+                summary = summarize(result['durations'])
+                self.stdout.write(
+                    f'{format_summary(f"{label} c={concurrency}", summary)} '
+                    f'{result["rps"]:.1f} req/s '
+                    f'statuses={result["statuses"]}'
+                )
+                for error in result['errors'][:3]:
+                    self.stdout.write(self.style.WARNING(
+                        f'  {label}: {error!r}'
+                    ))
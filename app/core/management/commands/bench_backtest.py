@@ -0,0 +1,123 @@
+"""
+Django command to benchmark the vectorized backtester on synthetic candles.
+"""
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from candles.store import INTERVALS, Candles, CandleStore
+from strategy.backtest import InvalidRules, parse_rules, run_backtest
+
+DEFAULT_RULES = {
+    'entry': [{'left': 'EMA(50)', 'op': 'crosses_above', 'right': 'EMA(200)'}],
+    'exit': [{'left': 'RSI(14)', 'op': '>', 'right': 75}],
+    'fee': 0.001,
+}
+#2021-01-01, any fixed start keeps the runs comparable
+START_MS = 1609459200000
+
+
+def random_walk(size, interval, seed):
+    """Return size candles of a geometric random walk."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, size)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, size)) * close
+    return Candles(
+        open_time=START_MS + np.arange(size, dtype=np.int64) * INTERVALS[interval],
+        open=open_,
+        high=np.maximum(open_, close) + spread,
+        low=np.minimum(open_, close) - spread,
+        close=close,
+        volume=rng.uniform(1, 100, size),
+    )
+
+
+class Command(BaseCommand):
+    """
+    Backtest rules over random walk candles for many coins, e.g.
+
+        manage.py bench_backtest --coins 50 --years 5 --interval 1m
+
+    The candles are written to a temporary CandleStore one coin at a time,
+    then the backtest reads them back from it like in production, with 1,
+    2, 4... threads after a first run that warms the caches.
+    """
+    help = 'Benchmark backtests of a strategy over synthetic candles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--coins', type=int, default=50)
+        parser.add_argument('--years', type=float, default=5)
+        parser.add_argument(
+            '--interval',
+            default='1m',
+            choices=list(INTERVALS),
+        )
+        parser.add_argument(
+            '--rules',
+            help='Rules as JSON (default: EMA cross entry, RSI exit)',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--threads',
+            type=int,
+            action='append',
+            help='Threads, repeat for several '
+                 '(default: powers of two up to the CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            rules = json.loads(options['rules']) if options['rules'] else (
+                DEFAULT_RULES
+            )
+            parse_rules(rules)
+        except (ValueError, InvalidRules) as exc:
+            raise CommandError(f'Invalid rules: {exc}')
+
+        interval = options['interval']
+        size = int(options['years'] * 365 * 86_400_000 / INTERVALS[interval])
+        symbols = [f'COIN{i}' for i in range(options['coins'])]
+        threads = options['threads'] or [
+            2 ** i for i in range((os.cpu_count() or 1).bit_length())
+        ]
+
+        with tempfile.TemporaryDirectory() as root:
+            store = CandleStore(root)
+            began = time.perf_counter()
+            for i, symbol in enumerate(symbols):
+                candles = random_walk(size, interval, options['seed'] + i)
+                store.append(symbol, interval, np.column_stack(candles))
+            self.stdout.write(
+                f'{len(symbols)} coins x {size} {interval} candles, '
+                f'generated in {time.perf_counter() - began:.2f}s'
+            )
+
+            #untimed, so every run finds the page cache and the threads'
+            #memory already warm
+            run_backtest(
+                rules, symbols, interval, store=store, threads=max(threads),
+            )
+            for count in threads:
+                began = time.perf_counter()
+                result = run_backtest(
+                    rules, symbols, interval, store=store, threads=count,
+                )
+                elapsed = time.perf_counter() - began
+                self.stdout.write(
+                    f'threads={count:<3} {elapsed:.2f}s '
+                    f'({size * len(symbols) / elapsed / 1e6:.1f}M candles/s)'
+                )
+
+        stats = result['stats']
+        self.stdout.write(
+            f'trades={stats["trades"]} '
+            f'total_return={stats["total_return"]:.4f} '
+            f'max_drawdown={stats["max_drawdown"]:.4f} '
+            f'sharpe={stats["sharpe"]:.2f}'
+        )
@@ -0,0 +1,109 @@
+"""
+Django command to load test a small endpoint with and without connection
+reuse.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import format_summary, measure, summarize
+from core.db.backends.pooled_postgresql.base import get_pools
+
+
+class Command(BaseCommand):
+    """
+    Time requests to /api/user/me/ the way a web worker serves them.
+
+    Connections are recycled after every request like the request_finished
+    signal does, once with CONN_MAX_AGE=0 and once with persistent
+    connections. Run it with DB_POOL=0 and DB_POOL=1 to compare pooling.
+    """
+    help = 'Load test /api/user/me/ with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--path', default='/api/user/me/')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--max-age', type=int, default=600)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.create_user(
+            email='bench-connections@example.com',
+            password='bench-connections',
+        )
+        token = Token.objects.create(user=user)
+        self.stdout.write(
+            f"Engine: {connection.settings_dict['ENGINE']}, "
+            f"{options['concurrency']} clients"
+        )
+        original_max_age = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for label, max_age in (
+                ('per request', 0),
+                ('persistent', options['max_age']),
+            ):
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                durations = self._load(token.key, options)
+                self.stdout.write(format_summary(
+                    f'{options["path"]} ({label})', summarize(durations),
+                ))
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+            connections.close_all()
+            user.delete()
+
+        for alias, pool in get_pools().items():
+            self.stdout.write(f'Pool {alias}: {pool.stats()}')
+
+    def _load(self, key, options):
+        """Spread the requests over concurrent clients."""
+        durations = []
+        errors = []
+        lock = threading.Lock()
+        per_client, extra = divmod(options['requests'], options['concurrency'])
+
+        def client(count):
+            browser = Client(
+                HTTP_AUTHORIZATION=f'Token {key}',
+                HTTP_HOST=options['host'],
+            )
+
+            def request():
+                #the test client skips the request signals, so recycle
+                #connections by hand like a finished request would
+                close_old_connections()
+                response = browser.get(options['path'])
+                close_old_connections()
+                if response.status_code != 200:
+                    raise RuntimeError(
+                        f'{options["path"]} returned {response.status_code}'
+                    )
+
+            try:
+                times = measure(request, repeat=count)
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+                return
+            finally:
+                connections.close_all()
+            with lock:
+                durations.extend(times)
+
+        threads = [
+            threading.Thread(target=client, args=(per_client + (i < extra),))
+            for i in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise CommandError(str(errors[0]))
+        return durations
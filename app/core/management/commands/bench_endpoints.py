@@ -0,0 +1,262 @@
+"""
+Django command to benchmark every router endpoint on a seeded dataset.
+"""
+import json
+import platform
+import time
+from importlib import import_module
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.benchmark import Rollback, format_summary, summarize
+from core.models import Strategy
+from core.seed import (
+    DEFAULT_COUNTS,
+    DEFAULT_LAYOUT_BYTES,
+    RULES,
+    Seeder,
+    make_layout,
+)
+
+#url modules whose routers are benchmarked
+URL_MODULES = ('strategy.urls', 'dashboard.urls', 'grid.urls', 'jobs.urls')
+ACTIONS = ('list', 'create', 'retrieve', 'update')
+
+
+def router_endpoints():
+    """Return (namespace, basename, viewset) of the registered viewsets."""
+    endpoints = []
+    for module_name in URL_MODULES:
+        module = import_module(module_name)
+        for prefix, viewset, basename in module.router.registry:
+            endpoints.append((module.app_name, basename, viewset))
+    return endpoints
+
+
+def compare(baseline, results, threshold):
+    """Return lines describing endpoints that got slower or chattier."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None or result['status'] != before['status']:
+            continue
+        old, new = before['p50_ms'], result['p50_ms']
+        if old and new > old * (1 + threshold):
+            regressions.append(f'{name}: p50 {old:.3f}ms -> {new:.3f}ms')
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f"{name}: {before['queries']} -> {result['queries']} queries"
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    """
+    Seed a large dataset and time list, create, retrieve and update of
+    every router endpoint, with query counts, into a JSON baseline.
+
+    The data is rolled back afterwards unless --keep is given. Compare a
+    run against an earlier baseline with --compare; the command fails
+    when an endpoint's p50 grew by more than --threshold or it makes
+    more queries.
+    """
+    help = 'Benchmark the router endpoints on a seeded dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier for the seeded row counts.',
+        )
+        parser.add_argument(
+            '--layout-kb', type=int, default=DEFAULT_LAYOUT_BYTES // 1024,
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', default='bench_endpoints.json')
+        parser.add_argument('--compare')
+        parser.add_argument('--threshold', type=float, default=0.25)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Commit the seeded data instead of rolling it back.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        counts = {
+            name: max(1, int(count * options['scale']))
+            for name, count in DEFAULT_COUNTS.items()
+        }
+        layout_bytes = options['layout_kb'] * 1024
+
+        try:
+            #seeded rows and everything the endpoints wrote go at the end,
+            #and Server-Timing sampling would log every request
+            with transaction.atomic(), \
+                    override_settings(SERVER_TIMING_SAMPLE_RATE=0):
+                results = self._run(counts, layout_bytes, options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'counts': counts,
+                'layout_bytes': layout_bytes,
+                'repeat': options['repeat'],
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(baseline, results, options['threshold'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(line))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions')
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def _run(self, counts, layout_bytes, options):
+        seeder = Seeder(
+            counts=counts,
+            layout_bytes=layout_bytes,
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        seeded = seeder.seed()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        user = get_user_model().objects.get(pk=seeded['users'][0])
+        client = APIClient()
+        client.force_authenticate(user)
+        self.payloads = Payloads(
+            user, seeded['coins'], make_layout(layout_bytes, seeder.rng),
+        )
+
+        results = {}
+        for namespace, basename, viewset in router_endpoints():
+            created = None
+            for action in ACTIONS:
+                if not hasattr(viewset, action):
+                    continue
+                name = f'{namespace}:{basename}-{action}'
+                result = self._measure(
+                    client, namespace, basename, viewset, action, created,
+                    options,
+                )
+                if result is None:
+                    continue
+                result, created = result
+                results[name] = result
+                self.stdout.write(format_summary(name, result) + (
+                    f" queries={result['queries']} status={result['status']}"
+                ))
+        return results
+
+    def _measure(self, client, namespace, basename, viewset, action,
+                 created, options):
+        """Time one action, return its result and the object it created."""
+        model = viewset.queryset.model
+        if action == 'list':
+            url = reverse(f'{namespace}:{basename}-list')
+        elif action == 'create':
+            url = reverse(f'{namespace}:{basename}-list')
+        else:
+            pk = self.payloads.existing(model) or created
+            if pk is None:
+                return None
+            url = reverse(f'{namespace}:{basename}-detail', args=[pk])
+
+        def request(i):
+            if action in ('list', 'retrieve'):
+                return client.get(url, HTTP_HOST=options['host'])
+            data = self.payloads.make(basename, i)
+            method = client.post if action == 'create' else client.put
+            return method(
+                url, data, format='json', HTTP_HOST=options['host'],
+            )
+
+        #a first untimed call warms up caches and connections
+        res = request(0)
+        durations = []
+        queries = 0
+        size = 0
+        for i in range(1, options['repeat'] + 1):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                res = request(i)
+                durations.append(time.perf_counter() - start)
+            queries = max(queries, len(captured.captured_queries))
+            size = len(res.content)
+
+        result = summarize(durations)
+        result.update(queries=queries, bytes=size, status=res.status_code)
+        if action == 'create' and res.status_code == 201:
+            created = res.json()['id']
+        return result, created
+
+
+class Payloads:
+    """Request bodies of the benchmarked endpoints, by router basename."""
+
+    def __init__(self, user, coins, layout):
+        self.user = user
+        self.coins = coins
+        self.layout = layout
+
+    def existing(self, model):
+        """Return the pk of a seeded row the user can see, or None."""
+        queryset = model.objects.order_by('pk')
+        if any(field.name == 'user' for field in model._meta.fields):
+            queryset = queryset.filter(user=self.user)
+        return queryset.values_list('pk', flat=True).first()
+
+    def make(self, basename, i):
+        if basename == 'strategy':
+            return {
+                'base': self.coins[i % len(self.coins)],
+                'coins': self.coins[i:i + 3] or self.coins[:3],
+                'tags': [{'name': 'Bench tag 0'}, {'name': f'Bench run {i}'}],
+                'indicators': [{'name': 'SMA(20)'}],
+                'description': f'Bench strategy run {i}',
+                'rules': RULES,
+            }
+        if basename in ('tag', 'indicator'):
+            return {'name': f'Bench {basename} run {i}'}
+        if basename == 'dashboard':
+            return {
+                'gridConfig': self.layout,
+                'description': f'Bench dashboard run {i}',
+            }
+        if basename == 'grid':
+            return {
+                'gridConfig': self.layout,
+                'description': f'Bench grid run {i}',
+                'user': self.user.pk,
+            }
+        if basename == 'job':
+            strategy = self.existing(Strategy)
+            return {'kind': 'backtest', 'params': {'strategy': strategy}}
+        if basename in ('coin', 'base'):
+            return {'name': f'BENCHRUN{i}USDT'}
+        raise CommandError(f'No payload for {basename}')
@@ -0,0 +1,76 @@
+"""
+Django command to benchmark login throughput per password hasher.
+"""
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.benchmark import format_summary, measure, summarize
+
+HASHERS = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2_sha256': 'core.hashers.PBKDF2PasswordHasher',
+    'md5': 'django.contrib.auth.hashers.MD5PasswordHasher',
+}
+
+
+class Command(BaseCommand):
+    """
+    Time the password check behind every login for each hasher.
+
+    The costs come from the PASSWORD_* settings unless overridden here,
+    so candidate costs can be compared before changing the environment.
+    """
+    help = 'Benchmark password checks per hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--hasher',
+            action='append',
+            dest='hashers',
+            choices=sorted(HASHERS),
+            help='Hasher to benchmark, repeat for several (default: all)',
+        )
+        parser.add_argument('--argon2-time-cost', type=int)
+        parser.add_argument('--argon2-memory-cost', type=int)
+        parser.add_argument('--argon2-parallelism', type=int)
+        parser.add_argument('--bcrypt-rounds', type=int)
+        parser.add_argument('--pbkdf2-iterations', type=int)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        overrides = {
+            setting: options[option]
+            for setting, option in (
+                ('PASSWORD_ARGON2_TIME_COST', 'argon2_time_cost'),
+                ('PASSWORD_ARGON2_MEMORY_COST', 'argon2_memory_cost'),
+                ('PASSWORD_ARGON2_PARALLELISM', 'argon2_parallelism'),
+                ('PASSWORD_BCRYPT_ROUNDS', 'bcrypt_rounds'),
+                ('PASSWORD_PBKDF2_ITERATIONS', 'pbkdf2_iterations'),
+            )
+            if options[option] is not None
+        }
+        names = options['hashers'] or list(HASHERS)
+        with override_settings(
+            PASSWORD_HASHERS=[HASHERS[name] for name in names],
+            **overrides,
+        ):
+            for name in names:
+                self._report(name, options['repeat'])
+
+    def _report(self, name, repeat):
+        try:
+            hasher = get_hasher(name)
+            encoded = hasher.encode('bench-password', hasher.salt())
+        except ValueError as exc:
+            #argon2-cffi or bcrypt is not installed
+            raise CommandError(f'{name}: {exc}')
+        summary = summarize(
+            measure(lambda: hasher.verify('bench-password', encoded), repeat)
+        )
+        per_second = 1000 / summary['mean_ms'] if summary['mean_ms'] else 0
+        self.stdout.write(
+            f'{format_summary(name, summary)} {per_second:.1f} logins/s'
+        )
@@ -0,0 +1,93 @@
+"""
+Django command to benchmark JSON rendering and parsing of API payloads.
+"""
+import io
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmark import Rollback, format_summary, measure, summarize
+from core.models import Coin, Dashboard
+from core.parsers import FastJSONParser, orjson
+from core.renderers import FastJSONRenderer
+from core.seed import make_layout
+from dashboard.serializers import DashboardSerializer
+from strategy.serializers import CoinSerializer
+
+
+class Command(BaseCommand):
+    """
+    Time DRF's stdlib JSON against the orjson renderer and parser.
+
+    The payloads are what the dashboard detail and coin list endpoints
+    send: a dashboard with a large gridConfig and a page of coins, made
+    by the real serializers from rows that are rolled back afterwards.
+    """
+    help = 'Benchmark JSON rendering and parsing of dashboards and coins'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layout-kb', type=int, default=2048)
+        parser.add_argument('--coins', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson is not installed, the fast classes use the stdlib'
+            ))
+        try:
+            with transaction.atomic():
+                payloads = self._payloads(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name, data in payloads.items():
+            self._compare(name, data, options['repeat'])
+
+    def _payloads(self, options):
+        user = get_user_model().objects.create_user(
+            email='bench-json@example.com',
+        )
+        layout = make_layout(options['layout_kb'] * 1024, random.Random(0))
+        dashboard = Dashboard.objects.create(
+            user=user,
+            gridConfig=layout,
+            description='Bench dashboard',
+        )
+        coins = Coin.objects.bulk_create(
+            (Coin(name=f'BENCHJSON{i}USDT') for i in range(options['coins'])),
+            batch_size=5000,
+        )
+        return {
+            'dashboard detail': DashboardSerializer(dashboard).data,
+            'coin list': CoinSerializer(coins, many=True).data,
+        }
+
+    def _compare(self, name, data, repeat):
+        body = JSONRenderer().render(data)
+        self.stdout.write(f'{name}: {len(body) / 1024:.0f} KB')
+        for label, renderer in (
+            ('stdlib', JSONRenderer()),
+            ('orjson', FastJSONRenderer()),
+        ):
+            self.stdout.write(format_summary(
+                f'  render {label}',
+                summarize(measure(lambda: renderer.render(data), repeat)),
+            ))
+        for label, parser in (
+            ('stdlib', JSONParser()),
+            ('orjson', FastJSONParser()),
+        ):
+            self.stdout.write(format_summary(
+                f'  parse {label}',
+                summarize(measure(
+                    lambda: parser.parse(io.BytesIO(body), None, {}),
+                    repeat,
+                )),
+            ))
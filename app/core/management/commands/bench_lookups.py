@@ -0,0 +1,94 @@
+"""
+Django command to benchmark the name lookups behind get_or_create.
+"""
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import NotSupportedError, connection, models, transaction
+
+from core.benchmark import Rollback, format_summary, measure, summarize
+from core.models import Coin, Tag
+
+
+class Command(BaseCommand):
+    """Time coin and tag lookups with and without the unique indexes."""
+    help = 'Benchmark name lookups before and after the unique indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--lookups', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            #seeded rows and dropped indexes are rolled back at the end
+            with transaction.atomic():
+                self._run(options['rows'], options['lookups'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, rows, lookups):
+        self.stdout.write(f'Seeding {rows} coins and tags...')
+        user = get_user_model().objects.create_user(
+            email='bench-lookups@example.com',
+        )
+        Coin.objects.bulk_create(
+            (Coin(name=f'BENCH{i}USDT') for i in range(rows)),
+            batch_size=5000,
+        )
+        Tag.objects.bulk_create(
+            (Tag(user=user, name=f'Bench tag {i}') for i in range(rows)),
+            batch_size=5000,
+        )
+        self._analyze()
+        sample = random.sample(range(rows), min(lookups, rows))
+
+        self._report('with indexes', user, sample)
+        try:
+            self._drop_indexes()
+        except NotSupportedError as exc:
+            self.stdout.write(self.style.WARNING(
+                f'Cannot drop indexes on {connection.vendor}: {exc}'
+            ))
+            return
+        self._analyze()
+        self._report('without indexes', user, sample)
+
+    def _analyze(self):
+        """Refresh planner statistics after bulk changes."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_coin')
+                cursor.execute('ANALYZE core_tag')
+
+    def _drop_indexes(self):
+        """Drop the unique indexes added for the lookups."""
+        old_field = Coin._meta.get_field('name')
+        new_field = models.CharField(max_length=255)
+        new_field.set_attributes_from_name('name')
+        new_field.model = Coin
+        with connection.schema_editor(atomic=False) as editor:
+            editor.alter_field(Coin, old_field, new_field)
+            for constraint in Tag._meta.constraints:
+                editor.remove_constraint(Tag, constraint)
+
+    def _report(self, label, user, sample):
+        coin_times = []
+        tag_times = []
+        for i in sample:
+            coin_times += measure(
+                lambda: Coin.objects.filter(name=f'BENCH{i}USDT').first()
+            )
+            tag_times += measure(
+                lambda: Tag.objects.filter(
+                    user=user, name=f'Bench tag {i}',
+                ).first()
+            )
+        self.stdout.write(format_summary(
+            f'Coin.name lookup ({label})', summarize(coin_times),
+        ))
+        self.stdout.write(format_summary(
+            f'Tag(user, name) lookup ({label})', summarize(tag_times),
+        ))
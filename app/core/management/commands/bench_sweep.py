@@ -0,0 +1,115 @@
+"""
+Django command to measure how backtest sweeps scale with worker processes.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from candles.store import INTERVALS, CandleStore
+from core.management.commands.bench_backtest import random_walk
+from strategy.sweep import InvalidSweep, run_sweep, sweep_runs
+
+RULES = {
+    'entry': [
+        {'left': 'EMA({fast})', 'op': 'crosses_above', 'right': 'EMA({slow})'},
+    ],
+    'exit': [
+        {'left': 'EMA({fast})', 'op': 'crosses_below', 'right': 'EMA({slow})'},
+    ],
+}
+
+
+def parse_grid(values):
+    """Parse name=1,2,3 arguments into a grid."""
+    grid = {}
+    for value in values:
+        name, sep, numbers = value.partition('=')
+        try:
+            grid[name] = [int(n) for n in numbers.split(',')]
+        except ValueError:
+            sep = ''
+        if not sep:
+            raise CommandError(f'Expected name=1,2,3, got {value!r}')
+    return grid
+
+
+class Command(BaseCommand):
+    """
+    Sweep an EMA cross over random walk candles with 1, 2, 4... workers, e.g.
+
+        manage.py bench_sweep --coins 4 --years 1 --grid fast=5,10,20,50
+
+    The candles are written to a temporary CandleStore once, workers
+    memory-map the same files like they do in production.
+    """
+    help = 'Benchmark backtest sweeps per number of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--coins', type=int, default=4)
+        parser.add_argument('--years', type=float, default=1)
+        parser.add_argument(
+            '--interval',
+            default='1m',
+            choices=list(INTERVALS),
+        )
+        parser.add_argument(
+            '--grid',
+            nargs='+',
+            default=['fast=5,10,20,50', 'slow=100,200'],
+            help='name=values of the fast and slow EMA periods',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            action='append',
+            help='Worker processes, repeat for several, 0 runs inline '
+                 '(default: powers of two up to the CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        interval = options['interval']
+        size = int(options['years'] * 365 * 86_400_000 / INTERVALS[interval])
+        symbols = [f'COIN{i}' for i in range(options['coins'])]
+        try:
+            runs = sweep_runs(
+                [(1, RULES, symbols)],
+                parse_grid(options['grid']),
+                max_runs=10_000,
+            )
+        except InvalidSweep as exc:
+            raise CommandError(str(exc))
+
+        workers = options['workers'] or [
+            2 ** i for i in range((os.cpu_count() or 1).bit_length())
+        ]
+        with tempfile.TemporaryDirectory() as root:
+            store = CandleStore(root)
+            for i, symbol in enumerate(symbols):
+                candles = random_walk(size, interval, i)
+                store.append(symbol, interval, np.column_stack(candles))
+            self.stdout.write(
+                f'{len(runs)} runs x {len(symbols)} coins x {size} '
+                f'{interval} candles'
+            )
+
+            baseline = None
+            for count in workers:
+                began = time.perf_counter()
+                for result in run_sweep(
+                        runs, interval, workers=count, store_root=root,
+                        points=2, max_trades=0):
+                    if 'error' in result:
+                        raise CommandError(result['error'])
+                elapsed = time.perf_counter() - began
+                #0 workers runs inline, on one core like a single worker
+                cores = max(count, 1)
+                baseline = baseline or elapsed * cores
+                self.stdout.write(
+                    f'workers={count:<3} {elapsed:.2f}s '
+                    f'{len(runs) / elapsed:.2f} runs/s '
+                    f'efficiency={baseline / elapsed / cores:.0%}'
+                )
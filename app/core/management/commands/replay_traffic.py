@@ -0,0 +1,189 @@
+"""
+Django command to replay captured API traffic against a server.
+"""
+import http.client
+import json
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import format_summary, summarize
+
+
+def load_traffic(path, limit=None):
+    """Return the captured records of a JSONL file in arrival order."""
+    records = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f'{path}:{number}: {exc}')
+            if 'method' not in record or 'path' not in record:
+                raise CommandError(f'{path}:{number}: not a captured request')
+            records.append(record)
+    records.sort(key=lambda record: record.get('ts', 0))
+    return records[:limit] if limit else records
+
+
+def schedule(records, rate=0.0, speed=1.0):
+    """
+    Return the offset in seconds each record is sent at.
+
+    A rate sends evenly spaced requests per second. Otherwise the
+    captured arrival times are kept, sped up by speed, and a speed of 0
+    sends everything at once.
+    """
+    if rate > 0:
+        return [i / rate for i in range(len(records))]
+    if speed <= 0 or not records:
+        return [0.0] * len(records)
+    first = records[0].get('ts', 0)
+    return [(record.get('ts', first) - first) / speed for record in records]
+
+
+class Command(BaseCommand):
+    """
+    Re-issue requests recorded by TrafficCaptureMiddleware.
+
+    Captured users are pseudonyms, so every request is sent as the user
+    of --token. Latency is measured per request from the moment it is
+    sent, throughput over the whole run, and both are reported per
+    captured route.
+    """
+    help = 'Replay captured API traffic and report latency per route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL file of captured requests.')
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--token', help='API token sent with requests.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--rate', type=float, default=0.0,
+            help='Requests per second, 0 to keep the captured timing.',
+        )
+        parser.add_argument(
+            '--speed', type=float, default=1.0,
+            help='Speed up of the captured timing, 0 to send at once.',
+        )
+        parser.add_argument('--limit', type=int)
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument(
+            '--write', action='store_true',
+            help='Replay POST, PUT, PATCH and DELETE too, not just GET.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        records = load_traffic(options['path'], options['limit'])
+        if not options['write']:
+            records = [
+                record for record in records
+                if record['method'] in ('GET', 'HEAD', 'OPTIONS')
+            ]
+        if not records:
+            raise CommandError('Nothing to replay.')
+        url = urlsplit(options['base_url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError(f"Invalid --base-url {options['base_url']}")
+        offsets = schedule(records, options['rate'], options['speed'])
+
+        self.stdout.write(
+            f"Replaying {len(records)} requests to {options['base_url']} "
+            f"over {offsets[-1]:.1f}s with {options['concurrency']} clients"
+        )
+        pending = queue.Queue()
+        for item in zip(offsets, records):
+            pending.put(item)
+        results = []
+        start = time.monotonic()
+        threads = [
+            threading.Thread(
+                target=self._client,
+                args=(url, pending, start, results, options),
+            )
+            for _ in range(max(options['concurrency'], 1))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._report(results, time.monotonic() - start)
+
+    def _connect(self, url, timeout):
+        connection_class = (
+            http.client.HTTPSConnection if url.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        return connection_class(url.hostname, url.port, timeout=timeout)
+
+    def _client(self, url, pending, start, results, options):
+        """Send records from pending on one keep-alive connection."""
+        conn = self._connect(url, options['timeout'])
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f"Token {options['token']}"
+        prefix = url.path.rstrip('/')
+        try:
+            while True:
+                try:
+                    offset, record = pending.get_nowait()
+                except queue.Empty:
+                    return
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                body = None
+                request_headers = headers
+                if record.get('body') is not None:
+                    body = json.dumps(record['body'])
+                    request_headers = {
+                        **headers, 'Content-Type': 'application/json',
+                    }
+                route = record.get('route') or record['path'].split('?')[0]
+                sent = time.perf_counter()
+                try:
+                    conn.request(
+                        record['method'], prefix + record['path'],
+                        body=body, headers=request_headers,
+                    )
+                    res = conn.getresponse()
+                    res.read()
+                    status = res.status
+                except (OSError, http.client.HTTPException) as exc:
+                    status = type(exc).__name__
+                    conn.close()
+                    conn = self._connect(url, options['timeout'])
+                results.append((route, status, time.perf_counter() - sent))
+        finally:
+            conn.close()
+
+    def _report(self, results, elapsed):
+        by_route = defaultdict(list)
+        statuses = Counter()
+        for route, status, seconds in results:
+            by_route[route].append(seconds)
+            statuses[status] += 1
+        for route in sorted(by_route):
+            durations = by_route[route]
+            self.stdout.write(format_summary(route, summarize(durations)) + (
+                f' rps={len(durations) / elapsed:.1f}'
+            ))
+        self.stdout.write(format_summary(
+            'all', summarize([seconds for _, _, seconds in results]),
+        ))
+        self.stdout.write(
+            f'{len(results)} requests in {elapsed:.2f}s, '
+            f'{len(results) / elapsed:.1f} req/s'
+        )
+        self.stdout.write('Statuses: ' + ', '.join(
+            f'{status}={count}'
+            for status, count in sorted(statuses.items(), key=str)
+        ))
@@ -0,0 +1,89 @@
+"""
+Django command to run background jobs from the queue.
+"""
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.models import Job
+from jobs.queue import TASKS, claim, run, worker_name
+
+
+class Command(BaseCommand):
+    """
+    Claim and run queued jobs until stopped, e.g.
+
+        manage.py run_jobs
+        manage.py run_jobs --kind sync_candles --kind sync_coins
+
+    Start as many workers as needed, they share the queue table. SIGTERM
+    and SIGINT let the running job finish before exiting.
+    """
+    help = 'Run queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind, repeat for several',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Exit after running this many jobs',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait before polling an empty queue again',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stopping = False
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._stop)
+
+        worker = worker_name()
+        kinds = options['kinds'] or sorted(TASKS)
+        self.stdout.write(f'Worker {worker} running {", ".join(kinds)}')
+        done = 0
+        while not self.stopping:
+            if options['max_jobs'] is not None and done >= options['max_jobs']:
+                break
+            #like the request cycle, drop connections that went bad
+            close_old_connections()
+            job = claim(worker, kinds)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+
+            began = time.perf_counter()
+            outcome = run(job)
+            done += 1
+            message = (
+                f'{job.kind} #{job.pk} {outcome} '
+                f'in {time.perf_counter() - began:.2f}s'
+            )
+            if outcome in (Job.FAILED, Job.QUEUED):
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                self.stdout.write(message)
+
+        close_old_connections()
+        self.stdout.write(f'Worker {worker} stopped after {done} jobs')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
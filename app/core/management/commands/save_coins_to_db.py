@@ -1,31 +1,95 @@
-from django.core.management.base import BaseCommand
+"""
+Django command to sync the coin catalog from the exchange.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.cache import catalog_cache
+from core.exchange import get_source, write_snapshot
 from core.models import Coin, Base
-from binance.client import Client
+
+
+def parse_symbols(exchange_info, quotes):
+    """Return the symbols quoted in any of quotes, in a single pass."""
+    quotes = tuple(quotes)
+    return [
+        i['symbol'] for i in exchange_info['symbols']
+        if i['symbol'].endswith(quotes)
+    ]
+
+
+def create_missing(model, names, batch_size):
+    """Insert the names that are not stored yet and return how many were."""
+    existing = set(model.objects.values_list('name', flat=True))
+    #dict.fromkeys drops duplicates while keeping the exchange order
+    new = [name for name in dict.fromkeys(names) if name not in existing]
+    if not new:
+        return 0
+    #ON CONFLICT DO NOTHING on the unique name, so overlapping syncs can't
+    #fail or insert duplicates. It doesn't say how many rows it skipped,
+    #so the inserted ones are what the table grew by.
+    before = model.objects.count()
+    model.objects.bulk_create(
+        (model(name=name) for name in new),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return model.objects.count() - before
+
 
 class Command(BaseCommand):
     help = 'Seed database with coin data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=settings.EXCHANGE_INFO_SOURCE,
+            help="'binance', an http(s) URL or snapshot:<path> "
+                 '(defaults to settings.EXCHANGE_INFO_SOURCE).',
+        )
+        parser.add_argument(
+            '--snapshot-out',
+            help='Write the fetched listing to this snapshot file '
+                 '(gzip compressed if it ends in .gz).',
+        )
+        parser.add_argument(
+            '--quote',
+            action='append',
+            dest='quotes',
+            help='Quote asset to import, can be repeated '
+                 '(defaults to settings.COIN_QUOTE_ASSETS).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of coins inserted per query.',
+        )
+
     def handle(self, *args, **options):
-        flag = True
-        new_coins = 0
-        client = Client()
-        dict_ = client.get_exchange_info()
-        base_usdt = "USDT"
-        base_eth = "ETH"
-        Base.objects.get_or_create(name=base_usdt)
-        Base.objects.get_or_create(name=base_eth)
-        usdt = [i['symbol'] for i in dict_['symbols'] if i['symbol'].endswith(base_usdt)]
-        eth = [i['symbol'] for i in dict_['symbols'] if i['symbol'].endswith(base_eth)]
-        # sym = [i['symbol'] for i in dict_['symbols'] if i['symbol'].endswith('ETH')]
-        sym = usdt + eth
-        for symbol in sym:
-            coin, created = Coin.objects.get_or_create(name=symbol)
-            if created:
-                flag = False
-                new_coins += 1
-
-            # else:
-            #     self.stdout.write(self.style.WARNING(f'Coin already exists: {coin.name}'))
-        if flag:
+        quotes = options['quotes'] or settings.COIN_QUOTE_ASSETS
+        batch_size = options['batch_size']
+        try:
+            source = get_source(options['source'])
+            dict_ = source.get_exchange_info()
+        except Exception as exc:
+            raise CommandError(
+                f"Could not load exchange info from {options['source']}: {exc}"
+            )
+        if options['snapshot_out']:
+            write_snapshot(dict_, options['snapshot_out'])
+            self.stdout.write(f"Saved snapshot to {options['snapshot_out']}")
+
+        new_bases = create_missing(Base, quotes, batch_size)
+        new_coins = create_missing(
+            Coin,
+            parse_symbols(dict_, quotes),
+            batch_size,
+        )
+
+        #bulk_create sends no signals, so drop the cached catalog here
+        if new_bases or new_coins:
+            catalog_cache.invalidate()
+        if not new_coins:
             self.stdout.write(self.style.WARNING(f'No new coins inserted in database'))
         else:
             self.stdout.write(self.style.SUCCESS(f'Created {new_coins} coins in the database'))
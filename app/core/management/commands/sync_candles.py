@@ -0,0 +1,160 @@
+"""
+Django command to backfill and sync klines for the coin catalog.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from candles.sources import (
+    MAX_PAGE_SIZE,
+    RecordingSource,
+    get_kline_source,
+    klines_to_candles,
+)
+from candles.store import INTERVALS, CandleStore
+from core.models import Coin
+
+
+def to_ms(day):
+    """Return midnight UTC of a YYYY-MM-DD date in milliseconds."""
+    moment = datetime.combine(
+        date.fromisoformat(day), datetime.min.time(), tzinfo=timezone.utc,
+    )
+    return int(moment.timestamp() * 1000)
+
+
+def sync_symbol(store, source, symbol, interval, since, end, page_size):
+    """
+    Fetch pages from the newest stored candle up to end into the store.
+
+    Pages go straight to disk, so memory use doesn't grow with the range.
+    Returns the number of candles written.
+    """
+    step = INTERVALS[interval]
+    last = store.last_open_time(symbol, interval)
+    start = since if last is None else max(since, last + step)
+    written = 0
+    while start <= end:
+        klines = source.fetch(symbol, interval, start, end, page_size)
+        if not klines:
+            break
+        candles = klines_to_candles(klines)
+        written += store.append(symbol, interval, candles)
+        start = int(candles.open_time[-1]) + step
+        if len(klines) < page_size:
+            break
+    return written
+
+
+class Command(BaseCommand):
+    help = 'Backfill and sync klines for every coin into the candle store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            default='1m',
+            choices=list(INTERVALS),
+        )
+        parser.add_argument(
+            '--symbol',
+            action='append',
+            dest='symbols',
+            help='Symbol to sync, can be repeated (defaults to every coin).',
+        )
+        parser.add_argument(
+            '--since',
+            help='First day to backfill, YYYY-MM-DD (defaults to '
+                 'settings.CANDLE_BACKFILL_DAYS ago).',
+        )
+        parser.add_argument(
+            '--until',
+            help='Last day to sync, YYYY-MM-DD exclusive (defaults to now).',
+        )
+        parser.add_argument(
+            '--source',
+            default=settings.KLINE_SOURCE,
+            help="'binance' or replay:<path> of a recorded JSONL file "
+                 '(defaults to settings.KLINE_SOURCE).',
+        )
+        parser.add_argument(
+            '--record',
+            help='Append every fetched page to this JSONL file for replay.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.CANDLE_SYNC_WORKERS,
+            help='Symbols fetched concurrently.',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=MAX_PAGE_SIZE,
+            help=f'Klines per request, at most {MAX_PAGE_SIZE}.',
+        )
+
+    def handle(self, *args, **options):
+        #a short page ends the sync, so pages can't exceed the API's limit
+        if not 1 <= options['page_size'] <= MAX_PAGE_SIZE:
+            raise CommandError(
+                f'--page-size must be between 1 and {MAX_PAGE_SIZE}'
+            )
+        interval = options['interval']
+        step = INTERVALS[interval]
+        now = int(time.time() * 1000)
+        until = to_ms(options['until']) if options['until'] else now
+        #only closed candles are stored, the store is append-only
+        end = min(until, now) // step * step - step
+        if options['since']:
+            since = to_ms(options['since'])
+        else:
+            since = now - settings.CANDLE_BACKFILL_DAYS * 86_400_000
+        since = since // step * step
+
+        symbols = options['symbols'] or list(
+            Coin.objects.order_by('name').values_list('name', flat=True)
+        )
+        try:
+            source = get_kline_source(options['source'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['record']:
+            source = RecordingSource(source, options['record'])
+
+        store = CandleStore()
+        failed = []
+        total = 0
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futures = {
+                    pool.submit(
+                        sync_symbol, store, source, symbol, interval,
+                        since, end, options['page_size'],
+                    ): symbol
+                    for symbol in symbols
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        written = future.result()
+                    except Exception as exc:
+                        failed.append(symbol)
+                        self.stderr.write(f'{symbol}: {exc}')
+                        continue
+                    total += written
+                    if written:
+                        self.stdout.write(f'{symbol}: {written} candles')
+        finally:
+            source.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {total} {interval} candles for {len(symbols)} symbols'
+        ))
+        if failed:
+            raise CommandError(
+                f'Could not sync {len(failed)} symbols: '
+                f'{", ".join(sorted(failed))}'
+            )
@@ -0,0 +1,497 @@
+"""
+Metrics registry with Prometheus text exposition at /metrics.
+
+Counters, gauges and fixed-bucket histograms keep their values in the
+process by default. With METRICS_DIR set every process writes its values
+to memory-mapped files there instead and a scrape adds up the files of
+all processes, so any gunicorn worker answers /metrics for all of them.
+Clear the directory before the server starts and drop the gauges of
+workers that exit from gunicorn.conf.py:
+
+    def child_exit(server, worker):
+        from core.metrics import mark_process_dead
+        mark_process_dead(worker.pid)
+
+MetricsMiddleware counts requests and times them per URL route name and
+per viewset action, and keeps the DB pool gauges current.
+"""
+import bisect
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+#method label values, any other method is counted as 'other'
+HTTP_METHODS = frozenset({
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE',
+    'CONNECT',
+})
+
+_HEADER = 8
+
+
+def _entries(buffer, used):
+    """Yield (key, value, value offset) of a values file."""
+    offset = _HEADER
+    while offset < used:
+        length, = struct.unpack_from('<I', buffer, offset)
+        key = bytes(buffer[offset + 4:offset + 4 + length]).decode('utf-8')
+        #values are 8 byte aligned so they are written in one go
+        position = (offset + 4 + length + 7) & ~7
+        yield key, struct.unpack_from('<d', buffer, position)[0], position
+        offset = position + 8
+
+
+def read_values(path):
+    """Return {key: value} of a values file written by any process."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < _HEADER:
+        return {}
+    used, = struct.unpack_from('<I', data, 0)
+    return {key: value for key, value, _ in _entries(data, used)}
+
+
+class MemoryValues:
+    """Float values by key, for a single process."""
+
+    def __init__(self):
+        self._values = {}
+
+    def add(self, key, amount):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def items(self):
+        return list(self._values.items())
+
+
+class MmapValues:
+    """
+    Float values by key in a memory-mapped file, written by one process.
+
+    Entries are appended as (key length, key, value) and never move. The
+    used size at the start of the file is updated once an entry is
+    complete, so readers never see half of one.
+    """
+    initial_size = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.initial_size:
+            self._file.truncate(self.initial_size)
+            size = self.initial_size
+        self._map = mmap.mmap(self._file.fileno(), size)
+        used, = struct.unpack_from('<I', self._map, 0)
+        self._used = used or _HEADER
+        self._positions = {
+            key: position
+            for key, _, position in _entries(self._map, self._used)
+        }
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode('utf-8')
+        offset = self._used
+        position = (offset + 4 + len(encoded) + 7) & ~7
+        end = position + 8
+        if end > len(self._map):
+            size = len(self._map)
+            while size < end:
+                size *= 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        struct.pack_into('<I', self._map, offset, len(encoded))
+        self._map[offset + 4:offset + 4 + len(encoded)] = encoded
+        struct.pack_into('<d', self._map, position, 0.0)
+        struct.pack_into('<I', self._map, 0, end)
+        self._used = end
+        self._positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        position = self._position(key)
+        value, = struct.unpack_from('<d', self._map, position)
+        struct.pack_into('<d', self._map, position, value + amount)
+
+    def set(self, key, value):
+        struct.pack_into('<d', self._map, self._position(key), value)
+
+    def items(self):
+        return [
+            (key, struct.unpack_from('<d', self._map, position)[0])
+            for key, position in self._positions.items()
+        ]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+#encoded keys by (name, labels), label values come from small fixed sets
+_keys = {}
+
+
+def _key(name, labels):
+    labels = tuple(sorted(labels.items()))
+    key = _keys.get((name, labels))
+    if key is None:
+        key = _keys[name, labels] = json.dumps([name, labels])
+    return key
+
+
+class Metric:
+    """Base class of the metric types, created through a Registry."""
+    type = None
+    #gauges describe live processes, the others add up over all of them
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'{self.name} takes the labels {", ".join(self.labelnames)}'
+            )
+        return {name: str(value) for name, value in labels.items()}
+
+    def samples(self, values):
+        """Yield (name, labels, value) of this metric from values."""
+        for (name, labels), value in values.items():
+            if name == self.name:
+                yield name, dict(labels), value
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.write(
+            self.kind, _key(self.name, self._labels(labels)), amount,
+        )
+
+
+class Gauge(Metric):
+    """Value that is set, the sum over the live processes is reported."""
+    type = 'gauge'
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.registry.write(
+            self.kind, _key(self.name, self._labels(labels)), value,
+            replace=True,
+        )
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, with their sum."""
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._bounds = [_format_value(bound) for bound in self.buckets]
+        self._bounds.append('+Inf')
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        bucket = _key(
+            f'{self.name}_bucket', {**labels, 'le': self._bounds[index]},
+        )
+        self.registry.write_many(self.kind, [
+            (bucket, 1),
+            (_key(f'{self.name}_sum', labels), value),
+            (_key(f'{self.name}_count', labels), 1),
+        ])
+
+    def samples(self, values):
+        series = {}
+        for (name, labels), value in values.items():
+            if not name.startswith(self.name + '_'):
+                continue
+            suffix = name[len(self.name):]
+            labels = dict(labels)
+            le = labels.pop('le', None)
+            entry = series.setdefault(
+                tuple(sorted(labels.items())),
+                {'buckets': {}, '_sum': 0.0, '_count': 0.0},
+            )
+            if suffix == '_bucket':
+                entry['buckets'][le] = value
+            elif suffix in ('_sum', '_count'):
+                entry[suffix] = value
+        for labels, entry in series.items():
+            #stored per bucket, exposed as the cumulative count up to le
+            total = 0.0
+            for bound in self._bounds:
+                total += entry['buckets'].get(bound, 0.0)
+                yield (
+                    f'{self.name}_bucket', {**dict(labels), 'le': bound}, total,
+                )
+            yield f'{self.name}_sum', dict(labels), entry['_sum']
+            yield f'{self.name}_count', dict(labels), entry['_count']
+
+
+def _format_value(value):
+    if math.isfinite(value) and value == int(value) and abs(value) < 1e15:
+        return f'{value:.1f}'
+    return repr(float(value))
+
+
+def _escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    )
+
+
+class Registry:
+    """
+    The metrics of the app and where their values are kept.
+
+    directory defaults to settings.METRICS_DIR, None keeps the values in
+    this process only.
+    """
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._metrics = []
+        self._lock = threading.Lock()
+        self._stores = {}
+        self._owner = None
+
+    @property
+    def directory(self):
+        return self._directory or getattr(settings, 'METRICS_DIR', None)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        return self._register(
+            Histogram(self, name, documentation, labelnames, buckets),
+        )
+
+    def _store(self, kind):
+        #a forked worker must not write to its parent's values
+        owner = (os.getpid(), self.directory)
+        if owner != self._owner:
+            self._stores = {}
+            self._owner = owner
+        store = self._stores.get(kind)
+        if store is None:
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                store = MmapValues(
+                    os.path.join(self.directory, f'{kind}_{os.getpid()}.db')
+                )
+            else:
+                store = MemoryValues()
+            self._stores[kind] = store
+        return store
+
+    def write(self, kind, key, amount, replace=False):
+        with self._lock:
+            store = self._store(kind)
+            if replace:
+                store.set(key, amount)
+            else:
+                store.add(key, amount)
+
+    def write_many(self, kind, items):
+        with self._lock:
+            store = self._store(kind)
+            for key, amount in items:
+                store.add(key, amount)
+
+    def collect(self):
+        """Return {(name, labels): value} over all processes."""
+        if self.directory:
+            sources = [
+                read_values(path)
+                for path in glob.glob(os.path.join(self.directory, '*.db'))
+            ]
+        else:
+            with self._lock:
+                sources = [
+                    dict(store.items()) for store in self._stores.values()
+                ]
+        values = {}
+        for source in sources:
+            for key, value in source.items():
+                name, labels = json.loads(key)
+                key = (name, tuple(tuple(label) for label in labels))
+                values[key] = values.get(key, 0.0) + value
+        return values
+
+    def exposition(self):
+        """Return the metrics in the Prometheus text format."""
+        values = self.collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples(values):
+                if labels:
+                    labels = ','.join(
+                        f'{label}="{_escape(text)}"'
+                        for label, text in labels.items()
+                    )
+                    name = f'{name}{{{labels}}}'
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(pid, directory=None):
+    """Drop the gauges of an exited process, its counters are kept."""
+    directory = directory or settings.METRICS_DIR
+    if directory:
+        path = os.path.join(directory, f'gauge_{pid}.db')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total',
+    'Requests by URL route name, method and status.',
+    ('route', 'method', 'status'),
+)
+http_duration = registry.histogram(
+    'http_request_duration_seconds',
+    'Request latency by URL route name and method.',
+    ('route', 'method'),
+)
+action_duration = registry.histogram(
+    'viewset_action_duration_seconds',
+    'Request latency by DRF viewset and action.',
+    ('viewset', 'action'),
+)
+pool_connections = registry.gauge(
+    'db_pool_connections',
+    'Pooled database connections by alias and state.',
+    ('alias', 'state'),
+)
+pool_events = registry.gauge(
+    'db_pool_events',
+    'Pool events since the workers started, by alias and event.',
+    ('alias', 'event'),
+)
+
+
+def record_pool_stats():
+    """Set the pool gauges from the pools of this process."""
+    #only loaded when DATABASES uses the pooled backend
+    backend = sys.modules.get('core.db.backends.pooled_postgresql.base')
+    if backend is None:
+        return
+    for alias, pool in backend.get_pools().items():
+        stats = pool.stats()
+        for state in ('in_use', 'idle'):
+            pool_connections.set(stats[state], alias=alias, state=state)
+        for event in ('created', 'reused', 'discarded', 'waits'):
+            pool_events.set(stats[event], alias=alias, event=event)
+
+
+class MetricsMiddleware:
+    """Count and time every request, see the module docstring."""
+    sync_capable = True
+    async_capable = True
+    #seconds between updates of the pool gauges
+    pool_stats_interval = 1.0
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._pool_stats_at = 0.0
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, seconds):
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        #clients pick the method, so unknown ones share a label value
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        http_requests.inc(
+            route=route, method=method, status=response.status_code,
+        )
+        http_duration.observe(seconds, route=route, method=method)
+
+        #DRF viewset views know their class and the action per method
+        view = match.func if match is not None else None
+        actions = getattr(view, 'actions', None)
+        if actions:
+            action_duration.observe(
+                seconds,
+                viewset=view.cls.__name__,
+                action=actions.get(request.method.lower(), 'other'),
+            )
+
+        now = time.monotonic()
+        if now - self._pool_stats_at >= self.pool_stats_interval:
+            self._pool_stats_at = now
+            record_pool_stats()
+
+
+def metrics_view(request):
+    """
+    Serve the metrics to Prometheus behind METRICS_TOKEN.
+
+    Without a token configured they are only served in DEBUG and to staff
+    logged in to the admin, never to anyone who asks.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=401)
+    elif not settings.DEBUG and not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
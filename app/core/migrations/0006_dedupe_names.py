@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:56
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, model_name, fields, relation=None):
+    """Keep the oldest row per fields and repoint strategies to it."""
+    Model = apps.get_model('core', model_name)
+    Strategy = apps.get_model('core', 'Strategy')
+    duplicates = (
+        Model.objects.values(*fields)
+        .annotate(keep=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        keep = row['keep']
+        lookup = {field: row[field] for field in fields}
+        others = Model.objects.filter(**lookup).exclude(id=keep)
+        for other in others.values_list('id', flat=True):
+            if relation is not None:
+                through = Strategy._meta.get_field(relation).remote_field.through
+                column = f'{model_name.lower()}_id'
+                linked = through.objects.filter(**{column: keep}).values('strategy_id')
+                #drop links that would become duplicates, move the rest
+                through.objects.filter(
+                    **{column: other, 'strategy_id__in': linked}
+                ).delete()
+                through.objects.filter(**{column: other}).update(**{column: keep})
+            if model_name == 'Coin':
+                Strategy.objects.filter(base_id=other).update(base_id=keep)
+        others.delete()
+
+
+def dedupe_names(apps, schema_editor):
+    """Remove rows that would violate the new unique constraints."""
+    merge_duplicates(apps, 'Coin', ['name'], relation='coins')
+    merge_duplicates(apps, 'Base', ['name'])
+    merge_duplicates(apps, 'Tag', ['user', 'name'], relation='tags')
+    merge_duplicates(apps, 'Indicator', ['user', 'name'], relation='indicators')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_base'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:58
+
+import json
+
+from django.db import migrations
+
+
+LAYOUT_FIELDS = {
+    'Dashboard': ['gridConfig', 'gridConfig2', 'gridConfig3'],
+    'Grid': ['gridConfig'],
+}
+
+
+def to_json_text(value):
+    """Return value unchanged if it is JSON, otherwise as a JSON string."""
+    if not value:
+        return '{}'
+    try:
+        json.loads(value)
+    except ValueError:
+        return json.dumps(value)
+    return value
+
+
+def layouts_to_json(apps, schema_editor):
+    """Make every stored layout valid JSON before the column type changes."""
+    for model_name, fields in LAYOUT_FIELDS.items():
+        Model = apps.get_model('core', model_name)
+        for row in Model.objects.only('pk', *fields).iterator():
+            changes = {}
+            for field in fields:
+                value = getattr(row, field)
+                converted = to_json_text(value)
+                if converted != value:
+                    changes[field] = converted
+            if changes:
+                Model.objects.filter(pk=row.pk).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_unique_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(layouts_to_json, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_layout_text_to_json'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dashboard',
+            name='gridConfig',
+            field=models.JSONField(),
+        ),
+        migrations.AlterField(
+            model_name='dashboard',
+            name='gridConfig2',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='dashboard',
+            name='gridConfig3',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='grid',
+            name='gridConfig',
+            field=models.JSONField(),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_layouts_jsonb'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboard',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
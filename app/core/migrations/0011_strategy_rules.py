@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_layout_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strategy',
+            name='rules',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
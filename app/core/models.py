@@ -3,6 +3,7 @@ Database models.
 """
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -12,14 +13,14 @@ from django.contrib.auth.models import (
 
 class Coin(models.Model):
     """Model for representing a coin."""
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
     # Other fields related to Coin model
     def __str__(self):
         return self.name
 
 class Base(models.Model):
     """Model for representing a base currency."""
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
     # Other fields related to Coin model
     def __str__(self):
         return self.name
@@ -74,13 +75,32 @@ class Strategy(models.Model):
     description = models.TextField(blank=True)
     tags = models.ManyToManyField('Tag')
     indicators = models.ManyToManyField('Indicator')
+    #signal rules run by the backtester, see strategy.backtest
+    rules = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return self.title
 
-class Grid(models.Model):
+class VersionedModel(models.Model):
+    """Abstract model whose version goes up on every save, used as ETag."""
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+
+
+class Grid(VersionedModel):
     """Indicator for strategies."""
-    gridConfig = models.TextField()
+    #layouts are stored as jsonb so they can be patched in place
+    gridConfig = models.JSONField()
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -88,14 +108,14 @@ class Grid(models.Model):
     description = models.TextField()
     # description = models.TextField(blank=True)
     def __str__(self):
-        return self.gridConfig
+        return str(self.gridConfig)
 
 
-class Dashboard(models.Model):
+class Dashboard(VersionedModel):
     """Indicator for strategies."""
-    gridConfig = models.TextField()
-    gridConfig2 = models.TextField()
-    gridConfig3 = models.TextField()
+    gridConfig = models.JSONField()
+    gridConfig2 = models.JSONField(default=dict, blank=True)
+    gridConfig3 = models.JSONField(default=dict, blank=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -103,7 +123,7 @@ class Dashboard(models.Model):
     description = models.TextField()
     # description = models.TextField(blank=True)
     def __str__(self):
-        return self.gridConfig
+        return str(self.gridConfig)
 
 class Tag(models.Model):
     """Tag for filtering strategies."""
@@ -113,6 +133,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        #also the index behind the (user, name) lookups in StrategySerializer
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -123,5 +152,68 @@ class Indicator(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_indicator_name_per_user',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """Background job, run by the run_jobs command, see jobs/queue.py."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    kind = models.CharField(max_length=64)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    #a running job whose worker stops renewing this is claimed again
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            #the workers' poll for due jobs only ever scans queued rows
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idx',
+            ),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.kind} #{self.pk} ({self.status})'
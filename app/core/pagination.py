@@ -0,0 +1,28 @@
+"""
+Pagination used by the router generated list endpoints.
+"""
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination that follows the ordering of the view's queryset.
+
+    Pages are fetched with WHERE <ordering field> > <cursor> instead of
+    OFFSET, so every page costs the same no matter how deep it is.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        """Use the get_queryset() ordering, with the pk as a tie breaker."""
+        ordering = tuple(queryset.query.order_by)
+        if not ordering or not all(isinstance(f, str) for f in ordering):
+            return (self.ordering,)
+
+        fields = [f.lstrip('-') for f in ordering]
+        if 'id' not in fields and 'pk' not in fields:
+            direction = '-' if ordering[0].startswith('-') else ''
+            ordering += (direction + 'id',)
+        return ordering
@@ -0,0 +1,40 @@
+"""
+JSON parser backed by orjson, with DRF's stdlib parser as fallback.
+"""
+import io
+import re
+
+from rest_framework import parsers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#integers this long may not fit in 64 bits, which orjson reads as floats
+LONG_NUMBER_RE = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson when it is installed.
+
+    orjson rejects what the stdlib rejects in strict mode, but reads
+    integers beyond 64 bits as floats. Bodies with a run of 19 or more
+    digits, and bodies orjson can't decode, go through the stdlib parser,
+    which keeps such integers exact or raises the usual ParseError.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8').lower()
+        if orjson is None or encoding not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if not LONG_NUMBER_RE.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
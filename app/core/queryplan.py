@@ -0,0 +1,126 @@
+"""
+Build querysets from the relations a serializer actually renders.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+def _nested_serializer(field):
+    """Return the serializer rendered for a field, if it is a nested one."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _collect_lookups(serializer, prefix, in_prefetch):
+    """Walk the serializer fields and return (select, prefetch) lookups."""
+    select_related = []
+    prefetch_related = []
+    model = serializer.Meta.model
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        #dotted sources ('base.name') only need the first hop planned
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + source
+        nested = _nested_serializer(field)
+        many = model_field.many_to_many or model_field.one_to_many
+
+        if many or in_prefetch:
+            #nested relations below a prefetch have to be prefetched as well
+            if many or nested is not None or not _pk_only(field):
+                prefetch_related.append(lookup)
+        elif nested is not None or not _pk_only(field):
+            select_related.append(lookup)
+
+        if nested is not None and hasattr(nested, 'Meta'):
+            nested_select, nested_prefetch = _collect_lookups(
+                nested,
+                lookup + '__',
+                in_prefetch or many,
+            )
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+
+    return select_related, prefetch_related
+
+
+def _pk_only(field):
+    """Return True if the field renders the related pk without a query."""
+    if isinstance(field, ManyRelatedField):
+        field = field.child_relation
+    return (
+        isinstance(field, RelatedField)
+        and field.use_pk_only_optimization()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_related_lookups(serializer_class):
+    """Return the select_related and prefetch_related lookups to use."""
+    select_related, prefetch_related = _collect_lookups(
+        serializer_class(),
+        prefix='',
+        in_prefetch=False,
+    )
+    return tuple(select_related), tuple(prefetch_related)
+
+
+@lru_cache(maxsize=None)
+def get_only_fields(serializer_class):
+    """
+    Return the model fields serializer_class reads, or None if unknown.
+
+    None is returned when a field is not backed by a model field (e.g. a
+    SerializerMethodField or source='*'), since the columns it needs
+    can't be known up front.
+    """
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    fields = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many:
+            continue
+        fields.add(model_field.name)
+    return tuple(sorted(fields))
+
+
+def plan_queryset(queryset, serializer_class, only_rendered=False):
+    """
+    Join or prefetch every relation rendered by serializer_class.
+
+    With only_rendered the columns the serializer doesn't render are
+    deferred too, so large unused columns are never read.
+    """
+    select_related, prefetch_related = get_related_lookups(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only_rendered:
+        only_fields = get_only_fields(serializer_class)
+        if only_fields is not None:
+            queryset = queryset.only(*only_fields, *select_related)
+    return queryset
@@ -0,0 +1,62 @@
+"""
+JSON renderer backed by orjson, with DRF's stdlib renderer as fallback.
+"""
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#DRF escapes these for JavaScript, they are valid JSON but not valid JS
+LINE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The output matches DRF's compact JSON: datetimes in UTC end in Z,
+    UUIDs are strings and non string keys are converted. Everything else
+    orjson doesn't know, Decimal, timedelta, querysets and lazy strings
+    included, goes through DRF's JSONEncoder.default. Unlike the stdlib,
+    orjson writes NaN and Infinity as null instead of failing.
+
+    Indented output (the browsable API, ?indent=) and the non default
+    UNICODE_JSON and COMPACT_JSON settings use the stdlib renderer.
+    """
+    options = 0
+    if orjson is not None:
+        options = (
+            orjson.OPT_UTC_Z
+            | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY
+        )
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        try:
+            ret = orjson.dumps(
+                data, default=self._default, option=self.options,
+            )
+        except orjson.JSONEncodeError:
+            #e.g. integers beyond 64 bits, which the stdlib can encode
+            return super().render(data, accepted_media_type, renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
@@ -0,0 +1,213 @@
+"""
+Bulk factories that seed benchmark sized datasets.
+
+Everything is inserted with bulk_create in batches, many-to-many rows
+straight into the through tables, and every user shares one password
+hash, so a million strategies take minutes instead of hours. Seeded
+names start with 'bench' and the data is meant to be rolled back or
+seeded into a throwaway database.
+"""
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.models import (
+    Base,
+    Coin,
+    Dashboard,
+    Grid,
+    Indicator,
+    Strategy,
+    Tag,
+)
+
+DEFAULT_COUNTS = {
+    'users': 10_000,
+    'coins': 50_000,
+    'strategies': 1_000_000,
+    'dashboards': 50,
+}
+#layout size of the seeded dashboards and grids
+DEFAULT_LAYOUT_BYTES = 2 * 1024 * 1024
+TAGS_PER_USER = 5
+INDICATORS = ('SMA(20)', 'EMA(50)', 'RSI(14)', 'MACD', 'BBANDS(20, 2)')
+COINS_PER_STRATEGY = 3
+PASSWORD = 'bench-password'
+RULES = {
+    'entry': [{'left': 'close', 'op': '>', 'right': 'SMA(20)'}],
+    'exit': [{'left': 'RSI(14)', 'op': '>', 'right': 70}],
+}
+
+
+def make_layout(size, rng):
+    """Return a grid layout of about size bytes of JSON."""
+    widgets = []
+    total = 2
+    while total < size:
+        widget = {
+            'i': f'widget-{len(widgets)}',
+            'x': rng.randrange(12),
+            'y': rng.randrange(1000),
+            'w': rng.randrange(1, 6),
+            'h': rng.randrange(1, 6),
+            'static': False,
+            'config': {
+                'symbol': f'BENCH{rng.randrange(50_000)}USDT',
+                'interval': rng.choice(['1m', '15m', '1h', '4h', '1d']),
+                'indicators': rng.sample(INDICATORS, 2),
+                'colors': [f'#{rng.randrange(1 << 24):06x}' for _ in range(4)],
+            },
+        }
+        widgets.append(widget)
+        total += len(json.dumps(widget)) + 2
+    return widgets
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Seeder:
+    """
+    Seed users, their tags, indicators, strategies and layouts, and coins.
+
+    Strategies are spread evenly over the users, each with a base, a few
+    coins, tags and indicators. log(message) reports progress.
+    """
+
+    def __init__(self, counts=None, layout_bytes=DEFAULT_LAYOUT_BYTES,
+                 batch_size=5000, seed=0, log=None):
+        self.counts = {**DEFAULT_COUNTS, **(counts or {})}
+        self.layout_bytes = layout_bytes
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+    def _create(self, model, rows):
+        created = []
+        for batch in _batches(rows, self.batch_size):
+            created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def seed(self):
+        """Seed everything and return the created rows' ids."""
+        self.log(f'Seeding {self.counts}')
+        coins = self.seed_coins()
+        users = self.seed_users()
+        tags, indicators = self.seed_user_names(users)
+        self.seed_strategies(users, coins, tags, indicators)
+        self.seed_layouts(users[0])
+        return {'users': users, 'coins': coins}
+
+    def seed_coins(self):
+        bases = self._create(
+            Base,
+            (Base(name=f'BENCHBASE{i}') for i in range(10)),
+        )
+        coins = self._create(
+            Coin,
+            (Coin(name=f'BENCH{i}USDT') for i in range(self.counts['coins'])),
+        )
+        self.log(f'{len(coins)} coins, {len(bases)} bases')
+        return [coin.pk for coin in coins]
+
+    def seed_users(self):
+        #hashing once keeps seeding fast with any password hasher
+        password = make_password(PASSWORD)
+        users = self._create(get_user_model(), (
+            get_user_model()(
+                email=f'bench{i}@example.com',
+                name=f'Bench user {i}',
+                password=password,
+            )
+            for i in range(self.counts['users'])
+        ))
+        self.log(f'{len(users)} users')
+        return [user.pk for user in users]
+
+    def seed_user_names(self, users):
+        """Seed tags and indicators, return their ids per user."""
+        tags = self._create(Tag, (
+            Tag(user_id=user, name=f'Bench tag {i}')
+            for user in users for i in range(TAGS_PER_USER)
+        ))
+        indicators = self._create(Indicator, (
+            Indicator(user_id=user, name=name)
+            for user in users for name in INDICATORS
+        ))
+        by_user = ({}, {})
+        for rows, ids in zip((tags, indicators), by_user):
+            for row in rows:
+                ids.setdefault(row.user_id, []).append(row.pk)
+        self.log(f'{len(tags)} tags, {len(indicators)} indicators')
+        return by_user
+
+    def seed_strategies(self, users, coins, tags, indicators):
+        rng = self.rng
+        total = self.counts['strategies']
+        created = 0
+        rows = (
+            Strategy(
+                user_id=users[i % len(users)],
+                base_id=rng.choice(coins),
+                description=f'Bench strategy {i}',
+                rules=RULES,
+            )
+            for i in range(total)
+        )
+        for batch in _batches(rows, self.batch_size):
+            strategies = Strategy.objects.bulk_create(batch)
+            Strategy.coins.through.objects.bulk_create([
+                Strategy.coins.through(strategy_id=strategy.pk, coin_id=coin)
+                for strategy in strategies
+                for coin in rng.sample(coins, COINS_PER_STRATEGY)
+            ])
+            Strategy.tags.through.objects.bulk_create([
+                Strategy.tags.through(strategy_id=strategy.pk, tag_id=tag)
+                for strategy in strategies
+                for tag in rng.sample(tags[strategy.user_id], 2)
+            ])
+            Strategy.indicators.through.objects.bulk_create([
+                Strategy.indicators.through(
+                    strategy_id=strategy.pk, indicator_id=indicator,
+                )
+                for strategy in strategies
+                for indicator in rng.sample(indicators[strategy.user_id], 2)
+            ])
+            created += len(strategies)
+            if created % (self.batch_size * 20) == 0 or created == total:
+                self.log(f'{created}/{total} strategies')
+
+    def seed_layouts(self, user):
+        """Seed dashboards and grids with large layouts for one user."""
+        count = self.counts['dashboards']
+        layout = make_layout(self.layout_bytes, self.rng)
+        self._create(Dashboard, (
+            Dashboard(
+                user_id=user,
+                gridConfig=layout,
+                description=f'Bench dashboard {i}',
+            )
+            for i in range(count)
+        ))
+        self._create(Grid, (
+            Grid(
+                user_id=user,
+                gridConfig=layout,
+                description=f'Bench grid {i}',
+            )
+            for i in range(count)
+        ))
+        self.log(
+            f'{count} dashboards and grids of '
+            f'{len(json.dumps(layout)) // 1024} KB'
+        )
@@ -0,0 +1,17 @@
+"""
+Signal receivers for the core models.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import catalog_cache
+from core.models import Base, Coin
+
+
+@receiver(post_save, sender=Coin)
+@receiver(post_delete, sender=Coin)
+@receiver(post_save, sender=Base)
+@receiver(post_delete, sender=Base)
+def invalidate_catalog(sender, **kwargs):
+    """Drop cached catalog responses when a coin or base changes."""
+    catalog_cache.invalidate()
@@ -0,0 +1,29 @@
+"""
+Helpers shared by the test suites.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """TestCase mixin for asserting query counts."""
+
+    def assertConstantQueries(self, func, grow, steps=(1, 5, 20)):
+        """
+        Assert func runs the same number of queries at every size.
+
+        grow(count) is called before each measurement to add `count`
+        more rows, so an N+1 in func shows up as a growing count.
+        """
+        counts = []
+        for count in steps:
+            grow(count)
+            with CaptureQueriesContext(connection) as ctx:
+                func()
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'Query count grew with the number of rows: {counts}',
+        )
+        return counts[0]
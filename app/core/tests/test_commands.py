@@ -2,14 +2,24 @@
 Test custom Django management commands.
 """
 #simulate the db
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 #django helper function to actually call the command by name
 from django.core.management import call_command
+from django.core.management.base import CommandError
 # one possible db error
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from candles.store import CandleStore
+from core.management.commands.save_coins_to_db import create_missing
+from core.models import Base, Coin, Job
+from jobs.queue import Task, enqueue
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -35,4 +45,259 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
         #We know how many time it will call so we check if that is correct
         self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+        patched_check.assert_called_with(databases=['default'])
+
+EXCHANGE_INFO = {
+    'symbols': [
+        {'symbol': 'BTCUSDT'},
+        {'symbol': 'ETHUSDT'},
+        {'symbol': 'LTCETH'},
+        {'symbol': 'ETHBTC'},
+    ],
+}
+
+
+@patch('binance.client.Client')
+class SaveCoinsCommandTests(TestCase):
+    """Test syncing the coin catalog."""
+
+    def test_creates_coins_for_quote_assets(self, patched_client):
+        """Test only pairs quoted in the configured assets are stored."""
+        patched_client.return_value.get_exchange_info.return_value = EXCHANGE_INFO
+
+        call_command('save_coins_to_db', quotes=['USDT', 'ETH'], stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Coin.objects.values_list('name', flat=True)),
+            ['BTCUSDT', 'ETHUSDT', 'LTCETH'],
+        )
+        self.assertEqual(
+            sorted(Base.objects.values_list('name', flat=True)),
+            ['ETH', 'USDT'],
+        )
+
+    def test_only_new_coins_are_inserted(self, patched_client):
+        """Test a second sync inserts just the new listings in one query."""
+        patched_client.return_value.get_exchange_info.return_value = EXCHANGE_INFO
+        call_command('save_coins_to_db', quotes=['USDT'], stdout=StringIO())
+
+        out = StringIO()
+        #a read, a bulk insert and a count before and after, for bases and
+        #coins
+        with self.assertNumQueries(8):
+            call_command('save_coins_to_db', quotes=['USDT', 'ETH'], stdout=out)
+
+        self.assertIn('Created 1 coins', out.getvalue())
+        self.assertEqual(Coin.objects.filter(name='BTCUSDT').count(), 1)
+
+    def test_rows_inserted_elsewhere_are_not_counted(self, patched_client):
+        """Test names another sync stored first aren't reported as created."""
+        Coin.objects.create(name='BTCUSDT')
+
+        #as if the other sync inserted it after the names were read
+        with patch.object(Coin.objects, 'values_list', return_value=[]):
+            created = create_missing(Coin, ['BTCUSDT', 'ETHUSDT'], 1000)
+
+        self.assertEqual(created, 1)
+
+    def test_snapshot_source_and_out(self, patched_client):
+        """Test seeding from a snapshot written by an earlier run."""
+        patched_client.return_value.get_exchange_info.return_value = EXCHANGE_INFO
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'exchange.json.gz')
+            call_command(
+                'save_coins_to_db',
+                quotes=['USDT'],
+                snapshot_out=path,
+                stdout=StringIO(),
+            )
+            Coin.objects.all().delete()
+            patched_client.reset_mock()
+
+            call_command(
+                'save_coins_to_db',
+                source=f'snapshot:{path}',
+                quotes=['USDT'],
+                stdout=StringIO(),
+            )
+
+        patched_client.assert_not_called()
+        self.assertEqual(
+            sorted(Coin.objects.values_list('name', flat=True)),
+            ['BTCUSDT', 'ETHUSDT'],
+        )
+
+    def test_unreadable_source_raises_command_error(self, patched_client):
+        """Test a broken source fails with a CommandError."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'save_coins_to_db',
+                source='snapshot:/does/not/exist.json.gz',
+                stdout=StringIO(),
+            )
+
+
+#2024-01-01T00:00:00Z
+JAN_1 = 1704067200000
+
+
+def write_recording(path, symbols, count, start=JAN_1):
+    """Record count 1m klines per symbol the way --record writes them."""
+    with open(path, 'w') as recording:
+        for symbol in symbols:
+            klines = [
+                [start + i * 60_000, '1', '2', '0.5', str(i), '10']
+                for i in range(count)
+            ]
+            for page in range(0, count, 700):
+                recording.write(json.dumps({
+                    'symbol': symbol,
+                    'interval': '1m',
+                    'klines': klines[page:page + 700],
+                }) + '\n')
+
+
+class SyncCandlesCommandTests(TestCase):
+    """Test syncing klines into the candle store."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        settings = override_settings(CANDLE_STORE_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.recording = os.path.join(tmp.name, 'klines.jsonl')
+        write_recording(self.recording, ['BTCUSDT', 'ETHUSDT'], 2500)
+        Coin.objects.bulk_create([Coin(name='BTCUSDT'), Coin(name='ETHUSDT')])
+
+    def sync(self, **options):
+        out = StringIO()
+        defaults = {
+            'source': f'replay:{self.recording}',
+            'since': '2024-01-01',
+            'until': '2024-01-03',
+            'page_size': 1000,
+            'workers': 2,
+        }
+        call_command('sync_candles', stdout=out, **{**defaults, **options})
+        return out.getvalue()
+
+    def test_backfill_every_coin(self):
+        """Test every coin is backfilled in pages from the replay."""
+        out = self.sync()
+
+        store = CandleStore()
+        for symbol in ['BTCUSDT', 'ETHUSDT']:
+            candles = store.read(symbol, '1m')
+            self.assertEqual(candles.open_time.size, 2500)
+            self.assertEqual(candles.close[-1], 2499)
+        self.assertIn('Stored 5000 1m candles', out)
+
+    def test_resume_from_last_stored_candle(self):
+        """Test a second sync only fetches candles after the stored ones."""
+        self.sync(until='2024-01-02')
+        self.assertEqual(
+            CandleStore().read('BTCUSDT', '1m').open_time.size, 1440,
+        )
+
+        out = self.sync(symbols=['BTCUSDT'])
+
+        self.assertIn('BTCUSDT: 1060 candles', out)
+        self.assertEqual(
+            CandleStore().read('BTCUSDT', '1m').open_time.size, 2500,
+        )
+
+    def test_record_and_replay(self):
+        """Test a recorded sync can be replayed into another store."""
+        recorded = os.path.join(self.tmp, 'recorded.jsonl')
+        self.sync(symbols=['ETHUSDT'], record=recorded)
+
+        other_root = os.path.join(self.tmp, 'other')
+        with override_settings(CANDLE_STORE_ROOT=other_root):
+            self.recording = recorded
+            self.sync(symbols=['ETHUSDT'])
+            replayed = CandleStore().read('ETHUSDT', '1m')
+
+        self.assertEqual(replayed.open_time.size, 2500)
+
+    def test_unknown_source_raises_command_error(self):
+        """Test a missing replay file fails with a CommandError."""
+        self.recording = '/does/not/exist.jsonl'
+        with self.assertRaises(CommandError):
+            self.sync()
+
+    def test_page_size_above_api_limit_raises_command_error(self):
+        """Test pages larger than the API returns are rejected."""
+        with self.assertRaisesRegex(CommandError, '--page-size'):
+            self.sync(page_size=5000)
+
+
+class RunJobsCommandTests(TestCase):
+    """Test the background job worker."""
+
+    @patch.dict('jobs.queue.TASKS', {
+        'echo': Task(lambda job: job.params, None, False),
+    })
+    def test_run_queued_jobs_once(self):
+        """Test queued jobs run until the queue is empty."""
+        first = enqueue('echo', {'n': 1})
+        second = enqueue('echo', {'n': 2})
+        out = StringIO()
+
+        call_command('run_jobs', once=True, stdout=out)
+
+        for job in (first, second):
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.SUCCEEDED)
+            self.assertEqual(job.result, job.params)
+        self.assertIn('stopped after 2 jobs', out.getvalue())
+
+    @patch.dict('jobs.queue.TASKS', {
+        'echo': Task(lambda job: job.params, None, False),
+    })
+    def test_max_jobs(self):
+        """Test the worker exits after --max-jobs."""
+        enqueue('echo')
+        enqueue('echo')
+
+        call_command('run_jobs', max_jobs=1, stdout=StringIO())
+
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+
+class BenchEndpointsCommandTests(TestCase):
+    """Test the endpoint benchmark and its baseline file."""
+
+    def test_baseline_and_compare(self):
+        """Test every endpoint is recorded and compared to a baseline."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'baseline.json')
+            options = {
+                'scale': 0.0005, 'layout_kb': 4, 'repeat': 1,
+                'host': 'testserver', 'stdout': StringIO(),
+            }
+            call_command('bench_endpoints', output=output, **options)
+            with open(output) as f:
+                baseline = json.load(f)
+
+            endpoints = baseline['endpoints']
+            create = endpoints['strategy:strategy-create']
+            self.assertEqual(create['status'], 201)
+            update = endpoints['dashboard:dashboard-update']
+            self.assertEqual(update['status'], 200)
+            self.assertIn('jobs:job-retrieve', endpoints)
+            self.assertGreater(
+                endpoints['strategy:strategy-list']['queries'], 0,
+            )
+            #seeded rows are rolled back
+            self.assertFalse(Coin.objects.filter(name='BENCH0USDT').exists())
+
+            baseline['endpoints']['strategy:strategy-list']['queries'] = 0
+            with open(output, 'w') as f:
+                json.dump(baseline, f)
+            with self.assertRaisesRegex(CommandError, 'regressions'):
+                call_command(
+                    'bench_endpoints', compare=output, threshold=1000,
+                    output=os.path.join(directory, 'run.json'), **options,
+                )
@@ -0,0 +1,66 @@
+"""
+Tests for the exchange info sources.
+"""
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.exchange import (
+    ExchangeInfoServer,
+    HTTPSource,
+    SnapshotSource,
+    get_source,
+    write_snapshot,
+)
+
+
+EXCHANGE_INFO = {
+    'serverTime': 1700000000000,
+    'symbols': [
+        {
+            'symbol': 'BTCUSDT',
+            'status': 'TRADING',
+            'baseAsset': 'BTC',
+            'quoteAsset': 'USDT',
+            'filters': [{'filterType': 'PRICE_FILTER'}],
+        },
+    ],
+}
+
+
+class ExchangeSourceTests(SimpleTestCase):
+    """Test loading exchange info offline."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_snapshot_round_trip(self):
+        """Test a compressed snapshot keeps the catalog fields."""
+        path = os.path.join(self.tmp.name, 'exchange.json.gz')
+        write_snapshot(EXCHANGE_INFO, path)
+
+        info = SnapshotSource(path).get_exchange_info()
+
+        self.assertEqual(info['symbols'], [{
+            'symbol': 'BTCUSDT',
+            'status': 'TRADING',
+            'baseAsset': 'BTC',
+            'quoteAsset': 'USDT',
+        }])
+
+    def test_http_source_reads_local_server(self):
+        """Test the HTTP source against the local stand-in server."""
+        with ExchangeInfoServer(EXCHANGE_INFO) as server:
+            info = HTTPSource(server.url).get_exchange_info()
+
+        self.assertEqual(info, EXCHANGE_INFO)
+
+    def test_get_source_parses_specs(self):
+        """Test source specs map to the matching provider."""
+        self.assertEqual(str(get_source('binance')), 'binance')
+        self.assertIsInstance(get_source('http://localhost/x'), HTTPSource)
+        self.assertIsInstance(get_source('snapshot:/tmp/x.gz'), SnapshotSource)
+        with self.assertRaises(ValueError):
+            get_source('/does/not/exist.json')
@@ -0,0 +1,99 @@
+"""
+Tests for the tunable password hashers.
+"""
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model, hashers
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+ARGON2_HASHERS = [
+    'core.hashers.Argon2PasswordHasher',
+    'core.hashers.PBKDF2PasswordHasher',
+]
+
+
+class HasherSettingsTests(SimpleTestCase):
+    """Test the hashing costs follow the settings."""
+
+    def test_test_run_uses_fast_hasher(self):
+        """Test the test runner hashes with the fast profile."""
+        self.assertEqual(settings.PASSWORD_HASHER_PROFILE, 'fast')
+        self.assertEqual(get_hasher().algorithm, 'md5')
+
+    @override_settings(
+        PASSWORD_ARGON2_TIME_COST=1,
+        PASSWORD_ARGON2_MEMORY_COST=256,
+        PASSWORD_ARGON2_PARALLELISM=1,
+    )
+    def test_argon2_costs_from_settings(self):
+        """Test argon2 hashes record the configured costs."""
+        hasher = Argon2PasswordHasher()
+        encoded = hasher.encode('secret', hasher.salt())
+
+        self.assertIn('m=256,t=1,p=1', encoded)
+        self.assertTrue(hasher.verify('secret', encoded))
+
+    def test_cost_change_needs_update(self):
+        """Test a hash made with another cost must be updated."""
+        hasher = BCryptSHA256PasswordHasher()
+        with override_settings(PASSWORD_BCRYPT_ROUNDS=4):
+            encoded = hasher.encode('secret', hasher.salt())
+            self.assertFalse(hasher.must_update(encoded))
+        with override_settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.assertTrue(hasher.must_update(encoded))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=None)
+    def test_pbkdf2_defaults_to_django(self):
+        """Test Django's hashes aren't rehashed down without the setting."""
+        django_hasher = hashers.PBKDF2PasswordHasher()
+        encoded = django_hasher.encode('secret', django_hasher.salt())
+
+        self.assertEqual(
+            PBKDF2PasswordHasher().iterations,
+            hashers.PBKDF2PasswordHasher.iterations,
+        )
+        self.assertFalse(PBKDF2PasswordHasher().must_update(encoded))
+
+
+@override_settings(
+    PASSWORD_HASHERS=ARGON2_HASHERS,
+    PASSWORD_ARGON2_TIME_COST=1,
+    PASSWORD_ARGON2_MEMORY_COST=256,
+    PASSWORD_ARGON2_PARALLELISM=1,
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class RehashOnLoginTests(TestCase):
+    """Test stored hashes are upgraded when users log in."""
+
+    def _login(self, user):
+        authenticated = authenticate(username=user.email, password='secret')
+        self.assertEqual(authenticated, user)
+        user.refresh_from_db()
+        return user.password
+
+    def test_cost_change_rehashes_on_login(self):
+        """Test logging in rewrites a hash made with an old cost."""
+        user = get_user_model().objects.create_user(
+            email='rehash@example.com',
+            password='secret',
+        )
+        with override_settings(PASSWORD_ARGON2_TIME_COST=2):
+            password = self._login(user)
+
+        self.assertIn('t=2', password)
+
+    def test_other_algorithm_rehashes_on_login(self):
+        """Test a PBKDF2 hash is replaced by the preferred hasher."""
+        user = get_user_model().objects.create_user(email='old@example.com')
+        user.password = get_hasher('pbkdf2_sha256').encode('secret', 'salt')
+        user.save()
+
+        password = self._login(user)
+
+        self.assertEqual(identify_hasher(password).algorithm, 'argon2')
@@ -0,0 +1,64 @@
+"""
+Tests for the layout patch helpers.
+"""
+from django.test import SimpleTestCase
+
+from core.layout import (
+    JSONPatchError,
+    apply_json_patch,
+    apply_merge_patch,
+)
+
+
+class JSONPatchTests(SimpleTestCase):
+    """Test RFC 6902 operations."""
+
+    def test_move_and_copy(self):
+        """Test move and copy touch both fields."""
+        document = {'a': {'x': [1, 2]}, 'b': {}}
+        touched = apply_json_patch(document, [
+            {'op': 'copy', 'from': '/a/x/0', 'path': '/b/first'},
+            {'op': 'move', 'from': '/a/x', 'path': '/b/x'},
+        ])
+
+        self.assertEqual(document, {'a': {}, 'b': {'first': 1, 'x': [1, 2]}})
+        self.assertEqual(touched, {'a', 'b'})
+
+    def test_escaped_pointer(self):
+        """Test ~0 and ~1 escapes in paths."""
+        document = {'a': {'c/d': 1, 'e~f': 2}}
+        apply_json_patch(document, [
+            {'op': 'remove', 'path': '/a/c~1d'},
+            {'op': 'replace', 'path': '/a/e~0f', 'value': 3},
+        ])
+
+        self.assertEqual(document, {'a': {'e~f': 3}})
+
+    def test_invalid_operations(self):
+        """Test bad paths and ops raise JSONPatchError."""
+        bad_patches = [
+            [{'op': 'remove', 'path': '/a/missing'}],
+            [{'op': 'add', 'path': '/a/list/5', 'value': 1}],
+            [{'op': 'replace', 'path': '', 'value': 1}],
+            [{'op': 'frobnicate', 'path': '/a'}],
+            {'op': 'add'},
+        ]
+        for patch in bad_patches:
+            with self.assertRaises(JSONPatchError):
+                apply_json_patch({'a': {'list': []}}, patch)
+
+
+class MergePatchTests(SimpleTestCase):
+    """Test RFC 7396 merge patches."""
+
+    def test_merge_patch(self):
+        """Test nulls remove keys and objects merge recursively."""
+        target = {'a': 'b', 'c': {'d': 'e', 'f': 'g'}}
+
+        result = apply_merge_patch(target, {'a': 'z', 'c': {'f': None}})
+
+        self.assertEqual(result, {'a': 'z', 'c': {'d': 'e'}})
+
+    def test_non_object_patch_replaces(self):
+        """Test a non object patch replaces the target."""
+        self.assertEqual(apply_merge_patch({'a': 1}, [1, 2]), [1, 2])
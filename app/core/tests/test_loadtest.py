@@ -0,0 +1,27 @@
+"""
+Tests for the HTTP load generator.
+"""
+from django.test import SimpleTestCase
+
+from core.exchange import ExchangeInfoServer
+from core.loadtest import run_load
+
+
+class RunLoadTests(SimpleTestCase):
+    """Test the load generator against a local HTTP server."""
+
+    def test_requests_spread_over_connections(self):
+        """Test every request is sent and timed."""
+        with ExchangeInfoServer({'symbols': []}) as server:
+            result = run_load(server.url, requests=10, concurrency=3)
+
+        self.assertEqual(len(result['durations']), 10)
+        self.assertEqual(result['statuses'], {200: 10})
+        self.assertEqual(result['errors'], [])
+
+    def test_error_statuses_are_counted(self):
+        """Test non 200 responses are reported by status."""
+        with ExchangeInfoServer({'symbols': []}) as server:
+            result = run_load(server.url + 'missing', requests=2, concurrency=1)
+
+        self.assertEqual(result['statuses'], {404: 2})
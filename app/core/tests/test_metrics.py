@@ -0,0 +1,170 @@
+"""
+Tests for the metrics registry and /metrics.
+"""
+import multiprocessing
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.metrics import Registry, mark_process_dead
+
+
+def _count_in_child(directory):
+    registry = Registry(directory)
+    registry.counter('jobs_total', 'Jobs.', ('kind',)).inc(2, kind='sync')
+    registry.gauge('busy', 'Busy.').set(1)
+
+
+class RegistryTests(SimpleTestCase):
+    """Test metric values and their exposition."""
+
+    def test_exposition(self):
+        """Test counters and cumulative histogram buckets."""
+        registry = Registry()
+        counter = registry.counter('jobs_total', 'Jobs run.', ('kind',))
+        histogram = registry.histogram(
+            'job_seconds', 'Job time.', buckets=(0.1, 1.0),
+        )
+
+        counter.inc(kind='sync')
+        counter.inc(2, kind='sync')
+        for seconds in (0.05, 0.5, 0.7, 3):
+            histogram.observe(seconds)
+
+        text = registry.exposition()
+        self.assertIn('# TYPE jobs_total counter\n', text)
+        self.assertIn('jobs_total{kind="sync"} 3.0\n', text)
+        self.assertIn('job_seconds_bucket{le="0.1"} 1.0\n', text)
+        self.assertIn('job_seconds_bucket{le="1.0"} 3.0\n', text)
+        self.assertIn('job_seconds_bucket{le="+Inf"} 4.0\n', text)
+        self.assertIn('job_seconds_sum 4.25\n', text)
+        self.assertIn('job_seconds_count 4.0\n', text)
+
+    def test_wrong_labels(self):
+        """Test every label must be given."""
+        counter = Registry().counter('jobs_total', 'Jobs.', ('kind',))
+
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+    def test_multiprocess_values_add_up(self):
+        """Test values written by other processes are aggregated."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = Registry(directory)
+            counter = registry.counter('jobs_total', 'Jobs.', ('kind',))
+            gauge = registry.gauge('busy', 'Busy.')
+            counter.inc(kind='sync')
+            gauge.set(1)
+
+            child = multiprocessing.get_context('fork').Process(
+                target=_count_in_child, args=(directory,),
+            )
+            child.start()
+            child.join()
+
+            text = registry.exposition()
+            self.assertIn('jobs_total{kind="sync"} 3.0\n', text)
+            self.assertIn('busy 2.0\n', text)
+
+            #an exited worker's gauges go, its counts stay
+            mark_process_dead(child.pid, directory)
+            text = registry.exposition()
+            self.assertIn('jobs_total{kind="sync"} 3.0\n', text)
+            self.assertIn('busy 1.0\n', text)
+
+    def test_values_file_grows(self):
+        """Test more keys than fit the initial file are kept."""
+        with tempfile.TemporaryDirectory() as directory:
+            values = metrics.MmapValues(os.path.join(directory, 'v.db'))
+            for i in range(3000):
+                values.add(f'key-{i}', i)
+            values.close()
+
+            read = metrics.read_values(os.path.join(directory, 'v.db'))
+
+        self.assertEqual(len(read), 3000)
+        self.assertEqual(read['key-2999'], 2999)
+
+
+class MetricsEndpointTests(TestCase):
+    """Test requests are recorded and served at /metrics."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(
+            METRICS_DIR=tmp.name, METRICS_TOKEN='secret',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+
+    def _metrics(self):
+        return self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+        )
+
+    def test_requests_by_route_and_action(self):
+        """Test counts per route and latency per viewset action."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test123',
+        )
+        self.client.force_authenticate(user)
+        self.client.get(reverse('strategy:strategy-list'))
+
+        res = self._metrics()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",route="strategy:strategy-list",'
+            'status="200"} 1.0',
+            text,
+        )
+        self.assertIn(
+            'viewset_action_duration_seconds_count{action="list",'
+            'viewset="StrategyViewSet"} 1.0',
+            text,
+        )
+
+    def test_unknown_methods_share_a_label(self):
+        """Test client chosen methods don't create new label values."""
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, reverse('strategy:strategy-list'))
+
+        text = self._metrics().content.decode()
+
+        self.assertIn('method="other"', text)
+        self.assertNotIn('FOO', text)
+        self.assertNotIn('BAR', text)
+
+    def test_token_required(self):
+        """Test /metrics asks for the token when one is set."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+
+        self.assertEqual(self._metrics().status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_staff_only_without_token(self):
+        """Test /metrics isn't public when no token is configured."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test123',
+        )
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        res = self.client.get(reverse('metrics'))
+
+        self.assertEqual(res.status_code, 200)
+        with override_settings(DEBUG=True):
+            self.client.logout()
+            res = self.client.get(reverse('metrics'))
+        self.assertEqual(res.status_code, 200)
@@ -1,6 +1,7 @@
 """
 Tests for models.
 """
+from django.db import IntegrityError
 from django.test import TestCase
 #get default user for the project, best practice to use it to get refrence
 from django.contrib.auth import get_user_model
@@ -98,3 +99,10 @@ class ModelTests(TestCase):
         )
         self.assertEqual(str(dashboard), dashboard.gridConfig)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user can't have two tags with the same name."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
@@ -0,0 +1,140 @@
+"""
+Tests for the connection pool and the pooled PostgreSQL backend.
+"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from django.test import SimpleTestCase
+
+from core.db.backends.pooled_postgresql import base
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection."""
+
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=0)
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test handing out and taking back connections."""
+
+    def test_released_connection_is_reused(self):
+        """Test a released connection is handed out again."""
+        pool = ConnectionPool(FakeConnection, max_size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_open_transaction_is_rolled_back(self):
+        """Test a connection is released without its transaction."""
+        pool = ConnectionPool(FakeConnection)
+        connection = pool.acquire()
+        connection.info.transaction_status = 2
+        pool.release(connection)
+
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_broken_connection_is_replaced(self):
+        """Test a closed idle connection is discarded on acquire."""
+        pool = ConnectionPool(FakeConnection)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.closed = 1
+
+        self.assertIsNot(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['discarded'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_ping_failure_discards_connection(self):
+        """Test PING checks idle connections with a query."""
+        connection = FakeConnection()
+        connection.cursor = Mock(side_effect=Exception('server gone'))
+        connect = Mock(side_effect=[connection, FakeConnection()])
+        pool = ConnectionPool(connect, ping=True)
+        pool.release(pool.acquire())
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(connect.call_count, 2)
+
+    def test_exhausted_pool_times_out(self):
+        """Test acquire gives up when every connection is in use."""
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_waiter_gets_released_connection(self):
+        """Test a blocked acquire is woken up by a release."""
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=5)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        pool.release(connection)
+        waiter.join(5)
+
+        self.assertEqual(acquired, [connection])
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect does not leak pool capacity."""
+        connect = Mock(side_effect=[OSError('refused'), FakeConnection()])
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertIsInstance(pool.acquire(), FakeConnection)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """Test the backend borrows and returns pooled connections."""
+    alias = 'pool-test'
+
+    def setUp(self):
+        base._pools.pop(self.alias, None)
+        self.addCleanup(base._pools.pop, self.alias, None)
+        self.wrapper = base.DatabaseWrapper({
+            'ENGINE': 'core.db.backends.pooled_postgresql',
+            'NAME': 'test', 'USER': '', 'PASSWORD': '', 'HOST': '',
+            'PORT': '', 'OPTIONS': {}, 'TIME_ZONE': None, 'TEST': {},
+            'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+            'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+            'POOL': {'MAX_SIZE': 2},
+        }, alias=self.alias)
+        self.driver = Mock()
+        self.driver.connect.side_effect = lambda **params: FakeConnection()
+        self.wrapper.Database._database = self.driver
+
+    def test_close_returns_connection_to_pool(self):
+        """Test closing keeps the connection for the next connect."""
+        connection = self.wrapper.Database.connect(dbname='test')
+        self.wrapper.connection = connection
+        self.wrapper._close()
+
+        self.assertFalse(connection.closed)
+        self.assertIs(self.wrapper.Database.connect(dbname='test'), connection)
+        self.driver.connect.assert_called_once_with(dbname='test')
+        self.assertEqual(base.get_pools()[self.alias].stats()['reused'], 1)
+
+    def test_driver_attributes_are_forwarded(self):
+        """Test the driver proxy still exposes the exception classes."""
+        self.assertIs(self.wrapper.Database.Error, self.driver.Error)
@@ -0,0 +1,75 @@
+"""
+Tests for the serializer driven query planner.
+"""
+from django.test import SimpleTestCase
+from rest_framework import serializers
+
+from core.models import Strategy
+from core.queryplan import get_only_fields, get_related_lookups
+from dashboard.serializers import (
+    DashboardSerializer,
+    DashboardSummarySerializer,
+)
+from strategy.serializers import (
+    StrategySerializer,
+    StrategyDetailSerializer,
+    TagSerializer,
+)
+
+
+class QueryPlanTests(SimpleTestCase):
+    """Test lookups derived from serializers."""
+
+    def test_strategy_serializer_lookups(self):
+        """Test m2m fields are prefetched and pk-only fks are skipped."""
+        select, prefetch = get_related_lookups(StrategySerializer)
+
+        self.assertEqual(select, ())
+        self.assertEqual(set(prefetch), {'coins', 'tags', 'indicators'})
+
+    def test_detail_serializer_lookups(self):
+        """Test the detail serializer plans the same relations."""
+        self.assertEqual(
+            get_related_lookups(StrategyDetailSerializer),
+            get_related_lookups(StrategySerializer),
+        )
+
+    def test_nested_fk_is_selected(self):
+        """Test a nested serializer on a fk is joined."""
+        class NestedBaseSerializer(serializers.ModelSerializer):
+            base = serializers.StringRelatedField()
+            tags = TagSerializer(many=True)
+
+            class Meta:
+                model = Strategy
+                fields = ['id', 'base', 'tags']
+
+        select, prefetch = get_related_lookups(NestedBaseSerializer)
+
+        self.assertEqual(select, ('base',))
+        self.assertEqual(prefetch, ('tags',))
+
+    def test_only_fields_follow_rendered_fields(self):
+        """Test only the rendered columns are loaded."""
+        self.assertEqual(
+            get_only_fields(DashboardSummarySerializer),
+            ('description', 'id', 'version'),
+        )
+        self.assertEqual(
+            get_only_fields(DashboardSerializer),
+            ('description', 'gridConfig', 'id', 'version'),
+        )
+
+    def test_only_fields_unknown_for_method_fields(self):
+        """Test fields without a model column disable only()."""
+        class MethodSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Strategy
+                fields = ['id', 'label']
+
+            def get_label(self, obj):
+                return str(obj.id)
+
+        self.assertIsNone(get_only_fields(MethodSerializer))
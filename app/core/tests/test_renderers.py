@@ -0,0 +1,111 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+DATA = ReturnDict({
+    'price': Decimal('1.25'),
+    'created': datetime.datetime(2024, 1, 2, 3, 4, 5, 678000,
+                                 tzinfo=datetime.timezone.utc),
+    'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+    'day': datetime.date(2024, 1, 2),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'window': datetime.timedelta(minutes=5),
+    'label': gettext_lazy('Dashboard'),
+    'names': ('BTCUSDT', 'ETHUSDT'),
+    'by_id': {1: 'a'},
+    'note': 'line\u2028break',
+}, serializer=None)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson output matches DRF's renderer."""
+
+    def test_same_as_stdlib(self):
+        """Test Decimal, datetime, UUID and friends render like DRF."""
+        self.assertEqual(
+            FastJSONRenderer().render(DATA), JSONRenderer().render(DATA),
+        )
+
+    def test_indent_uses_stdlib(self):
+        """Test indented output, e.g. for the browsable API."""
+        renderer = FastJSONRenderer()
+        media_type = 'application/json; indent=2'
+
+        self.assertEqual(
+            renderer.render({'a': 1}, media_type),
+            JSONRenderer().render({'a': 1}, media_type),
+        )
+
+    def test_big_integers(self):
+        """Test integers orjson can't encode render with the stdlib."""
+        data = {'n': 123456789012345678901234567890}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data),
+        )
+
+    def test_none(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    @patch('core.renderers.orjson', None)
+    def test_stdlib_fallback(self):
+        """Test rendering without orjson installed."""
+        self.assertEqual(
+            FastJSONRenderer().render(DATA), JSONRenderer().render(DATA),
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test JSON bodies parse like with DRF's parser."""
+
+    def _parse(self, body, encoding='utf-8'):
+        return FastJSONParser().parse(
+            io.BytesIO(body), 'application/json', {'encoding': encoding},
+        )
+
+    def test_parse(self):
+        """Test a UTF-8 body."""
+        self.assertEqual(
+            self._parse('{"name": "Ünïcode", "n": [1, 2.5]}'.encode()),
+            {'name': 'Ünïcode', 'n': [1, 2.5]},
+        )
+
+    def test_big_integers(self):
+        """Test integers beyond 64 bits are parsed exactly."""
+        self.assertEqual(
+            self._parse(b'{"n": 123456789012345678901234567890}'),
+            {'n': 123456789012345678901234567890},
+        )
+
+    def test_invalid(self):
+        """Test invalid JSON and NaN raise ParseError."""
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self._parse(body)
+
+    def test_other_encoding(self):
+        """Test bodies in other encodings use the stdlib parser."""
+        body = '{"name": "caf\xe9"}'.encode('latin-1')
+
+        self.assertEqual(
+            self._parse(body, 'latin-1'),
+            JSONParser().parse(
+                io.BytesIO(body), None, {'encoding': 'latin-1'},
+            ),
+        )
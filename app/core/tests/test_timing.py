@@ -0,0 +1,90 @@
+"""
+Tests for the Server-Timing instrumentation.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Coin, Strategy
+
+STRATEGY_URL = reverse('strategy:strategy-list')
+
+
+def parse_server_timing(header):
+    """Return {name: (dur, desc)} of a Server-Timing header."""
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(params['dur']), params.get('desc'))
+    return metrics
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingTests(TestCase):
+    """Test sampled requests report where their time went."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'test123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        for _ in range(3):
+            strategy = Strategy.objects.create(user=self.user, base=coin)
+            strategy.coins.add(coin)
+
+    def test_header_and_log_line(self):
+        """Test queries, serializer and render time are reported."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with self.assertNumQueries(4) as queries:
+                res = self.client.get(STRATEGY_URL)
+
+        metrics = parse_server_timing(res['Server-Timing'])
+        self.assertEqual(
+            set(metrics), {'db', 'serialize', 'render', 'total'},
+        )
+        self.assertEqual(
+            metrics['db'][1], f'"{len(queries.captured_queries)} queries"',
+        )
+        self.assertGreaterEqual(metrics['total'][0], metrics['render'][0])
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], STRATEGY_URL)
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['queries'], 4)
+        self.assertIn('serialize_ms', line)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Test requests outside the sample are left alone."""
+        res = self.client.get(STRATEGY_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class AsyncServerTimingTests(TestCase):
+    """Test async views are timed without losing their queries."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test123',
+        )
+        self.token = Token.objects.create(user=user)
+
+    async def test_async_view_queries_counted(self):
+        """Test ORM calls of an async view are counted."""
+        res = await AsyncClient().get(
+            reverse('strategy-async:strategy-list'),
+            headers={'authorization': f'Token {self.token.key}'},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        metrics = parse_server_timing(res['Server-Timing'])
+        self.assertIn('total', metrics)
+        self.assertIn('db', metrics)
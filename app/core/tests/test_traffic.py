@@ -0,0 +1,202 @@
+"""
+Tests for traffic capture and replay.
+"""
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from rest_framework.test import APIClient
+
+from core.traffic import (
+    TrafficCaptureMiddleware, anonymize, get_writer, pseudonym,
+)
+
+STRATEGY_URL = reverse('strategy:strategy-list')
+CREATE_USER_URL = reverse('user:create')
+
+
+class AnonymizeTests(SimpleTestCase):
+    """Test secrets are removed from captured bodies."""
+
+    def test_secrets_and_emails(self):
+        """Test secret keys are redacted and e-mails masked anywhere."""
+        body = {
+            'password': 'hunter2',
+            'tags': [{'name': 'Mail me at a.b@example.com'}],
+            'Token': 'abc',
+            'coins': [1, 2],
+        }
+
+        self.assertEqual(anonymize(body), {
+            'password': 'redacted',
+            'tags': [{'name': 'Mail me at redacted'}],
+            'Token': 'redacted',
+            'coins': [1, 2],
+        })
+
+
+class TrafficCaptureTests(TestCase):
+    """Test sampled API requests are appended to the capture file."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'traffic.jsonl')
+        settings = override_settings(
+            TRAFFIC_CAPTURE_PATH=self.path, TRAFFIC_CAPTURE_SAMPLE_RATE=1,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+
+    def _captured(self):
+        get_writer(self.path).flush()
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_anonymized_records(self):
+        """Test requests are captured without credentials."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test123',
+        )
+        self.client.force_authenticate(user)
+        self.client.get(STRATEGY_URL, {'limit': 5, 'token': 'abc'})
+        self.client.force_authenticate(None)
+        self.client.post(CREATE_USER_URL, {
+            'email': 'new@example.com', 'password': 'secret123',
+            'name': 'New User',
+        }, format='json')
+
+        listed, created = self._captured()
+        self.assertEqual(listed['method'], 'GET')
+        self.assertEqual(
+            listed['path'], f'{STRATEGY_URL}?limit=5&token=redacted',
+        )
+        self.assertEqual(listed['route'], 'strategy:strategy-list')
+        self.assertEqual(listed['status'], 200)
+        self.assertEqual(listed['user'], pseudonym(user.pk))
+        self.assertEqual(created['route'], 'user:create')
+        self.assertEqual(created['body'], {
+            'email': 'redacted', 'password': 'redacted', 'name': 'redacted',
+        })
+        self.assertIsNone(created['user'])
+
+    def test_only_api_requests(self):
+        """Test requests outside /api/ are not captured."""
+        self.client.get('/metrics')
+
+        self.assertFalse(os.path.exists(self.path))
+
+    async def test_async_requests_leave_the_user_unloaded(self):
+        """Test the async path only records a user that was loaded."""
+        user = get_user_model()(pk=7, email='user@example.com')
+
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = TrafficCaptureMiddleware(get_response)
+        lazy = RequestFactory().get(STRATEGY_URL)
+        lazy.user = SimpleLazyObject(lambda: self.fail('user was loaded'))
+        await middleware(lazy)
+        loaded = RequestFactory().get(STRATEGY_URL)
+        loaded.user = SimpleLazyObject(lambda: user)
+        loaded._cached_user = user
+        await middleware(loaded)
+
+        first, second = self._captured()
+        self.assertIsNone(first['user'])
+        self.assertEqual(second['user'], pseudonym(7))
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Answer every request with 200 and remember it."""
+    protocol_version = 'HTTP/1.1'
+    seen = []
+
+    def _answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.seen.append((
+            self.command, self.path, self.headers.get('Authorization'),
+            self.rfile.read(length),
+        ))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayTrafficCommandTests(SimpleTestCase):
+    """Test captured traffic is re-sent and reported."""
+
+    def setUp(self):
+        RecordingHandler.seen = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,),
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'traffic.jsonl')
+        records = [
+            {'ts': 2.0, 'method': 'GET', 'path': '/api/a/?limit=5',
+             'route': 'a-list'},
+            {'ts': 1.0, 'method': 'POST', 'path': '/api/a/',
+             'route': 'a-list', 'body': {'name': 'x'}},
+            {'ts': 3.0, 'method': 'GET', 'path': '/api/b/1/',
+             'route': 'b-detail'},
+        ]
+        with open(self.path, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+
+    def _replay(self, **options):
+        out = StringIO()
+        host, port = self.server.server_address
+        call_command(
+            'replay_traffic', self.path, base_url=f'http://{host}:{port}',
+            speed=0, token='abc', stdout=out, **options,
+        )
+        return out.getvalue()
+
+    def test_reads_only_by_default(self):
+        """Test GET requests are replayed with the token and reported."""
+        out = self._replay(concurrency=1)
+
+        self.assertEqual(RecordingHandler.seen, [
+            ('GET', '/api/a/?limit=5', 'Token abc', b''),
+            ('GET', '/api/b/1/', 'Token abc', b''),
+        ])
+        self.assertIn('a-list', out)
+        self.assertIn('b-detail', out)
+        self.assertIn('Statuses: 200=2', out)
+
+    def test_write_requests(self):
+        """Test --write also sends bodies, in captured order."""
+        self._replay(concurrency=1, write=True)
+
+        self.assertEqual(
+            [request[:2] for request in RecordingHandler.seen],
+            [('POST', '/api/a/'), ('GET', '/api/a/?limit=5'),
+             ('GET', '/api/b/1/')],
+        )
+        body = RecordingHandler.seen[0][3]
+        self.assertEqual(json.loads(body), {'name': 'x'})
@@ -0,0 +1,186 @@
+"""
+Per-request timings, sent as a Server-Timing header and logged.
+
+ServerTimingMiddleware measures a sample of the requests (setting
+SERVER_TIMING_SAMPLE_RATE). For those it records:
+
+    db         SQL time and query count, from an execute wrapper
+    serialize  time in serializer.data, for views with TimedViewMixin
+    render     time rendering a DRF response
+    total      time spent in the middleware chain below this one
+
+The timings of the current request live in a context variable, so ORM
+calls made through sync_to_async by the async views are counted as well.
+Requests that aren't sampled only pay for a random() call and a context
+variable lookup per query.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('core.timing')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Durations in seconds of the phases of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.durations = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self):
+        """Return the Server-Timing header value."""
+        metrics = []
+        for name, seconds in self.durations.items():
+            metric = f'{name};dur={seconds * 1000:.2f}'
+            if name == 'db':
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        data = {
+            f'{name}_ms': round(seconds * 1000, 2)
+            for name, seconds in self.durations.items()
+        }
+        data['queries'] = self.queries
+        return data
+
+
+def current_timings():
+    """Return the timings of the request being sampled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's name."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def query_timer(execute, sql, params, many, context):
+    """Execute wrapper counting queries of sampled requests."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - start)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver adding query_timer once per connection."""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of the requests, see the module docstring.
+
+    Put it first in MIDDLEWARE so total covers the whole stack. It works
+    under WSGI and ASGI without moving async views to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        #DRF responses render right after the last of these hooks
+        timings = _current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.add('render', time.perf_counter() - start)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, timings):
+        timings.add('total', time.perf_counter() - timings.started)
+        response['Server-Timing'] = timings.header()
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }))
+        return response
+
+
+class TimedViewMixin:
+    """
+    Record the time DRF serializers of a view spend producing data.
+
+    Wraps to_representation of the serializers from get_serializer, so
+    lazy queries the serializer triggers are part of serialize as well
+    as of db.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None:
+            to_representation = serializer.to_representation
+
+            def timed_to_representation(instance):
+                with timed('serialize'):
+                    return to_representation(instance)
+
+            serializer.to_representation = timed_to_representation
+        return serializer
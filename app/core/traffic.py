@@ -0,0 +1,298 @@
+"""
+Capture of sampled API requests as JSON lines, for replay_traffic.
+
+TrafficCaptureMiddleware records a sample (TRAFFIC_CAPTURE_SAMPLE_RATE)
+of the /api/ requests to TRAFFIC_CAPTURE_PATH, one JSON object a line:
+
+    ts           unix time the request arrived
+    method       HTTP method
+    path         path and query string, secrets in the query redacted
+    route        resolved URL name, e.g. strategy:strategy-detail
+    content_type request content type
+    body         JSON body with secrets redacted, or null
+    body_bytes   size of the request body
+    user         pseudonym of the authenticated user, or null
+    status       response status code
+    duration_ms  time spent in the middleware chain below this one
+
+Credentials never reach the file: headers aren't recorded, values of
+keys such as password or token are replaced, e-mail addresses in the
+body are masked, account endpoints keep only the keys of their bodies
+and users are only known by a keyed hash of their id.
+
+Lines are handed to a JsonlWriter, whose background thread appends them
+in batches, so requests don't wait for the disk. When the writer falls
+behind, lines are dropped instead of queueing without bound.
+"""
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http.request import RawPostDataException
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger('core.traffic')
+
+REDACTED = 'redacted'
+#body and query keys whose values are never captured
+SECRET_KEYS = frozenset({
+    'password', 'password2', 'old_password', 'new_password', 'token',
+    'key', 'secret', 'api_key', 'api_secret', 'authorization', 'email',
+})
+EMAIL_RE = re.compile(r'[^@\s"]+@[^@\s"]+\.[^@\s"]+')
+
+
+def pseudonym(user_id):
+    """Return a stable pseudonym of a user id that can't be reversed."""
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), str(user_id).encode(), hashlib.sha256,
+    )
+    return digest.hexdigest()[:16]
+
+
+def anonymize(value):
+    """Return a copy of parsed JSON with secrets and e-mails removed."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in SECRET_KEYS
+            else anonymize(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [anonymize(item) for item in value]
+    if isinstance(value, str):
+        return EMAIL_RE.sub(REDACTED, value)
+    return value
+
+
+def anonymize_query(query):
+    """Return a query string with the values of secret keys redacted."""
+    if not query:
+        return ''
+    return urlencode([
+        (key, REDACTED if key.lower() in SECRET_KEYS else value)
+        for key, value in parse_qsl(query, keep_blank_values=True)
+    ])
+
+
+def resolved_user(request):
+    """
+    Return the user of request if it was already loaded, else None.
+
+    AuthenticationMiddleware sets a lazy user that queries the database
+    when first used, which raises SynchronousOnlyOperation from async
+    code. DRF replaces it by the user it authenticated.
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return getattr(request, '_cached_user', None)
+    return user
+
+
+_FLUSH = object()
+
+
+class JsonlWriter:
+    """
+    Append JSON lines to a file from a background thread.
+
+    write() only puts the record on a bounded queue. The thread writes
+    what has queued up with one os.write on an O_APPEND descriptor, so
+    several processes can share the file without splitting each other's
+    lines. The thread starts on the first write in each process, which
+    keeps the writer safe to create before a server forks its workers.
+    """
+
+    def __init__(self, path, max_queue=10000, batch_size=500,
+                 flush_interval=1.0):
+        self.path = path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(
+                target=self._run, name='traffic-writer', daemon=True,
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def write(self, record):
+        """Queue record, return False if it was dropped."""
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        if self._pid == os.getpid():
+            #ends the batch being gathered instead of waiting for it to fill
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def _run(self):
+        records = self._queue
+        while True:
+            batch = [records.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _FLUSH and len(batch) < self.batch_size:
+                try:
+                    batch.append(records.get(
+                        timeout=max(deadline - time.monotonic(), 0),
+                    ))
+                except queue.Empty:
+                    break
+            try:
+                self._append([
+                    record for record in batch if record is not _FLUSH
+                ])
+            except OSError:
+                logger.exception('Cannot write traffic to %s', self.path)
+            finally:
+                for _ in batch:
+                    records.task_done()
+
+    def _append(self, batch):
+        if not batch:
+            return
+        data = ''.join(
+            json.dumps(record, separators=(',', ':')) + '\n'
+            for record in batch
+        ).encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+
+_writers = {}
+
+
+def get_writer(path):
+    """Return the process wide writer of path."""
+    writer = _writers.get(path)
+    if writer is None:
+        writer = _writers.setdefault(path, JsonlWriter(path))
+    return writer
+
+
+@atexit.register
+def flush_writers():
+    """Write out what is still queued, e.g. when a worker exits."""
+    for writer in list(_writers.values()):
+        writer.flush()
+
+
+class TrafficCaptureMiddleware:
+    """
+    Capture a sample of the /api/ requests, see the module docstring.
+
+    Put it near the top of MIDDLEWARE, before anything that reads the
+    request body, so the body can still be read here.
+    """
+    sync_capable = True
+    async_capable = True
+    prefix = '/api/'
+    #account endpoints, whose bodies are captured by their keys only
+    private_prefixes = ('/api/user/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        record = self._start(request)
+        if record is None:
+            return self.get_response(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._finish(request, response, record, start,
+                     getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        record = self._start(request)
+        if record is None:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._finish(request, response, record, start, resolved_user(request))
+        return response
+
+    def _start(self, request):
+        """Return the request part of the record if request is sampled."""
+        rate = settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+        if (
+            not settings.TRAFFIC_CAPTURE_PATH
+            or not request.path.startswith(self.prefix)
+            or rate <= 0
+            or (rate < 1 and random.random() >= rate)
+        ):
+            return None
+
+        query = anonymize_query(request.META.get('QUERY_STRING', ''))
+        content_type = request.content_type
+        try:
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            size = 0
+        body = None
+        if 0 < size <= settings.TRAFFIC_CAPTURE_MAX_BODY \
+                and content_type == 'application/json':
+            try:
+                body = anonymize(json.loads(request.body))
+            except (RawPostDataException, ValueError):
+                body = None
+            if isinstance(body, dict) \
+                    and request.path.startswith(self.private_prefixes):
+                body = dict.fromkeys(body, REDACTED)
+        return {
+            'ts': round(time.time(), 3),
+            'method': request.method,
+            'path': request.path + (f'?{query}' if query else ''),
+            'route': None,
+            'content_type': content_type,
+            'body': body,
+            'body_bytes': size,
+        }
+
+    def _finish(self, request, response, record, start, user):
+        match = request.resolver_match
+        record.update(
+            route=match.view_name if match is not None else None,
+            user=(
+                pseudonym(user.pk)
+                if user is not None and user.is_authenticated else None
+            ),
+            status=response.status_code,
+            duration_ms=round((time.perf_counter() - start) * 1000, 3),
+        )
+        get_writer(settings.TRAFFIC_CAPTURE_PATH).write(record)
@@ -0,0 +1,21 @@
+"""
+URL mappings for the async dashboard read endpoints.
+"""
+from django.urls import path
+
+from dashboard import async_views
+
+app_name = 'dashboard-async'
+
+urlpatterns = [
+    path(
+        'dashboards/',
+        async_views.DashboardListView.as_view(),
+        name='dashboard-list',
+    ),
+    path(
+        'dashboards/<int:pk>/',
+        async_views.DashboardDetailView.as_view(),
+        name='dashboard-detail',
+    ),
+]
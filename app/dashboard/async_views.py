@@ -0,0 +1,26 @@
+"""
+Async read views for dashboards.
+"""
+from core.async_views import AsyncDetailView, AsyncListView
+from core.models import Dashboard
+from dashboard import serializers
+
+
+class DashboardListView(AsyncListView):
+    """List the dashboards of the authenticated user, without layouts."""
+    queryset = Dashboard.objects.all()
+    serializer_class = serializers.DashboardSummarySerializer
+    login_required = True
+
+    def get_queryset(self, user):
+        return self.queryset.filter(user=user)
+
+
+class DashboardDetailView(AsyncDetailView):
+    """Retrieve a dashboard of the authenticated user."""
+    queryset = Dashboard.objects.all()
+    serializer_class = serializers.DashboardSerializer
+    login_required = True
+
+    def get_queryset(self, user):
+        return self.queryset.filter(user=user)
@@ -2,17 +2,19 @@
 Serializers for dashboard API
 """
 from rest_framework import serializers
+from core.layout import LayoutField
 from core.models import (
     Dashboard
 )
 
 class DashboardSerializer(serializers.ModelSerializer):
     """Serializer for strategies."""
+    gridConfig = LayoutField()
 
     class Meta:
         model = Dashboard
         fields = [
-            'id', 'gridConfig', 'description'
+            'id', 'gridConfig', 'description', 'version'
         ]
         read_only_fields = ['id']
 
@@ -35,3 +37,12 @@ class DashboardSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         return instance
+
+
+class DashboardSummarySerializer(serializers.ModelSerializer):
+    """Serializer for listing dashboards without their layouts."""
+
+    class Meta:
+        model = Dashboard
+        fields = ['id', 'description', 'version']
+        read_only_fields = ['id']
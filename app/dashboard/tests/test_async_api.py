@@ -0,0 +1,69 @@
+"""
+Tests for the async dashboard read endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from core.layout import version_etag
+from core.models import Dashboard
+
+DASHBOARDS_URL = reverse('dashboard-async:dashboard-list')
+
+
+def detail_url(dashboard_id):
+    """Create and return an async dashboard detail URL."""
+    return reverse('dashboard-async:dashboard-detail', args=[dashboard_id])
+
+
+class AsyncDashboardApiTests(TestCase):
+    """Test the async dashboard endpoints with a session login."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        other = get_user_model().objects.create_user(email='other@example.com')
+        self.dashboard = Dashboard.objects.create(
+            user=self.user,
+            gridConfig=[{'i': 'chart', 'x': 0}],
+            description='Mine',
+        )
+        self.other_dashboard = Dashboard.objects.create(
+            user=other,
+            gridConfig=[],
+            description='Theirs',
+        )
+        self.client = AsyncClient()
+        self.client.force_login(self.user)
+
+    async def test_list_without_layouts(self):
+        """Test the list only holds the user's dashboards summaries."""
+        res = await self.client.get(DASHBOARDS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'], [{
+            'id': self.dashboard.id,
+            'description': 'Mine',
+            'version': 1,
+        }])
+
+    async def test_retrieve_with_etag(self):
+        """Test retrieve sends the version ETag and honours it."""
+        url = detail_url(self.dashboard.id)
+        etag = version_etag(self.dashboard.id, self.dashboard.version)
+
+        res = await self.client.get(url)
+        cached = await self.client.get(url, headers={'If-None-Match': etag})
+
+        self.assertEqual(res.json()['gridConfig'], [{'i': 'chart', 'x': 0}])
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_other_users_dashboard_not_found(self):
+        """Test dashboards of other users are not visible."""
+        res = await self.client.get(detail_url(self.other_dashboard.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
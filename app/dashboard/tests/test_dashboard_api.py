@@ -0,0 +1,250 @@
+"""
+Tests for dashboard APIs.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Dashboard
+
+
+DASHBOARD_URL = reverse('dashboard:dashboard-list')
+
+
+def detail_url(dashboard_id):
+    """Create and return a dashboard detail URL."""
+    return reverse('dashboard:dashboard-detail', args=[dashboard_id])
+
+
+def layout_url(dashboard_id):
+    """Create and return a dashboard layout patch URL."""
+    return reverse('dashboard:dashboard-layout', args=[dashboard_id])
+
+
+def create_dashboard(user, **params):
+    """Create and return a sample dashboard."""
+    defaults = {
+        'gridConfig': [{'i': 'chart', 'x': 0, 'y': 0, 'w': 4, 'h': 2}],
+        'description': 'Sample dashboard',
+    }
+    defaults.update(params)
+    return Dashboard.objects.create(user=user, **defaults)
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class PrivateDashboardApiTests(TestCase):
+    """Test authenticated dashboard requests."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_dashboard_from_json_string(self):
+        """Test a JSON encoded gridConfig is stored as JSON."""
+        payload = {
+            'gridConfig': '[{"i": "chart", "x": 1}]',
+            'description': 'Legacy client',
+        }
+        res = self.client.post(DASHBOARD_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        dashboard = Dashboard.objects.get(id=res.data['id'])
+        self.assertEqual(dashboard.gridConfig, [{'i': 'chart', 'x': 1}])
+        self.assertEqual(dashboard.user, self.user)
+
+    def test_json_patch_layout(self):
+        """Test applying a JSON Patch to one layout field."""
+        dashboard = create_dashboard(user=self.user)
+        patch = [
+            {'op': 'test', 'path': '/gridConfig/0/i', 'value': 'chart'},
+            {'op': 'replace', 'path': '/gridConfig/0/x', 'value': 3},
+            {'op': 'add', 'path': '/gridConfig/-', 'value': {'i': 'table'}},
+        ]
+
+        res = self.client.patch(
+            layout_url(dashboard.id),
+            patch,
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['updated'], ['gridConfig'])
+        dashboard.refresh_from_db()
+        self.assertEqual(dashboard.gridConfig[0]['x'], 3)
+        self.assertEqual(dashboard.gridConfig[1], {'i': 'table'})
+
+    def test_merge_patch_layout(self):
+        """Test applying a merge patch to a layout field."""
+        dashboard = create_dashboard(
+            user=self.user,
+            gridConfig2={'lg': [1, 2], 'md': [1]},
+        )
+        res = self.client.generic(
+            'PATCH',
+            layout_url(dashboard.id),
+            '{"gridConfig2": {"md": null, "sm": [3]}}',
+            content_type='application/merge-patch+json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        dashboard.refresh_from_db()
+        self.assertEqual(dashboard.gridConfig2, {'lg': [1, 2], 'sm': [3]})
+        self.assertEqual(dashboard.gridConfig[0]['i'], 'chart')
+
+    def test_failed_test_operation_conflicts(self):
+        """Test a failing test op returns 409 and saves nothing."""
+        dashboard = create_dashboard(user=self.user)
+        patch = [
+            {'op': 'replace', 'path': '/gridConfig/0/x', 'value': 9},
+            {'op': 'test', 'path': '/gridConfig/0/i', 'value': 'other'},
+        ]
+
+        res = self.client.patch(layout_url(dashboard.id), patch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        dashboard.refresh_from_db()
+        self.assertEqual(dashboard.gridConfig[0]['x'], 0)
+
+    def test_patch_non_layout_field_rejected(self):
+        """Test only layout fields can be patched."""
+        dashboard = create_dashboard(user=self.user)
+        patch = [{'op': 'replace', 'path': '/description', 'value': 'x'}]
+
+        res = self.client.patch(layout_url(dashboard.id), patch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patch_other_users_dashboard_not_found(self):
+        """Test patching another user's layout returns 404."""
+        other = create_dashboard(user=create_user(email='other@example.com'))
+        patch = [{'op': 'replace', 'path': '/gridConfig/0/x', 'value': 1}]
+
+        res = self.client.patch(layout_url(other.id), patch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DashboardDeferredLoadingTests(TestCase):
+    """Test list and retrieve only read the rendered columns."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.dashboard = create_dashboard(
+            user=self.user,
+            gridConfig2={'big': 'x' * 1000},
+        )
+
+    def _dashboard_select(self, request):
+        """Return the SQL of the dashboard SELECT run by request()."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = request()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        selects = [
+            query['sql'] for query in ctx.captured_queries
+            if 'FROM "core_dashboard"' in query['sql']
+        ]
+        self.assertEqual(len(selects), 1)
+        return res, selects[0]
+
+    def test_list_skips_layout_columns(self):
+        """Test listing dashboards never selects a layout column."""
+        res, sql = self._dashboard_select(
+            lambda: self.client.get(DASHBOARD_URL)
+        )
+
+        self.assertNotIn('gridConfig', sql)
+        self.assertEqual(res.data['results'], [{
+            'id': self.dashboard.id,
+            'description': self.dashboard.description,
+            'version': self.dashboard.version,
+        }])
+
+    def test_retrieve_skips_unrendered_layouts(self):
+        """Test retrieve reads gridConfig but not gridConfig2/3."""
+        res, sql = self._dashboard_select(
+            lambda: self.client.get(detail_url(self.dashboard.id))
+        )
+
+        self.assertIn('"gridConfig"', sql)
+        self.assertNotIn('gridConfig2', sql)
+        self.assertNotIn('gridConfig3', sql)
+        self.assertEqual(res.data['gridConfig'], self.dashboard.gridConfig)
+
+
+class DashboardConditionalRequestTests(TestCase):
+    """Test ETags and preconditions on dashboards."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.dashboard = create_dashboard(user=self.user)
+
+    def test_retrieve_not_modified(self):
+        """Test a matching If-None-Match returns 304 without the layout."""
+        etag = self.client.get(detail_url(self.dashboard.id))['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(
+                detail_url(self.dashboard.id),
+                HTTP_IF_NONE_MATCH=etag,
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('gridConfig', ctx.captured_queries[0]['sql'])
+
+    def test_update_changes_etag(self):
+        """Test saving bumps the version and the ETag."""
+        etag = self.client.get(detail_url(self.dashboard.id))['ETag']
+
+        res = self.client.patch(
+            detail_url(self.dashboard.id),
+            {'description': 'Changed'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['version'], 2)
+        self.assertNotEqual(res['ETag'], etag)
+        res = self.client.get(detail_url(self.dashboard.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_stale_if_match_fails(self):
+        """Test writing with an outdated ETag returns 412."""
+        etag = self.client.get(detail_url(self.dashboard.id))['ETag']
+        self.dashboard.description = 'Saved by someone else'
+        self.dashboard.save()
+
+        res = self.client.patch(
+            detail_url(self.dashboard.id),
+            {'description': 'Mine'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+        patch_res = self.client.patch(
+            layout_url(self.dashboard.id),
+            [{'op': 'replace', 'path': '/gridConfig/0/x', 'value': 5}],
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(patch_res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.dashboard.refresh_from_db()
+        self.assertEqual(self.dashboard.description, 'Saved by someone else')
+        self.assertEqual(self.dashboard.gridConfig[0]['x'], 0)
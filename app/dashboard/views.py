@@ -6,28 +6,51 @@ from rest_framework import (
     viewsets,
     mixins,
 )
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.layout import LayoutPatchMixin
+from core.queryplan import plan_queryset
+from core.timing import TimedViewMixin
 from core.models import (
     Dashboard,
     Tag,
 )
 from dashboard import serializers
+from user.authentication import CachedTokenAuthentication
 #ModelViewSet comes with basic CRUD operations
-class DashboardViewSet(viewsets.ModelViewSet):
+#LayoutPatchMixin adds PATCH dashboards/{id}/layout/ for small layout deltas
+#and version ETags: 304 for If-None-Match, 412 for a stale If-Match
+class DashboardViewSet(TimedViewMixin, LayoutPatchMixin,
+                       viewsets.ModelViewSet):
     """View for manage strategy APIs."""
+    layout_fields = ('gridConfig', 'gridConfig2', 'gridConfig3')
     # serializer_class = serializers.StrategySerializer
     #### take care of typos here
     serializer_class = serializers.DashboardSerializer
     queryset = Dashboard.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     ####
     #overwriting get_querset method
     def get_queryset(self):
         """Retrieve strategies for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')
+        if self.action in ('list', 'retrieve'):
+            #only read the columns the serializer renders, the list never
+            #loads any layout and retrieve skips gridConfig2/gridConfig3
+            queryset = plan_queryset(
+                queryset,
+                self.get_serializer_class(),
+                only_rendered=True,
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'list':
+            return serializers.DashboardSummarySerializer
+
+        return self.serializer_class
 
 
     #Overwriting methods from View Class
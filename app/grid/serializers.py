@@ -2,15 +2,26 @@
 Serializers for strategy APIs
 """
 from rest_framework import serializers
+from core.layout import LayoutField
 from core.models import (
 Grid
 )
 
 class GridSerializer(serializers.ModelSerializer):
+    gridConfig = LayoutField()
 
     class Meta:
         model = Grid
         fields = [
-            'id', 'gridConfig', 'description', 'user'
+            'id', 'gridConfig', 'description', 'user', 'version'
         ]  # Include all fields from the model
         read_only_fields = ['id, user']
+
+
+class GridSummarySerializer(serializers.ModelSerializer):
+    """Serializer for listing grids without their layout."""
+
+    class Meta:
+        model = Grid
+        fields = ['id', 'description', 'user', 'version']
+        read_only_fields = ['id', 'user']
@@ -20,7 +20,7 @@ from core.models import (
 
 
 from grid.serializers import (
-    GridSerializer
+    GridSummarySerializer,
 )
 #get url from the name of the view
 #Because the urls for grid is generated with DefaultRouter
@@ -86,9 +86,9 @@ class PrivateGridApiTests(TestCase):
         res = self.client.get(GRID_URL)
 
         strategies = Grid.objects.all().order_by('-id')
-        serializer = GridSerializer(strategies, many=True)
+        serializer = GridSummarySerializer(strategies, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_grid_list_limited_to_user(self):
         """Only returns the grid from the authenticated user."""
@@ -103,9 +103,9 @@ class PrivateGridApiTests(TestCase):
         res = self.client.get(GRID_URL)
         #finds strategies from authenticated user
         strategies = Grid.objects.filter(user=self.user)
-        serializer = GridSerializer(strategies, many=True)
+        serializer = GridSummarySerializer(strategies, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
 
 
@@ -9,12 +9,17 @@ from rest_framework import (
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.layout import LayoutPatchMixin
+from core.queryplan import plan_queryset
+from core.timing import TimedViewMixin
 from core.models import (
     Grid,
 )
 from grid import serializers
 
-class GridViewSet(viewsets.ModelViewSet):
+class GridViewSet(TimedViewMixin, LayoutPatchMixin,
+                  viewsets.ModelViewSet):
+    layout_fields = ('gridConfig',)
     serializer_class = serializers.GridSerializer
     queryset = Grid.objects.all()
     # authentication_classes = [TokenAuthentication]
@@ -22,4 +27,19 @@ class GridViewSet(viewsets.ModelViewSet):
         #overwriting get_queryset method
     def get_queryset(self):
         """Retrieve strategies for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')
+        if self.action in ('list', 'retrieve'):
+            #the list never reads the gridConfig column
+            queryset = plan_queryset(
+                queryset,
+                self.get_serializer_class(),
+                only_rendered=True,
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'list':
+            return serializers.GridSummarySerializer
+
+        return self.serializer_class
@@ -0,0 +1,191 @@
+"""
+Job queue on the Job table of the default database.
+
+Jobs are enqueued as rows and claimed by run_jobs workers with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can poll the
+same table without a broker and no job is handed out twice. A job kind
+is a function registered with @task, it gets the Job and returns the
+JSON result. Cancelling a queued job drops it, a running one is stopped
+at its next raise_if_cancelled() check.
+
+A claimed job is leased to its worker for JOB_LEASE seconds and run()
+renews the lease from a heartbeat thread. When a worker dies mid-job
+the lease runs out and the next claim() queues the job again, or fails
+it once it used up its attempts.
+"""
+import os
+import socket
+import threading
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+
+#serializer_class validates the params a job is enqueued with, staff_only
+#kinds can't be enqueued through the API by other users
+Task = namedtuple('Task', ['func', 'serializer_class', 'staff_only'])
+
+TASKS = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that was cancelled while running."""
+
+
+def task(kind, serializer_class, staff_only=False):
+    """Register the decorated function as the handler of kind."""
+    def decorator(func):
+        TASKS[kind] = Task(func, serializer_class, staff_only)
+        return func
+    return decorator
+
+
+def enqueue(kind, params=None, user=None, max_attempts=1, run_after=None):
+    """Queue a job of kind and return it."""
+    if kind not in TASKS:
+        raise ValueError(f'Unknown job kind: {kind!r}')
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        user=user,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def worker_name():
+    """Return host:pid, stored on the jobs a worker claims."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+LEASE_EXPIRED = 'The worker running the job stopped renewing its lease.'
+
+
+def _lease_end():
+    return timezone.now() + timedelta(seconds=settings.JOB_LEASE)
+
+
+def requeue_expired():
+    """Queue again or fail running jobs whose worker lost its lease."""
+    now = timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, lease_expires_at__lt=now)
+    expired.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, run_after=now, error=LEASE_EXPIRED,
+    )
+    expired.update(status=Job.FAILED, finished_at=now, error=LEASE_EXPIRED)
+
+
+def claim(worker=None, kinds=None):
+    """Mark the oldest due job running and return it, None if there's none."""
+    requeue_expired()
+    with transaction.atomic():
+        queryset = Job.objects.filter(
+            status=Job.QUEUED,
+            run_after__lte=timezone.now(),
+        )
+        if kinds:
+            queryset = queryset.filter(kind__in=kinds)
+        #rows locked by other workers are skipped instead of waited on
+        job = (
+            queryset.select_for_update(skip_locked=True)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.worker = worker or worker_name()
+        job.started_at = timezone.now()
+        job.lease_expires_at = _lease_end()
+        job.save(update_fields=[
+            'status', 'attempts', 'worker', 'started_at', 'lease_expires_at',
+        ])
+    return job
+
+
+def cancel(job):
+    """Cancel a queued or running job, return False if it had finished."""
+    return bool(
+        Job.objects.filter(
+            pk=job.pk,
+            status__in=[Job.QUEUED, Job.RUNNING],
+        ).update(status=Job.CANCELLED, finished_at=timezone.now())
+    )
+
+
+def raise_if_cancelled(job):
+    """Raise JobCancelled if job was cancelled, for long running tasks."""
+    if Job.objects.filter(pk=job.pk, status=Job.CANCELLED).exists():
+        raise JobCancelled()
+
+
+def _claimed(job):
+    """Return the job's row while it is still running under this claim."""
+    #a job cancelled, or claimed again after its lease ran out, is left be
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, worker=job.worker,
+    )
+
+
+def _finish(job, **fields):
+    return bool(_claimed(job).update(finished_at=timezone.now(), **fields))
+
+
+class Heartbeat(threading.Thread):
+    """Renew the lease of a running job until stopped."""
+
+    def __init__(self, job):
+        super().__init__(name=f'job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOB_LEASE / 3):
+                _claimed(self.job).update(lease_expires_at=_lease_end())
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run(job):
+    """Run a claimed job and store its outcome, return the final status."""
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        return _run(job)
+    finally:
+        heartbeat.stop()
+
+
+def _run(job):
+    try:
+        result = TASKS[job.kind].func(job)
+    except JobCancelled:
+        return Job.CANCELLED
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            #retry later, backing off exponentially
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            _claimed(job).update(
+                status=Job.QUEUED,
+                error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+            return Job.QUEUED
+        _finish(job, status=Job.FAILED, error=error)
+        return Job.FAILED
+    if not _finish(job, status=Job.SUCCEEDED, result=result, error=''):
+        return Job.CANCELLED
+    return Job.SUCCEEDED
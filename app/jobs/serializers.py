@@ -0,0 +1,113 @@
+"""
+Serializers for the job APIs and the params of the built-in job kinds.
+"""
+from rest_framework import serializers
+
+from candles.store import INTERVALS
+from core.models import Job, Strategy
+from jobs.queue import TASKS
+from strategy.serializers import (
+    BacktestQuerySerializer,
+    IndicatorSeriesQuerySerializer,
+    SweepSerializer,
+)
+
+
+def check_strategies(serializer, ids):
+    """Raise unless every strategy id belongs to the requesting user."""
+    user = serializer.context['request'].user
+    found = set(
+        Strategy.objects.filter(user=user, id__in=ids)
+        .values_list('id', flat=True)
+    )
+    unknown = sorted(set(ids) - found)
+    if unknown:
+        raise serializers.ValidationError(f'Unknown strategies: {unknown}')
+
+
+class BacktestJobSerializer(BacktestQuerySerializer):
+    """Params of a backtest job."""
+    strategy = serializers.IntegerField()
+
+    def validate_strategy(self, value):
+        check_strategies(self, [value])
+        return value
+
+
+class IndicatorsJobSerializer(IndicatorSeriesQuerySerializer):
+    """Params of an indicator precomputation job."""
+    strategy = serializers.IntegerField()
+
+    def validate_strategy(self, value):
+        check_strategies(self, [value])
+        return value
+
+
+class SweepJobSerializer(SweepSerializer):
+    """Params of a backtest sweep job."""
+
+    def validate_strategies(self, value):
+        check_strategies(self, value)
+        return value
+
+
+class SyncCoinsJobSerializer(serializers.Serializer):
+    """Params of a coin catalog sync job, it takes none."""
+
+
+class SyncCandlesJobSerializer(serializers.Serializer):
+    """Params of a candle sync job, like the sync_candles options."""
+    interval = serializers.ChoiceField(choices=list(INTERVALS), default='1m')
+    symbols = serializers.ListField(
+        child=serializers.RegexField(r'^[A-Z0-9]+$'),
+        required=False,
+    )
+    since = serializers.RegexField(r'^\d{4}-\d{2}-\d{2}$', required=False)
+    until = serializers.RegexField(r'^\d{4}-\d{2}-\d{2}$', required=False)
+
+
+class JobSummarySerializer(serializers.ModelSerializer):
+    """Serializer for job lists, without the result."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'attempts', 'created_at', 'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class JobSerializer(JobSummarySerializer):
+    """Serializer for enqueuing a job and reading its result."""
+    kind = serializers.ChoiceField(choices=[])
+    params = serializers.JSONField(required=False, default=dict)
+
+    class Meta(JobSummarySerializer.Meta):
+        fields = JobSummarySerializer.Meta.fields + [
+            'params', 'result', 'error',
+        ]
+        read_only_fields = [
+            field for field in fields if field not in ('kind', 'params')
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        #kinds register when the jobs app is ready
+        self.fields['kind'].choices = sorted(TASKS)
+
+    def validate(self, attrs):
+        task = TASKS[attrs['kind']]
+        user = self.context['request'].user
+        if task.staff_only and not user.is_staff:
+            raise serializers.ValidationError(
+                {'kind': 'Only staff can run this kind of job.'}
+            )
+        params = task.serializer_class(
+            data=attrs.get('params', {}),
+            context=self.context,
+        )
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = params.validated_data
+        return attrs
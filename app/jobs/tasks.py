@@ -0,0 +1,102 @@
+"""
+Built-in job kinds: backtests, sweeps, indicator precomputation and the
+coin and candle syncs.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+
+from core.models import Strategy
+from jobs import serializers
+from jobs.queue import raise_if_cancelled, task
+from strategy.backtest import run_backtest
+from strategy.indicators import indicator_series
+from strategy.sweep import run_sweep, sweep_runs
+
+
+def _strategies(job, ids):
+    queryset = Strategy.objects.filter(id__in=ids).prefetch_related('coins')
+    if job.user_id is not None:
+        queryset = queryset.filter(user_id=job.user_id)
+    return {strategy.id: strategy for strategy in queryset}
+
+
+def _strategy(job, strategy_id):
+    strategy = _strategies(job, [strategy_id]).get(strategy_id)
+    if strategy is None:
+        raise ValueError(f'Strategy {strategy_id} does not exist')
+    return strategy
+
+
+def _symbols(strategy):
+    return sorted({coin.name for coin in strategy.coins.all()})
+
+
+@task('backtest', serializers.BacktestJobSerializer)
+def backtest(job):
+    """Backtest a strategy, the result is the backtest endpoint's."""
+    params = dict(job.params)
+    strategy = _strategy(job, params.pop('strategy'))
+    return run_backtest(strategy.rules, _symbols(strategy), **params)
+
+
+@task('sweep', serializers.SweepJobSerializer)
+def sweep(job):
+    """Sweep strategies over a grid, the result is the list of runs."""
+    options = dict(job.params)
+    ids = options.pop('strategies')
+    grid = options.pop('grid', {})
+    interval = options.pop('interval')
+    strategies = _strategies(job, ids)
+    #like the sweep endpoint, a missing or foreign strategy fails the sweep
+    unknown = sorted(set(ids) - set(strategies))
+    if unknown:
+        raise ValueError(f'Unknown strategies: {unknown}')
+    runs = sweep_runs(
+        [
+            (strategy_id, strategies[strategy_id].rules,
+             _symbols(strategies[strategy_id]))
+            for strategy_id in dict.fromkeys(ids)
+        ],
+        grid,
+    )
+    results = []
+    pending = run_sweep(runs, interval, **options)
+    try:
+        for result in pending:
+            results.append(result)
+            raise_if_cancelled(job)
+    finally:
+        #cancels the runs that haven't started
+        pending.close()
+    return results
+
+
+@task('indicators', serializers.IndicatorsJobSerializer)
+def indicators(job):
+    """Compute the indicator series of a strategy's coins."""
+    params = dict(job.params)
+    strategy = _strategy(job, params.pop('strategy'))
+    return indicator_series(
+        _symbols(strategy),
+        sorted(strategy.indicators.all(), key=lambda i: i.name),
+        params['interval'],
+        params['limit'],
+        end=params.get('end'),
+    )
+
+
+@task('sync_coins', serializers.SyncCoinsJobSerializer, staff_only=True)
+def sync_coins(job):
+    """Sync the coin catalog, see save_coins_to_db."""
+    out = StringIO()
+    call_command('save_coins_to_db', stdout=out)
+    return {'output': out.getvalue()}
+
+
+@task('sync_candles', serializers.SyncCandlesJobSerializer, staff_only=True)
+def sync_candles(job):
+    """Sync candles from the exchange, see sync_candles."""
+    out = StringIO()
+    call_command('sync_candles', stdout=out, **job.params)
+    return {'output': out.getvalue()}
@@ -0,0 +1,188 @@
+"""
+Tests for the job APIs.
+"""
+import tempfile
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from candles.store import CandleStore
+from core.models import Coin, Job, Strategy
+from jobs.queue import claim, run
+
+JOBS_URL = reverse('jobs:job-list')
+
+
+def detail_url(job_id):
+    """Create and return a job detail URL."""
+    return reverse('jobs:job-detail', args=[job_id])
+
+
+def cancel_url(job_id):
+    """Create and return a job cancel URL."""
+    return reverse('jobs:job-cancel', args=[job_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicJobApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to call API."""
+        res = APIClient().get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateJobApiTests(TestCase):
+    """Test enqueuing jobs and reading their results."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(CANDLE_STORE_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        self.strategy = Strategy.objects.create(
+            user=self.user,
+            base=coin,
+            rules={'entry': [{'left': 'close', 'op': '>', 'right': 0}]},
+        )
+        self.strategy.coins.add(coin)
+        close = np.arange(1, 11, dtype=np.float64)
+        CandleStore().append('BTCUSDT', '1h', np.column_stack([
+            np.arange(10) * 3_600_000, close, close, close, close, close,
+        ]))
+
+    def test_backtest_job(self):
+        """Test a queued backtest runs in a worker and exposes its result."""
+        res = self.client.post(
+            JOBS_URL,
+            {
+                'kind': 'backtest',
+                'params': {'strategy': self.strategy.id, 'interval': '1h'},
+            },
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['status'], Job.QUEUED)
+        #defaults of the backtest query are filled in
+        self.assertEqual(res.data['params']['points'], 1000)
+
+        self.assertEqual(run(claim()), Job.SUCCEEDED)
+
+        res = self.client.get(detail_url(res.data['id']))
+        self.assertEqual(res.data['status'], Job.SUCCEEDED)
+        self.assertEqual(res.data['result']['coins'][0]['symbol'], 'BTCUSDT')
+
+    def test_sweep_of_deleted_strategy_fails(self):
+        """Test a sweep fails, like the endpoint, when a strategy is gone."""
+        gone = Strategy.objects.create(
+            user=self.user, rules=self.strategy.rules,
+        )
+        res = self.client.post(
+            JOBS_URL,
+            {
+                'kind': 'sweep',
+                'params': {
+                    'strategies': [self.strategy.id, gone.id],
+                    'interval': '1h',
+                },
+            },
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        gone_id = gone.id
+        gone.delete()
+
+        self.assertEqual(run(claim()), Job.FAILED)
+
+        job = Job.objects.get(id=res.data['id'])
+        self.assertIn(f'Unknown strategies: [{gone_id}]', job.error)
+
+    def test_invalid_params(self):
+        """Test params are validated for the job's kind."""
+        other = create_user(email='other@example.com', password='test123')
+        strategy = Strategy.objects.create(user=other)
+
+        for payload in [
+            {'kind': 'nope'},
+            {'kind': 'backtest', 'params': {'interval': '1h'}},
+            {'kind': 'backtest', 'params': {'strategy': strategy.id}},
+            {'kind': 'indicators', 'params': {
+                'strategy': self.strategy.id, 'limit': 0,
+            }},
+        ]:
+            res = self.client.post(JOBS_URL, payload, format='json')
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, msg=payload,
+            )
+        self.assertFalse(Job.objects.exists())
+
+    def test_staff_only_kinds(self):
+        """Test only staff can queue the exchange syncs."""
+        res = self.client.post(JOBS_URL, {'kind': 'sync_coins'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.post(JOBS_URL, {'kind': 'sync_coins'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_list_own_jobs_by_status(self):
+        """Test the list shows the user's jobs without results."""
+        other = create_user(email='other@example.com', password='test123')
+        Job.objects.create(user=other, kind='backtest')
+        done = Job.objects.create(
+            user=self.user, kind='backtest', status=Job.SUCCEEDED,
+            result={'big': 'result'},
+        )
+        Job.objects.create(user=self.user, kind='sweep')
+
+        res = self.client.get(JOBS_URL, {'status': Job.SUCCEEDED})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [job['id'] for job in res.data['results']], [done.id],
+        )
+        self.assertNotIn('result', res.data['results'][0])
+
+    def test_cancel(self):
+        """Test a queued job can be cancelled once."""
+        job = Job.objects.create(user=self.user, kind='backtest')
+
+        res = self.client.post(cancel_url(job.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], Job.CANCELLED)
+
+        res = self.client.post(cancel_url(job.id))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_other_users_job_not_found(self):
+        """Test another user's job can't be read or cancelled."""
+        other = create_user(email='other@example.com', password='test123')
+        job = Job.objects.create(user=other, kind='backtest')
+
+        self.assertEqual(
+            self.client.get(detail_url(job.id)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.post(cancel_url(job.id)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
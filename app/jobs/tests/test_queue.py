@@ -0,0 +1,144 @@
+"""
+Tests for the job queue.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Job
+from jobs import queue
+from jobs.queue import Task, claim, enqueue, run
+
+
+def echo(job):
+    return {'echo': job.params}
+
+
+def boom(job):
+    raise RuntimeError('boom')
+
+
+def cancels_itself(job):
+    queue.cancel(job)
+    queue.raise_if_cancelled(job)
+
+
+TEST_TASKS = {
+    'echo': Task(echo, None, False),
+    'boom': Task(boom, None, False),
+    'cancels_itself': Task(cancels_itself, None, False),
+}
+
+
+@patch.dict(queue.TASKS, TEST_TASKS)
+class QueueTests(TestCase):
+    """Test claiming, running and cancelling jobs."""
+
+    def test_claim_oldest_due_job(self):
+        """Test jobs are claimed oldest first once they are due."""
+        later = enqueue(
+            'echo', run_after=timezone.now() + timedelta(hours=1),
+        )
+        first = enqueue('echo', {'n': 1})
+        second = enqueue('echo', {'n': 2})
+
+        job = claim('worker-1')
+
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.worker, 'worker-1')
+        self.assertEqual(claim().pk, second.pk)
+        self.assertIsNone(claim())
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_claim_only_kinds(self):
+        """Test a worker can be limited to some kinds."""
+        enqueue('boom')
+        echo_job = enqueue('echo')
+
+        self.assertEqual(claim(kinds=['echo']).pk, echo_job.pk)
+        self.assertIsNone(claim(kinds=['echo']))
+
+    def test_run_stores_result(self):
+        """Test a successful job stores its result."""
+        enqueue('echo', {'n': 1})
+
+        self.assertEqual(run(claim()), Job.SUCCEEDED)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'echo': {'n': 1}})
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(JOB_RETRY_DELAY=10)
+    def test_failed_job_retried_then_failed(self):
+        """Test failures are retried with a delay up to max_attempts."""
+        enqueue('boom', max_attempts=2)
+
+        self.assertEqual(run(claim()), Job.QUEUED)
+        job = Job.objects.get()
+        self.assertIn('RuntimeError: boom', job.error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+        self.assertIsNone(claim())
+
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(run(claim()), Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_is_claimed_again(self):
+        """Test a job of a dead worker is retried, then failed."""
+        enqueue('echo', max_attempts=2)
+        first = claim('dead-worker')
+        self.assertGreater(first.lease_expires_at, timezone.now())
+        self.assertIsNone(claim())
+
+        Job.objects.update(lease_expires_at=timezone.now() - timedelta(1))
+        second = claim('worker-2')
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.attempts, 2)
+        self.assertEqual(second.error, queue.LEASE_EXPIRED)
+        #the dead worker's claim can no longer finish the job
+        self.assertEqual(run(first), Job.CANCELLED)
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+
+        Job.objects.update(lease_expires_at=timezone.now() - timedelta(1))
+        self.assertIsNone(claim())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, queue.LEASE_EXPIRED)
+
+    def test_cancel(self):
+        """Test queued jobs are dropped and finished ones can't cancel."""
+        job = enqueue('echo')
+
+        self.assertTrue(queue.cancel(job))
+        self.assertIsNone(claim())
+        self.assertFalse(queue.cancel(job))
+
+    def test_cancel_running_job(self):
+        """Test a job cancelled while running stays cancelled."""
+        enqueue('cancels_itself')
+
+        self.assertEqual(run(claim()), Job.CANCELLED)
+        self.assertEqual(Job.objects.get().status, Job.CANCELLED)
+
+    def test_unknown_kind(self):
+        """Test unknown kinds can't be queued and fail when run."""
+        with self.assertRaises(ValueError):
+            enqueue('nope')
+        Job.objects.create(
+            kind='nope', user=get_user_model().objects.create_user(
+                'user@example.com', 'test123',
+            ),
+        )
+
+        self.assertEqual(run(claim()), Job.FAILED)
+        self.assertIn('KeyError', Job.objects.get().error)
@@ -0,0 +1,63 @@
+"""
+Views for the job APIs.
+"""
+from rest_framework import (
+    mixins,
+    status,
+    viewsets,
+)
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import Job
+from core.timing import TimedViewMixin
+from jobs import serializers
+from jobs import queue
+from user.authentication import CachedTokenAuthentication
+
+
+class JobViewSet(TimedViewMixin,
+                 mixins.CreateModelMixin,
+                 mixins.ListModelMixin,
+                 mixins.RetrieveModelMixin,
+                 viewsets.GenericViewSet):
+    """Enqueue jobs, follow their status, read results and cancel them."""
+    serializer_class = serializers.JobSerializer
+    queryset = Job.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Retrieve jobs of the authenticated user, ?status= filters."""
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')
+        if self.action == 'list':
+            #the list never renders params or results
+            queryset = queryset.defer('params', 'result', 'error')
+            job_status = self.request.query_params.get('status')
+            if job_status:
+                queryset = queryset.filter(status=job_status)
+        return queryset
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'list':
+            return serializers.JobSummarySerializer
+
+        return self.serializer_class
+
+    def perform_create(self, serializer):
+        """Queue a new job."""
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['post'], url_path='cancel', url_name='cancel')
+    def cancel(self, request, pk=None):
+        """Cancel a queued or running job."""
+        job = self.get_object()
+        if not queue.cancel(job):
+            return Response(
+                {'detail': f'The job already {job.status}.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
@@ -0,0 +1,28 @@
+"""
+URL mappings for the async strategy read endpoints.
+"""
+from django.urls import path
+
+from strategy import async_views
+
+app_name = 'strategy-async'
+
+urlpatterns = [
+    path('coins/', async_views.CoinListView.as_view(), name='coin-list'),
+    path(
+        'coins/<int:pk>/',
+        async_views.CoinDetailView.as_view(),
+        name='coin-detail',
+    ),
+    path('bases/', async_views.BaseListView.as_view(), name='base-list'),
+    path(
+        'bases/<int:pk>/',
+        async_views.BaseDetailView.as_view(),
+        name='base-detail',
+    ),
+    path(
+        'strategies/',
+        async_views.StrategyListView.as_view(),
+        name='strategy-list',
+    ),
+]
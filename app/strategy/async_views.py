@@ -0,0 +1,42 @@
+"""
+Async read views for strategies and the coin catalog.
+"""
+from core.async_views import AsyncDetailView, AsyncListView
+from core.models import Base, Coin, Strategy
+from strategy import serializers
+
+
+class CoinListView(AsyncListView):
+    """List coins."""
+    queryset = Coin.objects.all()
+    serializer_class = serializers.CoinSerializer
+    ordering = 'name'
+
+
+class CoinDetailView(AsyncDetailView):
+    """Retrieve a coin."""
+    queryset = Coin.objects.all()
+    serializer_class = serializers.CoinSerializer
+
+
+class BaseListView(AsyncListView):
+    """List base coins."""
+    queryset = Base.objects.all()
+    serializer_class = serializers.CoinSerializer
+    ordering = 'name'
+
+
+class BaseDetailView(AsyncDetailView):
+    """Retrieve a base coin."""
+    queryset = Base.objects.all()
+    serializer_class = serializers.CoinSerializer
+
+
+class StrategyListView(AsyncListView):
+    """List the strategies of the authenticated user."""
+    queryset = Strategy.objects.all()
+    serializer_class = serializers.StrategySerializer
+    login_required = True
+
+    def get_queryset(self, user):
+        return self.queryset.filter(user=user)
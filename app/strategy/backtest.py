@@ -0,0 +1,356 @@
+"""
+Vectorized long-only backtests of strategy rules over stored candles.
+
+Strategy.rules holds the signal rules:
+
+    {
+        "entry": [{"left": "SMA(10)", "op": "crosses_above", "right": "SMA(50)"}],
+        "exit": [{"left": "RSI(14)", "op": ">", "right": 70}],
+        "fee": 0.001
+    }
+
+left and right are a candle column (open, high, low, close, volume), an
+indicator name with an optional output ('MACD.signal') or a number. The
+conditions of a list must all hold. Signals are evaluated on a candle's
+close and the position changes from the next candle, so a rule never
+trades on a price it couldn't have seen. Every step is a NumPy array
+operation, there is no loop over candles, and the symbols are read and
+tested on BACKTEST_THREADS threads.
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from candles.store import COLUMN_NAMES, INTERVALS, CandleStore
+from strategy.indicators import UnknownIndicator, compute, lookback
+
+OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    'crosses_above': None,
+    'crosses_below': None,
+}
+PRICE_COLUMNS = tuple(name for name in COLUMN_NAMES if name != 'open_time')
+DAY_MS = 86_400_000
+
+
+class InvalidRules(ValueError):
+    """Raised for rules that can't be evaluated."""
+
+
+def _check_operand(operand):
+    if isinstance(operand, bool):
+        raise InvalidRules('Operands must be numbers or series names')
+    if isinstance(operand, (int, float)):
+        return
+    if not isinstance(operand, str):
+        raise InvalidRules('Operands must be numbers or series names')
+    name = operand.split('.')[0]
+    if name not in PRICE_COLUMNS:
+        try:
+            lookback(name)
+        except UnknownIndicator as exc:
+            raise InvalidRules(str(exc))
+
+
+def parse_rules(rules):
+    """Validate rules and return them with defaults filled in."""
+    if not isinstance(rules, dict):
+        raise InvalidRules('Rules must be an object')
+    parsed = {'fee': rules.get('fee', 0.001)}
+    if not isinstance(parsed['fee'], (int, float)) or not (
+            0 <= parsed['fee'] < 1):
+        raise InvalidRules('fee must be a fraction between 0 and 1')
+    for side in ('entry', 'exit'):
+        conditions = rules.get(side, [])
+        if not isinstance(conditions, list):
+            raise InvalidRules(f'{side} must be a list of conditions')
+        for condition in conditions:
+            if not isinstance(condition, dict) or set(condition) != {
+                    'left', 'op', 'right'}:
+                raise InvalidRules(
+                    f'{side} conditions need left, op and right'
+                )
+            if condition['op'] not in OPERATORS:
+                raise InvalidRules(f'Unknown operator {condition["op"]!r}')
+            _check_operand(condition['left'])
+            _check_operand(condition['right'])
+        parsed[side] = conditions
+    if not parsed['entry']:
+        raise InvalidRules('At least one entry condition is needed')
+    return parsed
+
+
+def rules_lookback(rules):
+    """Return the candles the rules' indicators need to warm up."""
+    needed = [0]
+    for condition in rules['entry'] + rules['exit']:
+        for operand in (condition['left'], condition['right']):
+            if isinstance(operand, str):
+                name = operand.split('.')[0]
+                if name not in PRICE_COLUMNS:
+                    needed.append(lookback(name))
+    return max(needed)
+
+
+def _operand(operand, candles, computed):
+    if not isinstance(operand, str):
+        return float(operand)
+    name, _, output = operand.partition('.')
+    if name in PRICE_COLUMNS:
+        return getattr(candles, name)
+    if name not in computed:
+        computed[name] = compute(name, candles)
+    series = computed[name]
+    if not output:
+        return next(iter(series.values()))
+    if output not in series:
+        raise InvalidRules(f'{name} has no output {output!r}')
+    return series[output]
+
+
+def _condition(condition, candles, computed):
+    left = _operand(condition['left'], candles, computed)
+    right = _operand(condition['right'], candles, computed)
+    left, right = np.broadcast_arrays(left, right)
+    op = condition['op']
+    with np.errstate(invalid='ignore'):
+        if op not in ('crosses_above', 'crosses_below'):
+            return OPERATORS[op](left, right)
+        #NaN compares False, so warm up candles never count as a cross
+        previous_left = np.concatenate([[np.nan], left[:-1]])
+        previous_right = np.concatenate([[np.nan], right[:-1]])
+        if op == 'crosses_above':
+            return (left > right) & (previous_left <= previous_right)
+        return (left < right) & (previous_left >= previous_right)
+
+
+def _signal(conditions, candles, computed):
+    size = candles.close.size
+    signal = np.ones(size, dtype=bool) if conditions else np.zeros(
+        size, dtype=bool,
+    )
+    for condition in conditions:
+        signal &= _condition(condition, candles, computed)
+    return signal
+
+
+def positions(entry, exit):
+    """
+    Return 1 for candles held long, 0 otherwise.
+
+    A position opens on the candle after an entry signal and closes on
+    the candle after an exit signal; exit wins when both fire together.
+    """
+    event = np.where(exit, -1, np.where(entry, 1, 0)).astype(np.int8)
+    index = np.where(event != 0, np.arange(event.size), 0)
+    #the most recent signal at or before every candle
+    np.maximum.accumulate(index, out=index)
+    state = np.where(event[index] == 1, 1, 0).astype(np.int8)
+    held = np.zeros_like(state)
+    held[1:] = state[:-1]
+    return held
+
+
+def backtest_candles(rules, candles, skip=0):
+    """
+    Backtest rules over candles and return (equity, trades, held).
+
+    equity starts at 1.0 and only candles from skip on are traded, the
+    ones before are history for the indicators to warm up.
+    """
+    computed = {}
+    entry = _signal(rules['entry'], candles, computed)
+    exit = _signal(rules['exit'], candles, computed)
+    entry[:skip] = False
+    exit[:skip] = False
+    held = positions(entry, exit)
+
+    close = candles.close
+    returns = np.zeros(close.size)
+    returns[1:] = close[1:] / close[:-1] - 1
+    returns *= held
+    changes = np.abs(np.diff(held, prepend=0))
+    equity = np.cumprod((1 + returns) * (1 - rules['fee'] * changes))
+    #an open position still pays to close at the end
+    if close.size and held[-1]:
+        equity[-1] *= 1 - rules['fee']
+
+    opened = np.flatnonzero(np.diff(held, prepend=0) == 1)
+    closed = np.flatnonzero(np.diff(held, prepend=0) == -1)
+    #the signal candle's close is the entry and exit price
+    entry_at = opened - 1
+    exit_at = np.append(closed - 1, close.size - 1)[:opened.size]
+    trades = {
+        'entry_time': candles.open_time[entry_at],
+        'exit_time': candles.open_time[exit_at],
+        'entry_price': close[entry_at],
+        'exit_price': close[exit_at],
+        'open': np.arange(opened.size) >= closed.size,
+    }
+    trades['return'] = (
+        trades['exit_price'] / trades['entry_price']
+        * (1 - rules['fee']) ** 2 - 1
+    )
+    return equity, trades, held
+
+
+def curve_stats(equity, interval):
+    """Return the return, drawdown and Sharpe ratio of an equity curve."""
+    if not equity.size:
+        return {
+            'total_return': 0.0,
+            'annual_return': 0.0,
+            'max_drawdown': 0.0,
+            'sharpe': 0.0,
+        }
+    bars_per_year = 365 * DAY_MS / INTERVALS[interval]
+    years = equity.size / bars_per_year
+    with np.errstate(over='ignore'):
+        annual = np.float64(max(equity[-1], 0.0)) ** (1 / years) - 1
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0))
+    previous = np.concatenate([[1.0], equity[:-1]])
+    returns = equity / previous - 1
+    std = returns.std()
+    sharpe = returns.mean() / std * math.sqrt(bars_per_year) if std else 0.0
+    return {
+        'total_return': round(float(equity[-1] - 1), 6),
+        #a short, lucky window extrapolates past what a float holds
+        'annual_return': round(float(annual), 6) if np.isfinite(annual) else None,
+        'max_drawdown': round(float((1 - equity / peak).max()), 6),
+        'sharpe': round(float(sharpe), 4),
+    }
+
+
+def _downsample(open_time, equity, points):
+    if equity.size > points:
+        index = np.linspace(0, equity.size - 1, points).round().astype(int)
+        open_time, equity = open_time[index], equity[index]
+    return {
+        'open_time': open_time.tolist(),
+        'equity': np.round(equity, 6).tolist(),
+    }
+
+
+def _backtest_symbol(rules, symbol, interval, start, end, warmup,
+                     max_trades, load):
+    """Return the result, open times, equity and wins of one symbol."""
+    candles = load(symbol, None if start is None else start - warmup, end)
+    skip = 0 if start is None else int(
+        np.searchsorted(candles.open_time, start)
+    )
+    equity, trades, held = backtest_candles(rules, candles, skip)
+    open_time = candles.open_time[skip:]
+    equity, held = equity[skip:], held[skip:]
+    count = int(trades['return'].size)
+    wins = int((trades['return'] > 0).sum())
+    result = {
+        'symbol': symbol,
+        'stats': {
+            **curve_stats(equity, interval),
+            'trades': count,
+            'win_rate': round(wins / count, 4) if count else 0.0,
+            'exposure': round(float(held.mean()) if held.size else 0.0, 4),
+        },
+        'trades': [
+            {
+                'entry_time': int(trades['entry_time'][i]),
+                'exit_time': int(trades['exit_time'][i]),
+                'entry_price': float(trades['entry_price'][i]),
+                'exit_price': float(trades['exit_price'][i]),
+                'return': round(float(trades['return'][i]), 6),
+                'open': bool(trades['open'][i]),
+            }
+            for i in range(min(count, max_trades))
+        ],
+        'trades_truncated': count > max_trades,
+    }
+    return result, open_time, equity, wins
+
+
+def run_backtest(rules, symbols, interval, start=None, end=None,
+                 points=1000, max_trades=1000, store=None, load=None,
+                 threads=None):
+    """
+    Backtest rules for every symbol and return the results.
+
+    Capital is split equally between the symbols, the portfolio curve is
+    their average on a shared timeline, each carrying its last value over
+    gaps. load(symbol, start, end) returns the candles of a symbol and
+    defaults to reading them from the store. threads defaults to
+    BACKTEST_THREADS, symbols are tested concurrently on that many.
+    """
+    rules = parse_rules(rules)
+    step = INTERVALS[interval]
+    store = store or CandleStore()
+    warmup = rules_lookback(rules) * step
+    threads = settings.BACKTEST_THREADS if threads is None else threads
+    if load is None:
+        def load(symbol, start, end):
+            return store.read(symbol, interval, start, end)
+
+    def backtest_symbol(symbol):
+        return _backtest_symbol(
+            rules, symbol, interval, start, end, warmup, max_trades, load,
+        )
+
+    if threads > 1 and len(symbols) > 1:
+        with ThreadPoolExecutor(min(threads, len(symbols))) as executor:
+            outcomes = list(executor.map(backtest_symbol, symbols))
+    else:
+        outcomes = map(backtest_symbol, symbols)
+
+    results = []
+    trade_count = 0
+    wins = 0
+    curves = []
+    for result, open_time, equity, symbol_wins in outcomes:
+        results.append(result)
+        trade_count += result['stats']['trades']
+        wins += symbol_wins
+        if open_time.size:
+            curves.append((open_time, equity))
+
+    traded = len(curves)
+    if not curves:
+        portfolio = np.ones(0)
+        timeline = np.zeros(0, dtype=np.int64)
+    else:
+        #the timeline spans every symbol's candles, not just the first's
+        grid_start = start if start is not None else min(
+            int(open_time[0]) for open_time, _ in curves
+        )
+        grid_end = end - step if end is not None else max(
+            int(open_time[-1]) for open_time, _ in curves
+        )
+        portfolio = np.zeros(max((grid_end - grid_start) // step + 1, 0))
+        for open_time, equity in curves:
+            slots = (open_time - grid_start) // step
+            inside = (slots >= 0) & (slots < portfolio.size)
+            curve = np.full(portfolio.size, np.nan)
+            curve[slots[inside]] = equity[inside]
+            #carry the last value over missing candles, 1.0 before the first
+            filled = np.where(np.isnan(curve), 0, np.arange(curve.size))
+            np.maximum.accumulate(filled, out=filled)
+            curve = curve[filled]
+            curve[np.isnan(curve)] = 1.0
+            portfolio += curve
+        #symbols without candles keep their share as cash
+        portfolio += len(symbols) - traded
+        portfolio /= len(symbols)
+        timeline = grid_start + np.arange(portfolio.size, dtype=np.int64) * step
+
+    return {
+        'interval': interval,
+        'stats': {
+            **curve_stats(portfolio, interval),
+            'trades': trade_count,
+            'win_rate': round(wins / trade_count, 4) if trade_count else 0.0,
+        },
+        'equity_curve': _downsample(timeline, portfolio, points),
+        'coins': results,
+    }
@@ -0,0 +1,268 @@
+"""
+Vectorized technical indicators over candle arrays.
+
+An Indicator's name selects the function and its parameters, e.g. 'SMA',
+'EMA(50)' or 'MACD(12, 26, 9)'; parameters left out use the defaults.
+Every function takes Candles and returns a dict of float64 arrays as long
+as the input, NaN where there isn't enough history yet.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from candles.store import INTERVALS, CandleStore
+from core.cache import LRUCache
+
+
+class UnknownIndicator(ValueError):
+    """Raised for indicator names the engine can't compute."""
+
+
+def _ewm(values, alpha):
+    """Exponentially weighted mean, seeded with the first value."""
+    series = pd.Series(values, dtype=np.float64)
+    return series.ewm(alpha=alpha, adjust=False).mean().to_numpy(copy=True)
+
+
+def _rolling_mean(values, period):
+    result = np.full(values.shape, np.nan)
+    if period <= values.size:
+        sums = np.cumsum(np.insert(values, 0, 0.0))
+        result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+
+def _rolling_std(values, period):
+    result = np.full(values.shape, np.nan)
+    if period <= values.size:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        result[period - 1:] = windows.std(axis=1)
+    return result
+
+
+def sma(candles, period=20):
+    """Simple moving average of the close."""
+    return {'sma': _rolling_mean(candles.close, period)}
+
+
+def ema(candles, period=20):
+    """Exponential moving average of the close."""
+    result = _ewm(candles.close, 2 / (period + 1))
+    result[:period - 1] = np.nan
+    return {'ema': result}
+
+
+def rsi(candles, period=14):
+    """Relative strength index with Wilder's smoothing."""
+    if not candles.close.size:
+        return {'rsi': np.empty(0)}
+    change = np.diff(candles.close, prepend=np.nan)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    avg_gain = _ewm(gain[1:], 1 / period)
+    avg_loss = _ewm(loss[1:], 1 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100 - 100 / (1 + avg_gain / avg_loss)
+    value = np.where(avg_loss == 0, 100.0, value)
+    result = np.concatenate([[np.nan], value])
+    result[:period] = np.nan
+    return {'rsi': result}
+
+
+def macd(candles, fast=12, slow=26, signal=9):
+    """Moving average convergence divergence."""
+    close = candles.close
+    line = _ewm(close, 2 / (fast + 1)) - _ewm(close, 2 / (slow + 1))
+    signal_line = _ewm(line, 2 / (signal + 1))
+    warmup = slow + signal - 2
+    result = {
+        'macd': line,
+        'signal': signal_line,
+        'histogram': line - signal_line,
+    }
+    for series in result.values():
+        series[:warmup] = np.nan
+    return result
+
+
+def bbands(candles, period=20, stddev=2):
+    """Bollinger bands around the simple moving average."""
+    middle = _rolling_mean(candles.close, period)
+    width = _rolling_std(candles.close, period) * stddev
+    return {'upper': middle + width, 'middle': middle, 'lower': middle - width}
+
+
+def atr(candles, period=14):
+    """Average true range with Wilder's smoothing."""
+    previous_close = np.concatenate([[np.nan], candles.close[:-1]])
+    true_range = np.fmax(
+        candles.high - candles.low,
+        np.fmax(
+            np.abs(candles.high - previous_close),
+            np.abs(candles.low - previous_close),
+        ),
+    )
+    result = _ewm(true_range, 1 / period)
+    result[:period - 1] = np.nan
+    return {'atr': result}
+
+
+#lookback is how many candles a value needs, exponential ones are
+#warmed up over a few periods so the value has converged
+IndicatorSpec = namedtuple('IndicatorSpec', ['func', 'params', 'lookback'])
+
+INDICATORS = {
+    'SMA': IndicatorSpec(sma, ('period',), lambda period=20: period),
+    'EMA': IndicatorSpec(ema, ('period',), lambda period=20: period * 4),
+    'RSI': IndicatorSpec(rsi, ('period',), lambda period=14: period * 4),
+    'MACD': IndicatorSpec(
+        macd,
+        ('fast', 'slow', 'signal'),
+        lambda fast=12, slow=26, signal=9: (slow + signal) * 4,
+    ),
+    'BBANDS': IndicatorSpec(
+        bbands,
+        ('period', 'stddev'),
+        lambda period=20, stddev=2: period,
+    ),
+    'ATR': IndicatorSpec(atr, ('period',), lambda period=14: period * 4),
+}
+
+#parameters that aren't a number of candles
+FLOAT_PARAMS = {'stddev'}
+
+_NAME_RE = re.compile(r'^\s*([A-Za-z]+)\s*(?:\(([^)]*)\))?\s*$')
+
+
+def parse_indicator(name):
+    """Return (key, params) for an indicator name like 'EMA(50)'."""
+    match = _NAME_RE.match(name)
+    if not match or match.group(1).upper() not in INDICATORS:
+        raise UnknownIndicator(f'Unknown indicator: {name!r}')
+    key = match.group(1).upper()
+    spec = INDICATORS[key]
+    values = [v.strip() for v in (match.group(2) or '').split(',') if v.strip()]
+    if len(values) > len(spec.params):
+        raise UnknownIndicator(
+            f'{key} takes at most {len(spec.params)} parameters'
+        )
+    params = {}
+    for param, value in zip(spec.params, values):
+        try:
+            number = float(value)
+        except ValueError:
+            raise UnknownIndicator(f'Invalid parameter {value!r} for {key}')
+        if number <= 0:
+            raise UnknownIndicator(f'Parameters of {key} must be positive')
+        if param in FLOAT_PARAMS:
+            params[param] = number
+        elif number.is_integer():
+            params[param] = int(number)
+        else:
+            raise UnknownIndicator(f'{param} of {key} must be a whole number')
+    return key, params
+
+
+def lookback(name):
+    """Return the number of extra candles name needs before a value."""
+    key, params = parse_indicator(name)
+    return int(INDICATORS[key].lookback(**params))
+
+
+indicator_cache = LRUCache(getattr(settings, 'INDICATOR_CACHE_MAXSIZE', 512))
+
+
+def compute(name, candles, symbol=None, interval=None):
+    """
+    Return the series of indicator name over candles.
+
+    With a symbol and interval the result is cached by the candle window
+    (first and last open time), so a new candle means a new entry.
+    """
+    key, params = parse_indicator(name)
+    if symbol is None or not candles.open_time.size:
+        return INDICATORS[key].func(candles, **params)
+
+    cache_key = (
+        symbol,
+        interval,
+        key,
+        tuple(sorted(params.items())),
+        int(candles.open_time[0]),
+        int(candles.open_time[-1]),
+        int(candles.open_time.size),
+    )
+    result = indicator_cache.get(cache_key)
+    if result is None:
+        result = INDICATORS[key].func(candles, **params)
+        indicator_cache.set(cache_key, result)
+    return result
+
+
+def _to_list(values):
+    """Return a JSON friendly list, NaN becomes None."""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def indicator_series(symbols, indicators, interval, limit, end=None,
+                     store=None):
+    """
+    Return the last limit values of every indicator for every symbol.
+
+    indicators are Indicator rows, names the engine doesn't know and
+    symbols the store can't hold are reported with an error instead of
+    failing the whole response. Enough extra candles are read before the
+    window for the values to be warm.
+    """
+    store = store or CandleStore()
+    step = INTERVALS[interval]
+    known = []
+    results = []
+    for indicator in indicators:
+        try:
+            known.append((indicator, lookback(indicator.name)))
+        except UnknownIndicator as exc:
+            results.append({
+                'id': indicator.id,
+                'name': indicator.name,
+                'error': str(exc),
+            })
+    extra = max((needed for _, needed in known), default=0)
+
+    coins = []
+    for symbol in symbols:
+        try:
+            CandleStore.symbol_name(symbol)
+        except ValueError as exc:
+            coins.append({'symbol': symbol, 'error': str(exc)})
+            continue
+        stop = end
+        if stop is None:
+            last = store.last_open_time(symbol, interval)
+            stop = last + step if last is not None else 0
+        candles = store.read(
+            symbol, interval, stop - (limit + extra) * step, stop,
+        )
+        shown = slice(max(candles.open_time.size - limit, 0), None)
+        series = [
+            {
+                'id': indicator.id,
+                'name': indicator.name,
+                'series': {
+                    key: _to_list(values[shown])
+                    for key, values in compute(
+                        indicator.name, candles, symbol, interval,
+                    ).items()
+                },
+            }
+            for indicator, _ in known
+        ]
+        coins.append({
+            'symbol': symbol,
+            'open_time': candles.open_time[shown].tolist(),
+            'indicators': series + results,
+        })
+    return {'interval': interval, 'coins': coins}
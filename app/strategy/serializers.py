@@ -1,7 +1,10 @@
 """
 Serializers for strategy APIs
 """
+from django.db import transaction
 from rest_framework import serializers
+
+from candles.store import INTERVALS
 from core.models import (
     Strategy,
     Tag,
@@ -9,6 +12,8 @@ from core.models import (
     Coin,
     Base
 )
+from strategy.backtest import InvalidRules, parse_rules
+from strategy.sweep import fill, placeholders
 
 class BaseSerializer(serializers.ModelSerializer):
     """Serializer for indicators."""
@@ -48,57 +53,64 @@ class StrategySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id']
 
-    def _get_or_create_tags(self, tags, strategy):
-        """Handle getting or creating tags as needed."""
+    def _get_or_create_named(self, model, items):
+        """Resolve tags or indicators by name, creating missing ones in bulk."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            strategy.tags.add(tag_obj)
+        #keep payload order but drop repeated names
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
 
-    def _get_or_create_indicators(self, indicators, strategy):
-        """Handle getting or creating indicators as needed."""
-        auth_user = self.context['request'].user
-        for indicator in indicators:
-            indicator_obj, created = Indicator.objects.get_or_create(
-                user=auth_user,
-                **indicator,
+        existing = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [name for name in names if name not in existing]
+        if missing:
+            #ON CONFLICT DO NOTHING on the (user, name) constraint, so a
+            #concurrent request creating the same name can't fail or
+            #duplicate it; the pks are read back afterwards
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            existing.update(
+                (obj.name, obj)
+                for obj in model.objects.filter(user=auth_user, name__in=missing)
             )
-            strategy.indicators.add(indicator_obj)
 
+        return [existing[name] for name in names]
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create a strategy."""
+        coins = validated_data.pop('coins', [])
         tags = validated_data.pop('tags', [])
         indicators = validated_data.pop('indicators', [])
         strategy = Strategy.objects.create(**validated_data)
-        self._get_or_create_tags(tags, strategy)
-        self._get_or_create_indicators(indicators, strategy)
+        strategy.coins.add(*coins)
+        strategy.tags.add(*self._get_or_create_named(Tag, tags))
+        strategy.indicators.add(
+            *self._get_or_create_named(Indicator, indicators)
+        )
 
         return strategy
 
-    # def update(self, instance, validated_data):
-    #     """Update strategy."""
-    #     tags = validated_data.pop('tags', None)
-    #     if tags is not None:
-    #         instance.tags.clear()
-    #         self._get_or_create_tags(tags, instance)
-    #     for attr, value in validated_data.items():
-    #         setattr(instance, attr, value)
-    #     instance.save()
-    #     return instance
-
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update strategy."""
+        coins = validated_data.pop('coins', None)
         tags = validated_data.pop('tags', None)
         indicators = validated_data.pop('indicators', None)
+        #set() only removes and adds the rows that differ from the payload
+        if coins is not None:
+            instance.coins.set(coins)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_named(Tag, tags))
         if indicators is not None:
-            instance.indicators.clear()
-            self._get_or_create_indicators(indicators, instance)
+            instance.indicators.set(
+                self._get_or_create_named(Indicator, indicators)
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -108,4 +120,78 @@ class StrategySerializer(serializers.ModelSerializer):
 class StrategyDetailSerializer(StrategySerializer):
     """Serializer for strategy detail view."""
     class Meta(StrategySerializer.Meta):
-        fields = StrategySerializer.Meta.fields + ['description']
\ No newline at end of file
+        fields = StrategySerializer.Meta.fields + ['description', 'rules']
+
+    def validate_rules(self, value):
+        """Rules must be empty or something the backtester can run."""
+        if value in (None, {}):
+            return {}
+        try:
+            #placeholders are filled in by sweeps, any number checks them
+            parse_rules(fill(value, dict.fromkeys(placeholders(value), 1)))
+        except InvalidRules as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+
+class IndicatorSeriesQuerySerializer(serializers.Serializer):
+    """Query parameters of the strategy indicator series."""
+    interval = serializers.ChoiceField(choices=list(INTERVALS), default='1h')
+    limit = serializers.IntegerField(min_value=1, max_value=5000, default=500)
+    end = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='Open time in ms the series ends before, '
+                  'defaults to after the newest candle.',
+    )
+
+
+class BacktestQuerySerializer(serializers.Serializer):
+    """Query parameters of a strategy backtest."""
+    interval = serializers.ChoiceField(choices=list(INTERVALS), default='1h')
+    start = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='Open time in ms of the first traded candle.',
+    )
+    end = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='Open time in ms the backtest ends before.',
+    )
+    points = serializers.IntegerField(min_value=2, max_value=10000, default=1000)
+    max_trades = serializers.IntegerField(
+        min_value=0, max_value=10000, default=1000,
+    )
+
+    def validate(self, attrs):
+        start, end = attrs.get('start'), attrs.get('end')
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError('end must be after start.')
+        return attrs
+
+
+class SweepSerializer(BacktestQuerySerializer):
+    """Body of a backtest sweep over strategies and a parameter grid."""
+    strategies = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=1000,
+    )
+    grid = serializers.DictField(
+        child=serializers.ListField(child=serializers.FloatField()),
+        required=False,
+        default=dict,
+        help_text='Values per rules placeholder, e.g. {"fast": [10, 20]}.',
+    )
+    points = serializers.IntegerField(min_value=2, max_value=10000, default=200)
+    max_trades = serializers.IntegerField(
+        min_value=0, max_value=10000, default=0,
+    )
+
+    def validate_grid(self, value):
+        #whole numbers stay ints so 'EMA({fast})' reads EMA(10), not EMA(10.0)
+        return {
+            name: [int(v) if v.is_integer() else v for v in values]
+            for name, values in value.items()
+        }
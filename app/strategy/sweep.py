@@ -0,0 +1,204 @@
+"""
+Backtests of many strategies and parameter sets on a process pool.
+
+Rules can hold placeholders that a sweep's grid fills in:
+
+    {
+        "entry": [{"left": "EMA({fast})", "op": "crosses_above",
+                   "right": "EMA({slow})"}],
+        "exit": [{"left": "RSI(14)", "op": ">", "right": "{overbought}"}]
+    }
+
+with the grid {"fast": [10, 20], "slow": [50, 100], "overbought": [70, 80]}
+is eight backtests, an operand that is just a placeholder becomes the
+number itself. Workers read the candles from the memory-mapped
+CandleStore files themselves, so the arrays are shared through the page
+cache instead of pickled to every process. Only rules and symbols go to
+the workers and every result comes back as soon as its run finishes.
+
+Sweeps running at the same time share one pool per process, so a web
+worker never starts more than SWEEP_WORKERS processes however many
+sweeps it serves. The pool's processes are spawned, not forked, so they
+don't inherit the web worker's database connections or threads.
+"""
+import itertools
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+
+from candles.store import CandleStore
+from strategy.backtest import InvalidRules, run_backtest
+
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+class InvalidSweep(ValueError):
+    """Raised for a grid that can't be swept."""
+
+
+def placeholders(rules):
+    """Return the placeholder names used anywhere in rules."""
+    if isinstance(rules, dict):
+        rules = list(rules.values())
+    if isinstance(rules, list):
+        return set().union(*map(placeholders, rules))
+    if isinstance(rules, str):
+        return set(_PLACEHOLDER_RE.findall(rules))
+    return set()
+
+
+def fill(rules, params):
+    """Return rules with the placeholders replaced by params."""
+    if isinstance(rules, dict):
+        return {key: fill(value, params) for key, value in rules.items()}
+    if isinstance(rules, list):
+        return [fill(value, params) for value in rules]
+    if not isinstance(rules, str):
+        return rules
+    missing = placeholders(rules) - set(params)
+    if missing:
+        raise InvalidRules(f'No value for {", ".join(sorted(missing))}')
+    whole = _PLACEHOLDER_RE.fullmatch(rules)
+    if whole:
+        return params[whole.group(1)]
+    return _PLACEHOLDER_RE.sub(lambda m: str(params[m.group(1)]), rules)
+
+
+def expand_grid(grid, names):
+    """Return every combination of the grid values for names."""
+    for name in names:
+        values = grid.get(name)
+        if not isinstance(values, list) or not values or not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool)
+                for v in values):
+            raise InvalidSweep(f'{name} needs a list of numbers in the grid')
+    names = sorted(names)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def sweep_runs(strategies, grid=None, max_runs=None):
+    """
+    Return the runs of a sweep.
+
+    strategies are (id, rules, symbols), every strategy runs once per
+    combination of the grid values its rules use, so one without
+    placeholders runs once.
+    """
+    max_runs = settings.SWEEP_MAX_RUNS if max_runs is None else max_runs
+    runs = []
+    for strategy_id, rules, symbols in strategies:
+        for params in expand_grid(grid or {}, placeholders(rules)):
+            runs.append({
+                'strategy': strategy_id,
+                'params': params,
+                'rules': rules,
+                'symbols': symbols,
+            })
+            if len(runs) > max_runs:
+                raise InvalidSweep(f'A sweep runs at most {max_runs} backtests')
+    return runs
+
+
+def run_one(run, interval, options, store_root=None):
+    """Backtest a single run, errors are reported in the result."""
+    result = {'strategy': run['strategy'], 'params': run['params']}
+    try:
+        result.update(run_backtest(
+            fill(run['rules'], run['params']),
+            run['symbols'],
+            interval,
+            store=CandleStore(store_root),
+            **options,
+        ))
+    except Exception as exc:
+        #one broken run must not end the others' stream
+        result['error'] = str(exc) or type(exc).__name__
+    return result
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Return this process's shared pool of workers processes."""
+    key = (os.getpid(), workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                #spawned workers start without Django, and importing this
+                #module before setup would fail
+                initializer=django.setup,
+            )
+        return pool
+
+
+def _discard_pool(workers, pool):
+    with _pools_lock:
+        if _pools.get((os.getpid(), workers)) is pool:
+            del _pools[(os.getpid(), workers)]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_sweep(runs, interval, workers=None, store_root=None, **options):
+    """
+    Yield the result of every run in the order they finish.
+
+    options are passed on to run_backtest, workers defaults to
+    SWEEP_WORKERS and 0 runs everything in this process. Closing the
+    generator cancels the runs that haven't started, a run that has
+    finishes in its worker but only holds up the shared pool.
+    """
+    workers = settings.SWEEP_WORKERS if workers is None else workers
+    store_root = CandleStore(store_root).root
+    if workers <= 0:
+        for run in runs:
+            yield run_one(run, interval, options, store_root)
+        return
+
+    pool = get_pool(workers)
+    #the pool already keeps every core busy, one thread per backtest
+    options = {**options, 'threads': 1}
+    futures = {}
+    try:
+        for run in runs:
+            try:
+                future = pool.submit(
+                    run_one, run, interval, options, store_root,
+                )
+            except BrokenProcessPool:
+                #an earlier sweep lost a worker, start over with a new pool
+                _discard_pool(workers, pool)
+                pool = get_pool(workers)
+                future = pool.submit(
+                    run_one, run, interval, options, store_root,
+                )
+            futures[future] = run
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as exc:
+                #e.g. a worker was killed, which breaks the whole pool
+                if isinstance(exc, BrokenProcessPool):
+                    _discard_pool(workers, pool)
+                run = futures[future]
+                yield {
+                    'strategy': run['strategy'],
+                    'params': run['params'],
+                    'error': str(exc) or type(exc).__name__,
+                }
+    finally:
+        for future in futures:
+            future.cancel()
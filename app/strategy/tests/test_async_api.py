@@ -0,0 +1,105 @@
+"""
+Tests for the async strategy and catalog read endpoints.
+"""
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Coin, Strategy, Tag
+from user.authentication import token_cache
+
+COINS_URL = reverse('strategy-async:coin-list')
+STRATEGIES_URL = reverse('strategy-async:strategy-list')
+
+
+class AsyncCatalogApiTests(TestCase):
+    """Test the async coin endpoints."""
+
+    def setUp(self):
+        Coin.objects.bulk_create(
+            Coin(name=name) for name in ['ETHUSDT', 'BTCUSDT', 'ADAUSDT']
+        )
+        self.client = AsyncClient()
+
+    async def test_list_coins_paginated_by_name(self):
+        """Test coins are listed by name one cursor page at a time."""
+        res = await self.client.get(COINS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        page = res.json()
+        self.assertEqual(
+            [coin['name'] for coin in page['results']],
+            ['ADAUSDT', 'BTCUSDT'],
+        )
+
+        res = await self.client.get(page['next'])
+
+        page = res.json()
+        self.assertEqual([c['name'] for c in page['results']], ['ETHUSDT'])
+        self.assertIsNone(page['next'])
+
+    async def test_invalid_cursor(self):
+        """Test cursors that aren't a name are a 404, like CursorPagination."""
+        for position in ({'a': 1}, [1], None, True):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+            res = await self.client.get(COINS_URL, {'cursor': cursor.decode()})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_retrieve_coin(self):
+        """Test retrieving a coin and a missing coin."""
+        coin = await Coin.objects.aget(name='BTCUSDT')
+
+        res = await self.client.get(
+            reverse('strategy-async:coin-detail', args=[coin.id])
+        )
+        missing = await self.client.get(
+            reverse('strategy-async:coin-detail', args=[coin.id + 100])
+        )
+
+        self.assertEqual(res.json(), {'id': coin.id, 'name': 'BTCUSDT'})
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncStrategyApiTests(TestCase):
+    """Test the async strategy list."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com',
+            password='testpass123',
+        )
+        other = get_user_model().objects.create_user(email='other@example.com')
+        self.token = Token.objects.create(user=self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        self.strategy = Strategy.objects.create(user=self.user, base=coin)
+        self.strategy.coins.add(coin)
+        self.strategy.tags.add(Tag.objects.create(user=self.user, name='Fast'))
+        Strategy.objects.create(user=other, base=coin)
+        self.client = AsyncClient()
+
+    async def test_auth_required(self):
+        """Test anonymous requests are rejected."""
+        res = await self.client.get(STRATEGIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_own_strategies(self):
+        """Test the list matches the serializer output of the sync API."""
+        res = await self.client.get(
+            STRATEGIES_URL,
+            headers={'Authorization': f'Token {self.token.key}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['id'], self.strategy.id)
+        self.assertEqual(results[0]['coins'], [self.strategy.base_id])
+        self.assertEqual(results[0]['tags'][0]['name'], 'Fast')
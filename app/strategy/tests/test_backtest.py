@@ -0,0 +1,171 @@
+"""
+Tests for the vectorized backtester.
+"""
+import numpy as np
+from django.test import SimpleTestCase
+
+from candles.store import to_candles
+
+from strategy.backtest import (
+    InvalidRules,
+    backtest_candles,
+    parse_rules,
+    positions,
+    run_backtest,
+)
+from strategy.tests.test_indicator_engine import make_candles
+
+
+class ParseRulesTests(SimpleTestCase):
+    """Test rules are validated before a backtest runs."""
+
+    def test_defaults(self):
+        """Test the fee and exit conditions default."""
+        rules = parse_rules({
+            'entry': [{'left': 'close', 'op': '>', 'right': 'SMA(10)'}],
+        })
+
+        self.assertEqual(rules['fee'], 0.001)
+        self.assertEqual(rules['exit'], [])
+
+    def test_invalid_rules(self):
+        """Test malformed rules raise InvalidRules."""
+        condition = {'left': 'close', 'op': '>', 'right': 1}
+        for rules in [
+            [],
+            {},
+            {'entry': [{**condition, 'op': '=='}]},
+            {'entry': [{**condition, 'right': 'VWAP(3)'}]},
+            {'entry': [{**condition, 'right': True}]},
+            {'entry': [{'left': 'close', 'op': '>'}]},
+            {'entry': [condition], 'fee': 1.5},
+        ]:
+            with self.assertRaises(InvalidRules, msg=rules):
+                parse_rules(rules)
+
+
+class PositionTests(SimpleTestCase):
+    """Test signals are turned into positions."""
+
+    def test_positions_follow_signals(self):
+        """Test positions open and close on the candle after a signal."""
+        entry = np.array([0, 1, 1, 0, 0, 0, 1, 0], dtype=bool)
+        exit = np.array([1, 0, 0, 0, 1, 0, 1, 0], dtype=bool)
+
+        held = positions(entry, exit)
+
+        #exit wins when both fire on the same candle
+        np.testing.assert_array_equal(held, [0, 0, 1, 1, 1, 0, 0, 0])
+
+
+class BacktestTests(SimpleTestCase):
+    """Test equity curves and trades."""
+
+    def test_single_trade(self):
+        """Test entry, exit and fees against a hand computed trade."""
+        candles = make_candles([10, 10, 11, 12, 15, 9, 11, 10])
+        rules = parse_rules({
+            'entry': [{'left': 'close', 'op': '>=', 'right': 11}],
+            'exit': [{'left': 'close', 'op': '>=', 'right': 15}],
+            'fee': 0.01,
+        })
+
+        equity, trades, held = backtest_candles(rules, candles)
+
+        np.testing.assert_array_equal(held, [0, 0, 0, 1, 1, 0, 0, 1])
+        self.assertEqual(trades['entry_price'].tolist(), [11.0, 11.0])
+        self.assertEqual(trades['exit_price'].tolist(), [15.0, 10.0])
+        self.assertEqual(trades['open'].tolist(), [False, True])
+        first = 15 / 11 * 0.99 ** 2
+        self.assertAlmostEqual(trades['return'][0], first - 1)
+        self.assertAlmostEqual(equity[5], first)
+        self.assertAlmostEqual(equity[-1], first * 10 / 11 * 0.99 ** 2)
+
+    def test_crosses_ignore_warmup(self):
+        """Test a cross needs both candles to have indicator values."""
+        candles = make_candles([5, 4, 3, 2, 3, 4, 5])
+        rules = parse_rules({
+            'entry': [{'left': 'close', 'op': 'crosses_above', 'right': 'SMA(3)'}],
+        })
+
+        _, trades, _ = backtest_candles(rules, candles)
+
+        #SMA(3) exists from candle 2 and close crosses it at candle 4
+        self.assertEqual(trades['entry_time'].tolist(), [4 * 60_000])
+
+    def test_run_backtest_portfolio(self):
+        """Test the portfolio splits capital and skips the warm up."""
+        rising = make_candles(np.arange(1.0, 11.0))
+        candles = {'RISE': rising, 'NONE': make_candles([])}
+        rules = {
+            'entry': [{'left': 'close', 'op': '>', 'right': 0}],
+            'fee': 0,
+        }
+
+        result = run_backtest(
+            rules,
+            ['RISE', 'NONE'],
+            '1m',
+            start=2 * 60_000,
+            load=lambda symbol, start, end: candles[symbol],
+        )
+
+        curve = result['equity_curve']
+        self.assertEqual(curve['open_time'][0], 2 * 60_000)
+        self.assertEqual(len(curve['equity']), 8)
+        #entered on the close of candle 2, the empty coin stays cash
+        self.assertAlmostEqual(curve['equity'][-1], (10 / 3 + 1) / 2, places=5)
+        self.assertEqual(result['coins'][1]['stats']['trades'], 0)
+
+    def test_portfolio_spans_every_symbol(self):
+        """Test candles outside the first symbol's range are kept."""
+        late = np.arange(100.0, 110.0)
+        shifted = np.column_stack(
+            [np.arange(5, 15) * 60_000, late, late + 1, late - 1, late,
+             np.ones_like(late)]
+        )
+        candles = {
+            'LATE': to_candles(shifted),
+            'LONG': make_candles(np.arange(1.0, 21.0)),
+        }
+        rules = {
+            'entry': [{'left': 'close', 'op': '>', 'right': 0}],
+            'fee': 0,
+        }
+
+        result = run_backtest(
+            rules,
+            ['LATE', 'LONG'],
+            '1m',
+            load=lambda symbol, start, end: candles[symbol],
+        )
+
+        curve = result['equity_curve']
+        self.assertEqual(curve['open_time'][0], 0)
+        self.assertEqual(curve['open_time'][-1], 19 * 60_000)
+        self.assertEqual(len(curve['equity']), 20)
+        #LATE is cash before its first candle and holds after its last
+        self.assertAlmostEqual(
+            curve['equity'][-1], (109 / 100 + 20 / 1) / 2, places=5,
+        )
+
+    def test_threads_match_inline(self):
+        """Test symbols tested on threads give the inline results."""
+        candles = {
+            f'COIN{i}': make_candles(np.sin(np.arange(200) / (i + 3)) + 10)
+            for i in range(4)
+        }
+        rules = {
+            'entry': [
+                {'left': 'close', 'op': 'crosses_above', 'right': 'SMA(5)'},
+            ],
+            'exit': [{'left': 'close', 'op': '<', 'right': 'SMA(5)'}],
+        }
+
+        def backtest(threads):
+            return run_backtest(
+                rules, list(candles), '1m', threads=threads,
+                load=lambda symbol, start, end: candles[symbol],
+            )
+
+        self.assertEqual(backtest(4), backtest(1))
@@ -0,0 +1,117 @@
+"""
+Tests for the coin and base catalog APIs.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.cache import catalog_cache
+from core.models import Coin
+from core.pagination import CursorPagination
+
+
+COINS_URL = reverse('strategy:coin-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class CoinPaginationTests(TestCase):
+    """Test cursor pagination of the coin catalog."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Coin.objects.bulk_create(
+            Coin(name=name)
+            for name in ['ETHUSDT', 'ADAUSDT', 'BTCUSDT', 'XRPUSDT', 'BNBETH']
+        )
+        catalog_cache.invalidate()
+
+    def test_pages_follow_name_ordering(self):
+        """Test walking the cursor returns every coin once, in order."""
+        names = []
+        url = COINS_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.json()['results']), 2)
+            names.extend(coin['name'] for coin in res.json()['results'])
+            url = res.json()['next']
+
+        self.assertEqual(
+            names,
+            list(Coin.objects.order_by('name').values_list('name', flat=True)),
+        )
+
+    @patch.object(CursorPagination, 'max_page_size', 3)
+    def test_page_size_is_capped(self):
+        """Test page_size above the maximum is clamped."""
+        res = self.client.get(COINS_URL, {'page_size': 10 ** 6})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 3)
+        self.assertIsNotNone(res.json()['next'])
+
+
+class CoinCacheTests(TestCase):
+    """Test caching of the rendered coin catalog."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Coin.objects.create(name='BTCUSDT')
+        catalog_cache.invalidate()
+
+    def test_repeated_list_is_served_from_cache(self):
+        """Test the second request does not touch the database."""
+        first = self.client.get(COINS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(COINS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('Last-Modified', second)
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test a matching ETag is answered with 304."""
+        etag = self.client.get(COINS_URL)['ETag']
+
+        res = self.client.get(COINS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_new_coin_invalidates_cache(self):
+        """Test changing the catalog serves fresh content."""
+        etag = self.client.get(COINS_URL)['ETag']
+        Coin.objects.create(name='ETHUSDT')
+
+        res = self.client.get(COINS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [coin['name'] for coin in res.json()['results']]
+        self.assertEqual(names, ['BTCUSDT', 'ETHUSDT'])
+
+    @override_settings(CATALOG_CACHE_TTL=0)
+    def test_change_from_other_process_is_seen(self):
+        """Test coins added without signals, e.g. by another process."""
+        etag = self.client.get(COINS_URL)['ETag']
+        Coin.objects.bulk_create([Coin(name='ETHUSDT')])
+
+        res = self.client.get(COINS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [coin['name'] for coin in res.json()['results']]
+        self.assertEqual(names, ['BTCUSDT', 'ETHUSDT'])
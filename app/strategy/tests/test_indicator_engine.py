@@ -0,0 +1,117 @@
+"""
+Tests for the indicator computation engine.
+"""
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from candles.store import to_candles
+from strategy import indicators
+from strategy.indicators import UnknownIndicator, compute, parse_indicator
+
+
+def make_candles(close):
+    """Return candles with the given closes, one minute apart."""
+    close = np.asarray(close, dtype=np.float64)
+    times = np.arange(close.size) * 60_000
+    return to_candles(np.column_stack(
+        [times, close, close + 1, close - 1, close, np.ones_like(close)]
+    ))
+
+
+class ParseIndicatorTests(SimpleTestCase):
+    """Test indicator names are mapped to functions and parameters."""
+
+    def test_names_with_and_without_parameters(self):
+        """Test defaults and positional parameters."""
+        self.assertEqual(parse_indicator('sma'), ('SMA', {}))
+        self.assertEqual(parse_indicator('EMA(50)'), ('EMA', {'period': 50}))
+        self.assertEqual(
+            parse_indicator('BBANDS(20, 2.5)'),
+            ('BBANDS', {'period': 20, 'stddev': 2.5}),
+        )
+
+    def test_invalid_names(self):
+        """Test unknown names and bad parameters raise."""
+        for name in ['VWAP', 'SMA(0)', 'SMA(2.5)', 'RSI(14, 3)', 'EMA(x)']:
+            with self.assertRaises(UnknownIndicator, msg=name):
+                parse_indicator(name)
+
+
+class IndicatorValueTests(SimpleTestCase):
+    """Test indicator values against straightforward implementations."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.close = 100 + np.cumsum(rng.normal(size=300))
+        self.candles = make_candles(self.close)
+        self.series = pd.Series(self.close)
+
+    def test_sma(self):
+        """Test the SMA matches a rolling mean."""
+        result = compute('SMA(10)', self.candles)['sma']
+
+        expected = self.series.rolling(10).mean().to_numpy()
+        np.testing.assert_allclose(result, expected)
+
+    def test_ema_and_macd(self):
+        """Test EMA and MACD match pandas exponential means."""
+        ema = compute('EMA(10)', self.candles)['ema']
+        macd = compute('MACD(12, 26, 9)', self.candles)
+
+        expected = self.series.ewm(span=10, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(ema[9:], expected[9:])
+        self.assertTrue(np.isnan(ema[:9]).all())
+        line = (
+            self.series.ewm(span=12, adjust=False).mean()
+            - self.series.ewm(span=26, adjust=False).mean()
+        )
+        np.testing.assert_allclose(macd['macd'][40:], line[40:])
+        np.testing.assert_allclose(
+            macd['histogram'][40:],
+            (macd['macd'] - macd['signal'])[40:],
+        )
+
+    def test_rsi_bounds(self):
+        """Test the RSI stays between 0 and 100 and is 100 when rising."""
+        rsi = compute('RSI(14)', self.candles)['rsi']
+        rising = compute('RSI(14)', make_candles(np.arange(50.0)))['rsi']
+
+        self.assertTrue(np.isnan(rsi[:14]).all())
+        self.assertTrue(((rsi[14:] >= 0) & (rsi[14:] <= 100)).all())
+        np.testing.assert_allclose(rising[14:], 100)
+
+    def test_bbands_and_atr(self):
+        """Test the bands surround the mean and the ATR of fixed ranges."""
+        bands = compute('BBANDS(20, 2)', self.candles)
+        flat = compute('ATR(5)', make_candles(np.full(30, 10.0)))['atr']
+
+        std = self.series.rolling(20).std(ddof=0).to_numpy()
+        np.testing.assert_allclose(bands['upper'] - bands['middle'], 2 * std)
+        #high - low is always 2 when the close doesn't move
+        np.testing.assert_allclose(flat[4:], 2)
+
+    def test_short_and_empty_input(self):
+        """Test too little history gives NaN of the same length."""
+        for name in indicators.INDICATORS:
+            for size in (0, 3):
+                result = compute(name, make_candles(np.arange(float(size))))
+                for values in result.values():
+                    self.assertEqual(values.size, size, msg=name)
+
+
+class IndicatorCacheTests(SimpleTestCase):
+    """Test results are cached per candle window."""
+
+    def setUp(self):
+        indicators.indicator_cache.clear()
+        self.addCleanup(indicators.indicator_cache.clear)
+
+    def test_same_window_is_computed_once(self):
+        """Test repeated computations of a window hit the cache."""
+        candles = make_candles(np.arange(50.0))
+        first = compute('SMA(5)', candles, 'BTCUSDT', '1m')
+
+        self.assertIs(compute('SMA(5)', candles, 'BTCUSDT', '1m'), first)
+        longer = make_candles(np.arange(51.0))
+        self.assertIsNot(compute('SMA(5)', longer, 'BTCUSDT', '1m'), first)
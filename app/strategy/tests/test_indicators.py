@@ -58,7 +58,7 @@ class PrivateIndicatorsApiTests(TestCase):
         indicators = Indicator.objects.all().order_by('-name')
         serializer = IndicatorSerializer(indicators, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_indicators_limited_to_user(self):
         """Test list of indicators is limited to authenticated user."""
@@ -69,9 +69,9 @@ class PrivateIndicatorsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], indicator.name)
-        self.assertEqual(res.data[0]['id'], indicator.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], indicator.name)
+        self.assertEqual(res.data['results'][0]['id'], indicator.id)
 
 
     def test_update_indicator(self):
@@ -2,20 +2,27 @@
 """
 Tests for strategy APIs.
 """
+import json
+import tempfile
 from decimal import Decimal
 
+import numpy as np
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import (
+    Coin,
     Indicator,
     Strategy,
     Tag,
 )
+from candles.store import CandleStore
+from core.tests.helpers import QueryCountMixin
+from strategy.indicators import indicator_cache
 
 
 from strategy.serializers import (
@@ -87,7 +94,7 @@ class PrivateStrategyApiTests(TestCase):
         strategies = Strategy.objects.all().order_by('-id')
         serializer = StrategySerializer(strategies, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_strategy_list_limited_to_user(self):
         """Test list of strategies is limited to authenticated user."""
@@ -104,7 +111,7 @@ class PrivateStrategyApiTests(TestCase):
         strategies = Strategy.objects.filter(user=self.user)
         serializer = StrategySerializer(strategies, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_strategy_detail(self):
         """Test get strategy detail."""
@@ -390,6 +397,343 @@ class PrivateStrategyApiTests(TestCase):
         self.assertEqual(strategy.indicators.count(), 0)
 
 
+class StrategyQueryCountTests(QueryCountMixin, TestCase):
+    """Test strategy endpoints do not issue a query per strategy."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.coin = Coin.objects.create(name='BTCUSDT')
+        self.tag = Tag.objects.create(user=self.user, name='Trend')
+        self.indicator = Indicator.objects.create(user=self.user, name='RSI')
+
+    def _grow(self, count):
+        """Add count strategies with every relation populated."""
+        for _ in range(count):
+            strategy = Strategy.objects.create(user=self.user, base=self.coin)
+            strategy.coins.add(self.coin)
+            strategy.tags.add(self.tag)
+            strategy.indicators.add(self.indicator)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing strategies runs a fixed number of queries."""
+        self.assertConstantQueries(
+            lambda: self.client.get(STRATEGY_URL),
+            self._grow,
+        )
+
+    def test_list_renders_prefetched_relations(self):
+        """Test prefetched relations are rendered for every strategy."""
+        self._grow(2)
+
+        res = self.client.get(STRATEGY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for item in res.data['results']:
+            self.assertEqual(item['base'], self.coin.id)
+            self.assertEqual(item['coins'], [self.coin.id])
+            self.assertEqual(item['tags'][0]['name'], self.tag.name)
+            self.assertEqual(item['indicators'][0]['name'], self.indicator.name)
+
+    def test_create_indicators_query_count_is_constant(self):
+        """Test creating a strategy resolves its indicators in bulk."""
+        names = []
+
+        def grow(count):
+            names.extend(f'Indicator {len(names) + i}' for i in range(count))
+
+        def create():
+            payload = {
+                'coins': [self.coin.id],
+                'indicators': [{'name': name} for name in names],
+            }
+            res = self.client.post(STRATEGY_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertConstantQueries(create, grow)
+
+    def test_update_tags_keeps_unchanged_relations(self):
+        """Test updating tags only adds and removes the difference."""
+        strategy = Strategy.objects.create(user=self.user)
+        other = Tag.objects.create(user=self.user, name='Range')
+        strategy.tags.add(self.tag, other)
+
+        payload = {'tags': [{'name': 'Trend'}, {'name': 'Breakout'}]}
+        res = self.client.patch(detail_url(strategy.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = sorted(strategy.tags.values_list('name', flat=True))
+        self.assertEqual(names, ['Breakout', 'Trend'])
+        self.assertIn(self.tag, strategy.tags.all())
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Trend').count(), 1,
+        )
+
+
+def indicators_url(strategy_id):
+    """Create and return a strategy indicator series URL."""
+    return reverse('strategy:strategy-indicators', args=[strategy_id])
+
+
+class StrategyIndicatorSeriesApiTests(TestCase):
+    """Test computing indicator series for a strategy's coins."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(CANDLE_STORE_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        indicator_cache.clear()
+
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        self.strategy = Strategy.objects.create(user=self.user, base=coin)
+        self.strategy.coins.add(coin)
+        self.strategy.indicators.add(
+            Indicator.objects.create(user=self.user, name='SMA(3)'),
+            Indicator.objects.create(user=self.user, name='Gut feeling'),
+        )
+        close = np.arange(10, dtype=np.float64)
+        CandleStore().append('BTCUSDT', '1h', np.column_stack([
+            np.arange(10) * 3_600_000, close, close, close, close, close,
+        ]))
+
+    def test_series_for_strategy_coins(self):
+        """Test the last candles and their indicator values are returned."""
+        res = self.client.get(
+            indicators_url(self.strategy.id), {'interval': '1h', 'limit': 4},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        coin = res.data['coins'][0]
+        self.assertEqual(coin['symbol'], 'BTCUSDT')
+        self.assertEqual(
+            coin['open_time'], [h * 3_600_000 for h in range(6, 10)],
+        )
+        sma, unknown = coin['indicators']
+        self.assertEqual(sma['series']['sma'], [5.0, 6.0, 7.0, 8.0])
+        self.assertIn('Unknown indicator', unknown['error'])
+
+    def test_series_before_end(self):
+        """Test end limits the series to older candles."""
+        res = self.client.get(
+            indicators_url(self.strategy.id),
+            {'interval': '1h', 'limit': 3, 'end': 3 * 3_600_000},
+        )
+
+        sma = res.data['coins'][0]['indicators'][0]
+        self.assertEqual(sma['series']['sma'], [None, None, 1.0])
+
+    def test_symbol_the_store_rejects(self):
+        """Test a coin name the store can't hold is reported, not a 500."""
+        self.strategy.coins.add(Coin.objects.create(name='BTC/EUR'))
+
+        res = self.client.get(
+            indicators_url(self.strategy.id), {'interval': '1h', 'limit': 4},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        invalid, valid = res.data['coins']
+        self.assertEqual(invalid['symbol'], 'BTC/EUR')
+        self.assertIn('Invalid symbol', invalid['error'])
+        self.assertEqual(valid['symbol'], 'BTCUSDT')
+
+    def test_invalid_interval(self):
+        """Test an unknown interval is rejected."""
+        res = self.client.get(
+            indicators_url(self.strategy.id), {'interval': '7m'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_strategy_not_found(self):
+        """Test series of another user's strategy are not returned."""
+        other = create_user(email='other@example.com', password='test123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(indicators_url(self.strategy.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+def backtest_url(strategy_id):
+    """Create and return a strategy backtest URL."""
+    return reverse('strategy:strategy-backtest', args=[strategy_id])
+
+
+class StrategyBacktestApiTests(TestCase):
+    """Test backtesting a strategy's rules over its coins."""
+
+    RULES = {
+        'entry': [{'left': 'close', 'op': '>', 'right': 'SMA(3)'}],
+        'exit': [{'left': 'close', 'op': '<', 'right': 'SMA(3)'}],
+        'fee': 0,
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(CANDLE_STORE_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        self.strategy = Strategy.objects.create(
+            user=self.user, base=coin, rules=self.RULES,
+        )
+        self.strategy.coins.add(coin)
+        close = np.arange(1, 21, dtype=np.float64)
+        CandleStore().append('BTCUSDT', '1h', np.column_stack([
+            np.arange(20) * 3_600_000, close, close, close, close, close,
+        ]))
+
+    def test_backtest_strategy_rules(self):
+        """Test the equity curve, trades and stats are returned."""
+        res = self.client.get(backtest_url(self.strategy.id), {'interval': '1h'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['equity_curve']['equity']), 20)
+        coin = res.data['coins'][0]
+        self.assertEqual(coin['symbol'], 'BTCUSDT')
+        self.assertEqual(coin['stats']['trades'], 1)
+        #enters on the close of the first candle above the SMA
+        self.assertEqual(coin['trades'][0]['entry_price'], 3.0)
+        self.assertTrue(coin['trades'][0]['open'])
+        self.assertAlmostEqual(
+            res.data['stats']['total_return'], 20 / 3 - 1, places=5,
+        )
+
+    def test_strategy_without_rules(self):
+        """Test a strategy without rules can't be backtested."""
+        self.strategy.rules = {}
+        self.strategy.save()
+
+        res = self.client.get(backtest_url(self.strategy.id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('rules', res.data)
+
+    def test_update_rejects_invalid_rules(self):
+        """Test rules are validated when the strategy is saved."""
+        payload = {'rules': {'entry': [
+            {'left': 'VWAP', 'op': '>', 'right': 1},
+        ]}}
+
+        res = self.client.patch(
+            detail_url(self.strategy.id), payload, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('rules', res.data)
+        self.strategy.refresh_from_db()
+        self.assertEqual(self.strategy.rules, self.RULES)
+
+    def test_other_users_strategy_not_found(self):
+        """Test another user's strategy can't be backtested."""
+        other = create_user(email='other@example.com', password='test123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(backtest_url(self.strategy.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+SWEEP_URL = reverse('strategy:strategy-sweep')
+
+
+@override_settings(SWEEP_WORKERS=0)
+class StrategySweepApiTests(TestCase):
+    """Test sweeping backtests over strategies and a parameter grid."""
+
+    RULES = {
+        'entry': [{'left': 'close', 'op': '>', 'right': 'SMA({period})'}],
+        'fee': 0,
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(CANDLE_STORE_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        coin = Coin.objects.create(name='BTCUSDT')
+        self.strategy = Strategy.objects.create(
+            user=self.user, base=coin, rules=self.RULES,
+        )
+        self.strategy.coins.add(coin)
+        close = np.arange(1, 21, dtype=np.float64)
+        CandleStore().append('BTCUSDT', '1h', np.column_stack([
+            np.arange(20) * 3_600_000, close, close, close, close, close,
+        ]))
+
+    def test_sweep_streams_ndjson(self):
+        """Test every grid combination is streamed as a JSON line."""
+        payload = {
+            'strategies': [self.strategy.id],
+            'grid': {'period': [3, 5]},
+            'interval': '1h',
+        }
+
+        res = self.client.post(SWEEP_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            sorted(line['params']['period'] for line in lines), [3, 5],
+        )
+        for line in lines:
+            self.assertEqual(line['strategy'], self.strategy.id)
+            self.assertEqual(line['coins'][0]['trades'], [])
+            self.assertGreater(line['stats']['total_return'], 0)
+
+    def test_rules_with_placeholders_are_valid(self):
+        """Test rules can be saved with placeholders for sweeps."""
+        res = self.client.patch(
+            detail_url(self.strategy.id),
+            {'rules': {'entry': [
+                {'left': 'EMA({fast})', 'op': '>', 'right': '{level}'},
+            ]}},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_users_strategies_rejected(self):
+        """Test a sweep can only include the user's own strategies."""
+        other = create_user(email='other@example.com', password='test123')
+        self.client.force_authenticate(other)
+
+        res = self.client.post(
+            SWEEP_URL, {'strategies': [self.strategy.id]}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grid_missing_placeholder(self):
+        """Test a grid must give values for every placeholder."""
+        res = self.client.post(
+            SWEEP_URL, {'strategies': [self.strategy.id]}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('grid', res.data)
+
+
 
 #########
 
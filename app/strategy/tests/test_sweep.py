@@ -0,0 +1,135 @@
+"""
+Tests for backtest sweeps.
+"""
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from candles.store import CandleStore
+from strategy.backtest import InvalidRules
+from strategy.sweep import (
+    InvalidSweep,
+    fill,
+    get_pool,
+    placeholders,
+    run_sweep,
+    sweep_runs,
+)
+
+RULES = {
+    'entry': [{'left': 'close', 'op': '>', 'right': 'SMA({period})'}],
+    'exit': [{'left': 'close', 'op': '<', 'right': '{floor}'}],
+    'fee': 0,
+}
+
+
+class GridTests(SimpleTestCase):
+    """Test placeholders and grids are expanded into runs."""
+
+    def test_fill_placeholders(self):
+        """Test whole operands become numbers, others are formatted."""
+        self.assertEqual(placeholders(RULES), {'period', 'floor'})
+
+        rules = fill(RULES, {'period': 5, 'floor': 2.5})
+
+        self.assertEqual(rules['entry'][0]['right'], 'SMA(5)')
+        self.assertEqual(rules['exit'][0]['right'], 2.5)
+        with self.assertRaises(InvalidRules):
+            fill(RULES, {'period': 5})
+
+    def test_runs_per_grid_combination(self):
+        """Test strategies run once per combination of their placeholders."""
+        plain = {'entry': [{'left': 'close', 'op': '>', 'right': 1}]}
+
+        runs = sweep_runs(
+            [(1, RULES, ['BTCUSDT']), (2, plain, ['ETHUSDT'])],
+            {'period': [3, 5], 'floor': [1, 2], 'unused': [7]},
+        )
+
+        self.assertEqual(
+            [(run['strategy'], run['params']) for run in runs],
+            [
+                (1, {'floor': 1, 'period': 3}),
+                (1, {'floor': 1, 'period': 5}),
+                (1, {'floor': 2, 'period': 3}),
+                (1, {'floor': 2, 'period': 5}),
+                (2, {}),
+            ],
+        )
+
+    def test_invalid_grids(self):
+        """Test missing values and too many runs are rejected."""
+        with self.assertRaises(InvalidSweep):
+            sweep_runs([(1, RULES, [])], {'period': [3]})
+        with self.assertRaises(InvalidSweep):
+            sweep_runs(
+                [(1, RULES, [])],
+                {'period': [1, 2, 3], 'floor': [1, 2]},
+                max_runs=5,
+            )
+
+
+class RunSweepTests(SimpleTestCase):
+    """Test sweeps read candles from the store in worker processes."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        close = np.arange(1, 31, dtype=np.float64)
+        CandleStore(self.root).append('BTCUSDT', '1h', np.column_stack([
+            np.arange(30) * 3_600_000, close, close, close, close, close,
+        ]))
+        self.runs = sweep_runs(
+            [(1, RULES, ['BTCUSDT'])],
+            {'period': [3, 5], 'floor': [0, 100]},
+        )
+
+    def _sweep(self, workers):
+        results = run_sweep(
+            self.runs, '1h', workers=workers, store_root=self.root,
+            points=2, max_trades=0,
+        )
+        return sorted(
+            (sorted(result['params'].items()), result['stats']['total_return'])
+            for result in results
+        )
+
+    def test_process_pool_matches_inline(self):
+        """Test results from worker processes match running inline."""
+        inline = self._sweep(0)
+
+        self.assertEqual(len(inline), 4)
+        self.assertEqual(self._sweep(2), inline)
+
+    def test_errors_are_reported_per_run(self):
+        """Test a run that can't be backtested reports its error."""
+        runs = [{
+            'strategy': 1,
+            'params': {},
+            'rules': {'entry': []},
+            'symbols': ['BTCUSDT'],
+        }]
+
+        result, = run_sweep(runs, '1h', workers=0, store_root=self.root)
+
+        self.assertEqual(result['strategy'], 1)
+        self.assertIn('entry', result['error'])
+
+    def test_unexpected_errors_are_reported_per_run(self):
+        """Test any error of a run ends up in its result, not the stream."""
+        runs = [
+            {**self.runs[0], 'symbols': ['not-a-symbol']},
+            self.runs[1],
+        ]
+
+        results = run_sweep(runs, '1h', workers=2, store_root=self.root)
+        bad, good = sorted(results, key=lambda result: 'stats' in result)
+
+        self.assertIn('symbol', bad['error'])
+        self.assertIn('stats', good)
+
+    def test_sweeps_share_one_pool(self):
+        """Test concurrent sweeps don't each start their own processes."""
+        self.assertIs(get_pool(2), get_pool(2))
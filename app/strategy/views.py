@@ -1,13 +1,20 @@
 """
 Views for the strategy APIs
 """
+import json
+
+from django.http import StreamingHttpResponse
 
 from rest_framework import (
     viewsets,
     mixins,
+    status,
 )
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from core.models import (
     Indicator,
@@ -16,10 +23,16 @@ from core.models import (
     Coin,
     Base
 )
+from core.cache import CachedCatalogMixin
+from core.queryplan import plan_queryset
+from core.timing import TimedViewMixin
 from strategy import serializers
+from strategy.backtest import InvalidRules, run_backtest
+from strategy.indicators import indicator_series
+from strategy.sweep import InvalidSweep, run_sweep, sweep_runs
 
 #ModelViewSet comes with basic CRUD operations
-class StrategyViewSet(viewsets.ModelViewSet):
+class StrategyViewSet(TimedViewMixin, viewsets.ModelViewSet):
     """View for manage strategy APIs."""
     # serializer_class = serializers.StrategySerializer
     #### take care of typos here
@@ -31,7 +44,9 @@ class StrategyViewSet(viewsets.ModelViewSet):
     #overwriting get_queryset method
     def get_queryset(self):
         """Retrieve strategies for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')
+        #join/prefetch only the relations the serializer for this action renders
+        return plan_queryset(queryset, self.get_serializer_class())
 
     #get_serializer_class
     #Returns the class that should be used for the serializer.
@@ -58,11 +73,119 @@ class StrategyViewSet(viewsets.ModelViewSet):
 
         serializer.save(user=self.request.user)
 
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='indicators',
+        url_name='indicators',
+    )
+    def indicator_series(self, request, pk=None):
+        """Return the indicator series computed for the strategy's coins."""
+        query = serializers.IndicatorSeriesQuerySerializer(
+            data=request.query_params,
+        )
+        query.is_valid(raise_exception=True)
+        strategy = self.get_object()
+        symbols = sorted({coin.name for coin in strategy.coins.all()})
+        indicators = sorted(strategy.indicators.all(), key=lambda i: i.name)
+        return Response(indicator_series(
+            symbols,
+            indicators,
+            query.validated_data['interval'],
+            query.validated_data['limit'],
+            end=query.validated_data.get('end'),
+        ))
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='backtest',
+        url_name='backtest',
+    )
+    def backtest(self, request, pk=None):
+        """Backtest the strategy's rules over its coins' candles."""
+        query = serializers.BacktestQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        strategy = self.get_object()
+        if not strategy.rules:
+            return Response(
+                {'rules': ['The strategy has no rules to backtest.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        symbols = sorted({coin.name for coin in strategy.coins.all()})
+        try:
+            result = run_backtest(strategy.rules, symbols, **query.validated_data)
+        except InvalidRules as exc:
+            return Response(
+                {'rules': [str(exc)]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(result)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='sweep',
+        url_name='sweep',
+    )
+    def sweep(self, request):
+        """
+        Backtest several strategies over a parameter grid.
+
+        The response is NDJSON, one line per backtest in the order they
+        finish, so results show up while the others are still running.
+        """
+        body = serializers.SweepSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        options = dict(body.validated_data)
+        ids = options.pop('strategies')
+        grid = options.pop('grid')
+        interval = options.pop('interval')
+
+        strategies = {
+            strategy.id: strategy
+            for strategy in self.get_queryset().filter(id__in=ids)
+        }
+        unknown = sorted(set(ids) - set(strategies))
+        if unknown:
+            return Response(
+                {'strategies': [f'Unknown strategies: {unknown}']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            runs = sweep_runs(
+                [
+                    (
+                        strategy_id,
+                        strategies[strategy_id].rules,
+                        sorted({
+                            coin.name
+                            for coin in strategies[strategy_id].coins.all()
+                        }),
+                    )
+                    for strategy_id in dict.fromkeys(ids)
+                ],
+                grid,
+            )
+        except InvalidSweep as exc:
+            return Response(
+                {'grid': [str(exc)]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return StreamingHttpResponse(
+            (
+                json.dumps(result, cls=JSONEncoder) + '\n'
+                for result in run_sweep(runs, interval, **options)
+            ),
+            content_type='application/x-ndjson',
+        )
+
 
 
 #viewsets.GenericViewSet MUST be last, as it can overwrite
 
-class BaseStrategyAttrViewSet(mixins.DestroyModelMixin,
+class BaseStrategyAttrViewSet(TimedViewMixin, mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
@@ -79,8 +202,11 @@ class BaseStrategyAttrViewSet(mixins.DestroyModelMixin,
     def get_queryset(self):
         """Filter queryset to authenticated user."""
         return self.queryset.filter(user=self.request.user).order_by('-name')
-class BaseCoinViewSet(viewsets.ReadOnlyModelViewSet):
+class BaseCoinViewSet(TimedViewMixin, CachedCatalogMixin,
+                      viewsets.ReadOnlyModelViewSet):
     """Manage base coins in the database."""
+    #the catalog is the same for every user, rendered pages are cached
+    #in core.cache.catalog_cache until the coins change
 
 
     # permission_classes = [IsAuthenticated]
@@ -0,0 +1,124 @@
+"""
+Token authentication with the token lookups cached.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.cache import LRUCache
+
+
+#the user columns a cached lookup keeps, never the password hash
+USER_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff', 'is_superuser')
+
+
+def cached_fields(model):
+    """Return the USER_FIELDS of model in the order from_db() expects."""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in USER_FIELDS
+    )
+
+
+class TokenCache:
+    """
+    Bounded cache of token key -> entry, keyed by a hash of the token.
+
+    Entries live in an in-process LRU with a time to live. When
+    TOKEN_AUTH_CACHE_ALIAS names a Django cache, entries live only there
+    instead, so the invalidate() called when a token is deleted or its
+    user saved reaches every worker at once. Without it other processes
+    drop their copy when the ttl runs out.
+    """
+    key_prefix = 'auth-token'
+
+    def __init__(self, maxsize=None, ttl=None, alias=None):
+        self.local = LRUCache(
+            maxsize or getattr(settings, 'TOKEN_AUTH_CACHE_MAXSIZE', 1024),
+            ttl or getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+        )
+        self.alias = alias
+
+    @property
+    def shared(self):
+        """Return the shared Django cache, if one is configured."""
+        alias = self.alias or getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def cache_key(self, key):
+        """Return the cache key of a token, the token itself isn't stored."""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def get(self, key):
+        """Return the cached entry of token key, or None."""
+        shared = self.shared
+        if shared is None:
+            return self.local.get(self.cache_key(key))
+        #no local copy, it would outlive an invalidate() in another worker
+        return shared.get(self.cache_key(key))
+
+    def set(self, key, entry):
+        """Store entry for token key."""
+        shared = self.shared
+        if shared is None:
+            self.local.set(self.cache_key(key), entry)
+        else:
+            shared.set(self.cache_key(key), entry, self.local.ttl)
+
+    def invalidate(self, *keys):
+        """Drop the entries of the given token keys."""
+        shared = self.shared
+        keys = [self.cache_key(key) for key in keys]
+        for key in keys:
+            self.local.delete(key)
+        if shared is not None and keys:
+            shared.delete_many(keys)
+
+    def clear(self):
+        """Drop every local entry."""
+        self.local.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the token + user query on cache hits.
+
+    Only tokens of active users are cached, as the USER_FIELDS values and
+    the token's creation time. Each request gets a user built from them
+    with the other columns deferred, so it loads those when used and its
+    save() only writes what was loaded or changed.
+    """
+
+    def authenticate_credentials(self, key):
+        model = get_user_model()
+        fields = cached_fields(model)
+        entry = token_cache.get(key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, (
+                tuple(getattr(user, field) for field in fields),
+                token.created,
+            ))
+            return user, token
+
+        values, created = entry
+        user = model.from_db(router.db_for_read(model), fields, values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        token = Token.from_db(
+            router.db_for_read(Token),
+            ('key', 'user_id', 'created'),
+            (key, user.pk, created),
+        )
+        token.user = user
+        return user, token
@@ -0,0 +1,27 @@
+"""
+Signal receivers that keep the token cache in sync.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Forget a deleted token."""
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created=False, **kwargs):
+    """Forget the tokens of a changed or deleted user, e.g. deactivated."""
+    if created:
+        return
+    keys = Token.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True,
+    )
+    token_cache.invalidate(*keys)
@@ -0,0 +1,97 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email='token@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_query(self):
+        """Test the token is only looked up on the first request."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_rejected(self):
+        """Test deleting a token invalidates the cached lookup."""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating the user invalidates the cached lookup."""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updates_are_not_served_stale(self):
+        """Test changes to the user are seen by the next request."""
+        self.client.get(ME_URL)
+        res = self.client.patch(ME_URL, {'name': 'Updated'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated')
+        #the cached user has no password hash, saving it keeps the stored one
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_invalidation_reaches_every_worker(self):
+        """Test an invalidate() in another process rejects the token."""
+        self.client.get(ME_URL)
+        #deactivated and invalidated by another worker
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False,
+        )
+        TokenCache(alias='default').invalidate(self.token.key)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_entry_holds_no_secrets(self):
+        """Test the shared cache has neither the token nor the hash."""
+        self.client.get(ME_URL)
+        shared = caches['default']
+
+        self.assertIsNone(shared.get(f'auth-token:{self.token.key}'))
+        entry = shared.get(TokenCache().cache_key(self.token.key))
+        self.assertIsNotNone(entry)
+        self.assertNotIn(self.user.password, repr(entry))
+        self.assertNotIn(self.token.key, repr(entry))